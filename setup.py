@@ -17,6 +17,9 @@ setup(
     package_dir={'': 'src'},
     packages=find_packages('src'),
     extras_require={
+        'aio': [
+            'python-keycloak-client[aio]>=0.2.2',
+        ],
         'dev': [
             'bumpversion==0.5.3',
             'twine',
@@ -33,6 +36,7 @@ setup(
     install_requires=[
         'python-keycloak-client>=0.2.2',
         'Django>=1.11',
+        'futures; python_version < "3.2"',
     ],
     tests_require=[
         'pytest-django',
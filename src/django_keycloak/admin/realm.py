@@ -1,15 +1,16 @@
 from django.contrib import admin, messages
 from keycloak.exceptions import KeycloakClientError
-from requests.exceptions import HTTPError
 
 from django_keycloak.models import (
     Client,
     OpenIdConnectProfile,
     RemoteClient
 )
+import django_keycloak.services.client
 import django_keycloak.services.permissions
 import django_keycloak.services.realm
 import django_keycloak.services.uma
+import django_keycloak.token_stores
 
 
 def refresh_open_id_connect_well_known(modeladmin, request, queryset):
@@ -40,12 +41,12 @@ refresh_certs.short_description = 'Refresh Certificates'
 
 
 def clear_client_tokens(modeladmin, request, queryset):
-    OpenIdConnectProfile.objects.filter(realm__in=queryset).update(
-        access_token=None,
-        expires_before=None,
-        refresh_token=None,
-        refresh_expires_before=None
-    )
+    django_keycloak.token_stores.get_token_store().clear(
+        OpenIdConnectProfile.objects.filter(realm__in=queryset))
+    for realm in queryset:
+        if hasattr(realm, 'client'):
+            django_keycloak.services.client.clear_access_token_cache(
+                client=realm.client)
     modeladmin.message_user(
         request=request,
         message='Tokens cleared',
@@ -57,12 +58,13 @@ clear_client_tokens.short_description = 'Clear client tokens'
 
 
 def synchronize_permissions(modeladmin, request, queryset):
+    created = updated = 0
     for realm in queryset:
         try:
-            django_keycloak.services.permissions.synchronize(
+            changes = django_keycloak.services.permissions.synchronize(
                 client=realm.client)
-        except HTTPError as e:
-            if e.response.status_code == 403:
+        except KeycloakClientError as e:
+            if e.original_exc.response.status_code == 403:
                 modeladmin.message_user(
                     request=request,
                     message='Forbidden for {}. Does the client\'s service '
@@ -74,9 +76,12 @@ def synchronize_permissions(modeladmin, request, queryset):
                 return
             else:
                 raise
+        created += len(changes['create'])
+        updated += len(changes['update'])
     modeladmin.message_user(
         request=request,
-        message='Permissions synchronized',
+        message='Permissions synchronized ({} created, {} updated)'.format(
+            created, updated),
         level=messages.SUCCESS
     )
 
@@ -88,7 +93,7 @@ def synchronize_resources(modeladmin, request, queryset):
     for realm in queryset:
         try:
             django_keycloak.services.uma.synchronize_client(
-                client=realm.client)
+                client=realm.client, force=True)
         except KeycloakClientError as e:
             if e.original_exc.response.status_code == 400:
                 modeladmin.message_user(
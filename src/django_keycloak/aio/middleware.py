@@ -0,0 +1,99 @@
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import load_backend
+from jose.exceptions import JWTError
+
+from django_keycloak.auth.backends import (
+    KeycloakIDTokenAuthorizationBackend,
+    KeycloakStatelessIDTokenAuthorizationBackend
+)
+from django_keycloak.middleware import \
+    KeycloakStatelessBearerAuthenticationMiddleware as \
+    SyncKeycloakStatelessBearerAuthenticationMiddleware
+from django_keycloak.response import HttpResponseNotAuthorized
+
+import django_keycloak.aio.services.oidc_profile
+import django_keycloak.aio.services.realm
+import django_keycloak.token_stores
+
+logger = logging.getLogger(__name__)
+
+
+class KeycloakStatelessBearerAuthenticationMiddleware(
+        SyncKeycloakStatelessBearerAuthenticationMiddleware):
+    """
+    Bearer authentication middleware which runs natively when served by ASGI.
+    When served by WSGI it behaves like
+    django_keycloak.middleware.KeycloakStatelessBearerAuthenticationMiddleware.
+
+    The token is authenticated like the first configured
+    KeycloakIDTokenAuthorizationBackend would. When that is a
+    KeycloakStatelessIDTokenAuthorizationBackend, without database queries.
+
+    Requires Django 4.1 or higher.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super(KeycloakStatelessBearerAuthenticationMiddleware, self).__init__(
+            get_response)
+        self.backend = None
+        for backend_path in settings.AUTHENTICATION_BACKENDS:
+            backend = load_backend(backend_path)
+            if isinstance(backend, KeycloakIDTokenAuthorizationBackend):
+                self.backend = (backend, backend_path)
+                break
+
+    async def __acall__(self, request):
+        # The flow of MiddlewareMixin, with the native process_request.
+        response = await self.aprocess_request(request)
+        response = response or await self.get_response(request)
+        return await sync_to_async(self.process_response,
+                                   thread_sensitive=True)(request, response)
+
+    async def aprocess_request(self, request):
+        """
+        Async version of process_request.
+        """
+        request.realm = await django_keycloak.aio.services.realm\
+            .aget_cached_realm()
+        django_keycloak.token_stores.get_token_store().bind(request)
+
+        if self.is_exempt(request):
+            return
+
+        if self.header_key not in request.META or self.backend is None:
+            return HttpResponseNotAuthorized(
+                attributes={'realm': request.realm.name})
+
+        backend, backend_path = self.backend
+        if isinstance(backend, KeycloakStatelessIDTokenAuthorizationBackend):
+            user = await sync_to_async(backend.authenticate)(
+                request=request, access_token=self.get_access_token(request))
+            if user is None:
+                return HttpResponseNotAuthorized(
+                    attributes={'realm': request.realm.name})
+
+            user.backend = backend_path
+            request.user = user
+            return
+
+        try:
+            oidc_profile = await django_keycloak.aio.services.oidc_profile\
+                .aget_or_create_from_id_token(
+                    client=request.realm.client,
+                    id_token=self.get_access_token(request)
+                )
+        except JWTError as e:
+            logger.debug('KeycloakStatelessBearerAuthenticationMiddleware: '
+                         'failed to authenticate: "%s"' % str(e))
+            return HttpResponseNotAuthorized(
+                attributes={'realm': request.realm.name})
+
+        user = oidc_profile.user
+        user.backend = backend_path
+        request.user = user
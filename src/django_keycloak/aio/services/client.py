@@ -0,0 +1,61 @@
+from django.utils import timezone
+
+import django_keycloak.aio.services.realm
+
+
+async def aget_openid_client(client):
+    """
+    Async version of django_keycloak.services.client.get_openid_client.
+
+    :param django_keycloak.models.Client client:
+    :rtype: keycloak.aio.openid_connect.KeycloakOpenidConnect
+    """
+    from keycloak.aio.well_known import KeycloakWellKnown
+
+    realm_api_client = await django_keycloak.aio.services.realm\
+        .aget_realm_api_client(realm=client.realm)
+
+    openid = realm_api_client.open_id_connect(
+        client_id=client.client_id,
+        client_secret=client.secret
+    )
+
+    if client.realm._well_known_oidc:
+        openid._well_known = KeycloakWellKnown(
+            realm=realm_api_client,
+            path=realm_api_client.client.get_full_url(
+                openid.get_path_well_known().format(client.realm.name)),
+            content=client.realm.well_known_oidc
+        )
+
+    return await openid
+
+
+async def aget_authz_api_client(client):
+    """
+    Async version of django_keycloak.services.client.get_authz_api_client.
+
+    :param django_keycloak.models.Client client:
+    :rtype: keycloak.aio.authz.KeycloakAuthz
+    """
+    realm_api_client = await django_keycloak.aio.services.realm\
+        .aget_realm_api_client(realm=client.realm)
+
+    return realm_api_client.authz(client_id=client.client_id)
+
+
+async def aget_new_access_token(client):
+    """
+    Async version of django_keycloak.services.client.get_new_access_token.
+
+    :param django_keycloak.models.Client client:
+    :rtype: tuple
+    """
+    scope = 'realm-management openid'
+
+    openid = await aget_openid_client(client=client)
+
+    initiate_time = timezone.now()
+    token_response = await openid.client_credentials(scope=scope)
+
+    return token_response, initiate_time
@@ -0,0 +1,212 @@
+import logging
+
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from django_keycloak.models import Realm
+from django_keycloak.services.exceptions import TokensExpired
+
+import django_keycloak.aio.services.client
+import django_keycloak.services.oidc_profile
+import django_keycloak.token_stores
+
+logger = logging.getLogger(__name__)
+
+
+async def aupdate_or_create_from_code(code, client, redirect_uri):
+    """
+    Async version of
+    django_keycloak.services.oidc_profile.update_or_create_from_code.
+
+    The code is exchanged using the async API client, the user and profile
+    are stored in a worker thread.
+
+    :param django_keycloak.models.Client client:
+    :param str code: authentication code
+    :param str redirect_uri
+    :rtype: django_keycloak.models.OpenIdConnectProfile
+    """
+    openid = await django_keycloak.aio.services.client.aget_openid_client(
+        client=client)
+
+    # Define "initiate_time" before getting the access token to calculate
+    # before which time it expires.
+    initiate_time = timezone.now()
+    token_response = await openid.authorization_code(
+        code=code, redirect_uri=redirect_uri)
+
+    return await sync_to_async(
+        django_keycloak.services.oidc_profile._update_or_create
+    )(client=client, token_response=token_response,
+      initiate_time=initiate_time)
+
+
+async def aget_or_create_from_id_token(client, id_token):
+    """
+    Async version of
+    django_keycloak.services.oidc_profile.get_or_create_from_id_token.
+
+    Verifying the token is CPU bound and shares the key and verified token
+    caches with the synchronous version.
+
+    :param django_keycloak.models.Client client:
+    :param str id_token:
+    :rtype: django_keycloak.models.OpenIdConnectProfile
+    """
+    id_token_object = django_keycloak.services.oidc_profile.decode_id_token(
+        client=client, id_token=id_token)
+
+    return await aupdate_or_create_user_and_oidc_profile(
+        client=client, id_token_object=id_token_object)
+
+
+async def aupdate_or_create_user_and_oidc_profile(client, id_token_object):
+    """
+    Async version of django_keycloak.services.oidc_profile
+    .update_or_create_user_and_oidc_profile. Unchanged profiles are looked up
+    with the async ORM, writes run in a transaction in a worker thread.
+
+    :param django_keycloak.models.Client client:
+    :param dict id_token_object:
+    :rtype: django_keycloak.models.OpenIdConnectProfile
+    """
+    if settings.KEYCLOAK_SYNC_CHANGED_CLAIMS_ONLY:
+        oidc_profile = await _aget_unchanged_oidc_profile(
+            client=client, id_token_object=id_token_object)
+        if oidc_profile is not None:
+            return oidc_profile
+
+    return await sync_to_async(
+        django_keycloak.services.oidc_profile
+        .update_or_create_user_and_oidc_profile
+    )(client=client, id_token_object=id_token_object)
+
+
+async def _aget_unchanged_oidc_profile(client, id_token_object):
+    """
+    :param django_keycloak.models.Client client:
+    :param dict id_token_object:
+    :rtype: django_keycloak.models.OpenIdConnectProfile | None
+    """
+    OpenIdConnectProfileModel = django_keycloak.services.oidc_profile\
+        .get_openid_connect_profile_model()
+
+    queryset = OpenIdConnectProfileModel.objects.filter(
+        sub=id_token_object['sub'], realm=client.realm)
+
+    if OpenIdConnectProfileModel.is_remote:
+        oidc_profile = await queryset.afirst()
+        if oidc_profile is not None:
+            UserModel = django_keycloak.services.oidc_profile\
+                .get_remote_user_model()
+            oidc_profile.user = UserModel(id_token_object)
+        return oidc_profile
+
+    oidc_profile = await queryset.select_related('user').afirst()
+    if oidc_profile is None or not django_keycloak.services.oidc_profile\
+            ._is_user_unchanged(user=oidc_profile.user,
+                                id_token_object=id_token_object):
+        return None
+
+    return oidc_profile
+
+
+async def aget_active_access_token(oidc_profile):
+    """
+    Async version of
+    django_keycloak.services.oidc_profile.get_active_access_token.
+
+    An expired access token is refreshed in a worker thread, because the
+    refresh holds the lock of the token store, a row lock on the profile for
+    the database, around the call to the Keycloak server.
+
+    :param django_keycloak.models.KeycloakOpenIDProfile oidc_profile:
+    :rtype: string
+    :raise: django_keycloak.services.exceptions.TokensExpired
+    """
+    token_store = django_keycloak.token_stores.get_token_store()
+    if not token_store.loads_from_model:
+        await sync_to_async(token_store.load)(oidc_profile)
+
+    initiate_time = timezone.now()
+
+    if oidc_profile.refresh_expires_before is None \
+            or initiate_time > oidc_profile.refresh_expires_before:
+        raise TokensExpired()
+
+    if initiate_time > oidc_profile.expires_before:
+        await _aload_client(oidc_profile)
+        oidc_profile = await sync_to_async(
+            django_keycloak.services.oidc_profile.refresh_tokens
+        )(oidc_profile=oidc_profile, refresh_before=initiate_time)
+
+    elif settings.KEYCLOAK_TOKEN_REFRESH_AHEAD is not None \
+            and not token_store.request_bound \
+            and oidc_profile.expires_before - initiate_time < timedelta(
+                seconds=settings.KEYCLOAK_TOKEN_REFRESH_AHEAD):
+        # Only submits the refresh to the background workers.
+        django_keycloak.services.oidc_profile.schedule_refresh(
+            oidc_profile=oidc_profile)
+
+    return oidc_profile.access_token
+
+
+async def aget_entitlement(oidc_profile):
+    """
+    Async version of django_keycloak.services.oidc_profile.get_entitlement.
+
+    :param django_keycloak.models.KeycloakOpenIDProfile oidc_profile:
+    :rtype: dict
+    :return: Decoded RPT
+    """
+    access_token = await aget_active_access_token(oidc_profile=oidc_profile)
+    client = await _aload_client(oidc_profile)
+
+    cache = django_keycloak.services.oidc_profile._get_entitlement_cache()
+    cache_key = django_keycloak.services.oidc_profile\
+        ._get_entitlement_cache_key(oidc_profile)
+    if cache is not None:
+        rpt_decoded = await cache.aget(cache_key)
+        if rpt_decoded is not None:
+            return rpt_decoded
+
+    authz = await django_keycloak.aio.services.client.aget_authz_api_client(
+        client=client)
+    rpt = await authz.entitlement(token=access_token)
+
+    rpt_decoded = django_keycloak.services.oidc_profile._decode_rpt(
+        oidc_profile=oidc_profile, rpt=rpt['rpt'])
+
+    if cache is not None:
+        timeout = django_keycloak.services.oidc_profile\
+            ._get_entitlement_cache_timeout(rpt_decoded)
+        if timeout is not None:
+            await cache.aset(cache_key, rpt_decoded, timeout)
+
+    return rpt_decoded
+
+
+async def _aload_client(oidc_profile):
+    """
+    Get the client of the realm of the profile. Related objects which are
+    not loaded yet get loaded in a worker thread, so they can be accessed
+    from async code afterwards.
+
+    :param django_keycloak.models.KeycloakOpenIDProfile oidc_profile:
+    :rtype: django_keycloak.models.Client
+    """
+    OpenIdConnectProfileModel = type(oidc_profile)
+
+    if OpenIdConnectProfileModel.realm.is_cached(oidc_profile) \
+            and Realm.server.is_cached(oidc_profile.realm) \
+            and Realm.client.is_cached(oidc_profile.realm):
+        return oidc_profile.realm.client
+
+    def load():
+        oidc_profile.realm.server
+        return oidc_profile.realm.client
+
+    return await sync_to_async(load)()
@@ -0,0 +1,97 @@
+import asyncio
+import functools
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+import django_keycloak.services.realm
+
+# Async API clients are bound to the event loop they are created in, so they
+# are registered per loop.
+_realm_api_clients = weakref.WeakKeyDictionary()
+
+
+async def aget_cached_realm(name=None):
+    """
+    Async version of django_keycloak.services.realm.get_cached_realm. Only
+    when the realm is not registered it gets loaded from the database.
+
+    :param str | None name: name of the realm, the first realm when not given
+    :rtype: django_keycloak.models.Realm | None
+    """
+    try:
+        return django_keycloak.services.realm.get_registered_realm(name=name)
+    except KeyError:
+        return await sync_to_async(
+            django_keycloak.services.realm.get_cached_realm)(name=name)
+
+
+async def aget_realm_api_client(realm):
+    """
+    Async version of django_keycloak.services.realm.get_realm_api_client.
+    API clients are shared within the running event loop, so connections to
+    the Keycloak server are re-used.
+
+    The server and realm have to be loaded already.
+
+    :param django_keycloak.models.Realm realm:
+    :rtype: keycloak.aio.realm.KeycloakRealm
+    """
+    loop = asyncio.get_running_loop()
+    key = (realm.server.url, realm.server.internal_url, realm.name)
+
+    realm_api_clients = _realm_api_clients.setdefault(loop, {})
+    realm_api_client = realm_api_clients.get(key)
+    if realm_api_client is None:
+        # Registered before initialisation so concurrent callers share it,
+        # initialisation is guarded by the lock of the client.
+        realm_api_client = _create_realm_api_client(realm=realm, loop=loop)
+        realm_api_clients[key] = realm_api_client
+
+    return await realm_api_client
+
+
+async def aclear_realm_api_clients():
+    """
+    Close and remove all realm API clients of the running event loop.
+    """
+    realm_api_clients = _realm_api_clients.pop(
+        asyncio.get_running_loop(), {})
+    for realm_api_client in realm_api_clients.values():
+        await realm_api_client.close()
+
+
+def _create_realm_api_client(realm, loop):
+    """
+    :param django_keycloak.models.Realm realm:
+    :param asyncio.AbstractEventLoop loop:
+    :rtype: keycloak.aio.realm.KeycloakRealm
+    """
+    # Imported here because aiohttp is only required when the async API
+    # clients are used.
+    import aiohttp
+    from keycloak.aio.client import KeycloakClient
+    from keycloak.aio.realm import KeycloakRealm
+
+    server_url, headers = django_keycloak.services.realm\
+        .get_server_url_and_headers(realm)
+
+    if isinstance(settings.KEYCLOAK_HTTP_TIMEOUT, (tuple, list)):
+        connect_timeout, read_timeout = settings.KEYCLOAK_HTTP_TIMEOUT
+        timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout,
+                                        sock_read=read_timeout)
+    else:
+        timeout = aiohttp.ClientTimeout(total=settings.KEYCLOAK_HTTP_TIMEOUT)
+
+    connector = aiohttp.TCPConnector(
+        limit=settings.KEYCLOAK_HTTP_POOL_MAXSIZE,
+        force_close=not settings.KEYCLOAK_HTTP_KEEP_ALIVE
+    )
+
+    return KeycloakRealm(
+        server_url=server_url, realm_name=realm.name, headers=headers,
+        loop=loop,
+        client_class=functools.partial(KeycloakClient, connector=connector,
+                                       timeout=timeout)
+    )
@@ -0,0 +1,26 @@
+import django_keycloak.aio.services.client
+import django_keycloak.aio.services.oidc_profile
+
+
+async def aexchange_token(oidc_profile, remote_client):
+    """
+    Async version of django_keycloak.services.remote_client.exchange_token.
+
+    :param django_keycloak.models.OpenIdConnectProfile oidc_profile:
+    :param django_keycloak.models.RemoteClient remote_client:
+    :rtype: dict
+    """
+    active_access_token = await django_keycloak.aio.services.oidc_profile\
+        .aget_active_access_token(oidc_profile=oidc_profile)
+
+    client = await django_keycloak.aio.services.oidc_profile._aload_client(
+        oidc_profile)
+    openid = await django_keycloak.aio.services.client.aget_openid_client(
+        client=client)
+
+    # http://www.keycloak.org/docs/latest/securing_apps/index.html#_token-exchange
+    return await openid.token_exchange(
+        audience=remote_client.name,
+        subject_token=active_access_token,
+        requested_token_type='urn:ietf:params:oauth:token-type:refresh_token'
+    )
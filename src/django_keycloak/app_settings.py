@@ -10,3 +10,80 @@ KEYCLOAK_OIDC_PROFILE_MODEL = 'django_keycloak.OpenIdConnectProfile'
 # Profile
 KEYCLOAK_REMOTE_USER_MODEL = 'django_keycloak.remote_user.KeycloakRemoteUser'
 KEYCLOAK_PERMISSIONS_METHOD = 'role'  # 'role' of 'resource'
+
+# By default the remote user is built from the claims of the stored access
+# token. Set a number of seconds to build it from the userinfo endpoint
+# instead, which can return additional claims. Responses are kept in memory
+# (per process) for that long, but never longer than the access token is
+# valid. 0 requests the userinfo for every request.
+KEYCLOAK_REMOTE_USER_USERINFO_CACHE_TIMEOUT = None
+KEYCLOAK_REMOTE_USER_USERINFO_CACHE_SIZE = 1000
+
+# Maximum number of verified bearer tokens to keep in memory (per process) so
+# their signature does not have to be verified again on every request. Set to
+# 0 to disable.
+KEYCLOAK_VERIFIED_TOKEN_CACHE_SIZE = 1000
+
+# Only write the user and OpenID Connect profile when the claims (email, names
+# or realm) changed compared to what is stored, instead of on every request.
+KEYCLOAK_SYNC_CHANGED_CLAIMS_ONLY = False
+
+# Number of seconds the realm (including server and client) found by the
+# middleware is shared between requests before it gets loaded from the
+# database again. Saving or deleting a Server, Realm or Client (including
+# refreshing certificates or well-known data) clears it immediately, but only
+# in the current process: other processes keep using their realm until the
+# timeout passes. None caches forever, 0 disables.
+KEYCLOAK_REALM_CACHE_TIMEOUT = 300
+
+# Settings of the HTTP connection pool which is shared by all calls to the
+# Keycloak server for a realm. The timeout is in seconds and can be a
+# (connect, read) tuple, None waits forever.
+KEYCLOAK_HTTP_POOL_CONNECTIONS = 10
+KEYCLOAK_HTTP_POOL_MAXSIZE = 10
+KEYCLOAK_HTTP_KEEP_ALIVE = True
+KEYCLOAK_HTTP_TIMEOUT = None
+
+# Number of seconds before the access token expires in which it gets refreshed
+# in a background thread when it is used, so requests don't have to wait for
+# the refresh after it expired. None disables refreshing ahead of expiry.
+KEYCLOAK_TOKEN_REFRESH_AHEAD = None
+KEYCLOAK_TOKEN_REFRESH_AHEAD_WORKERS = 2
+
+# Alias of the cache (as configured in CACHES) to store the decoded
+# entitlement (RPT) of a profile in until it expires, so permission checks
+# don't call Keycloak on every request. None disables caching.
+KEYCLOAK_ENTITLEMENT_CACHE = None
+
+# Sign the OIDC state of the login instead of storing a Nonce in the database
+# for every login. The state is still bound to the session and expires after
+# the maximum age in seconds.
+KEYCLOAK_SIGNED_STATE = False
+KEYCLOAK_SIGNED_STATE_MAX_AGE = 600
+
+# Number of concurrent requests to Keycloak when synchronizing permissions or
+# resources.
+KEYCLOAK_SYNC_WORKERS = 4
+
+# Maximum number of concurrent token exchanges when getting tokens for
+# multiple remote clients at once.
+KEYCLOAK_TOKEN_EXCHANGE_WORKERS = 5
+
+# Number of seconds before the service account access token expires in which
+# the in-process cached token is no longer used.
+KEYCLOAK_SERVICE_ACCOUNT_TOKEN_MARGIN = 30
+
+# Maximum number of clients of which the service account access token is kept
+# in memory (per process). Set to 0 to disable.
+KEYCLOAK_SERVICE_ACCOUNT_TOKEN_CACHE_SIZE = 100
+
+# Where access and refresh tokens are stored: in the database
+# (django_keycloak.token_stores.DatabaseTokenStore), the cache configured in
+# KEYCLOAK_TOKEN_STORE_CACHE (django_keycloak.token_stores.CacheTokenStore)
+# or the session (django_keycloak.token_stores.SessionTokenStore). The cache
+# store waits at most KEYCLOAK_TOKEN_STORE_LOCK_TIMEOUT seconds for a
+# concurrent refresh. The session store keeps the time tokens got cleared in
+# the KEYCLOAK_TOKEN_STORE_CACHE, which has to be shared between processes.
+KEYCLOAK_TOKEN_STORE = 'django_keycloak.token_stores.DatabaseTokenStore'
+KEYCLOAK_TOKEN_STORE_CACHE = 'default'
+KEYCLOAK_TOKEN_STORE_LOCK_TIMEOUT = 10
@@ -4,3 +4,6 @@ from django.apps.config import AppConfig
 class KeycloakAppConfig(AppConfig):
     name = 'django_keycloak'
     verbose_name = 'Keycloak'
+
+    def ready(self):
+        import django_keycloak.signals  # noqa: F401
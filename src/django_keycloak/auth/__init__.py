@@ -5,6 +5,7 @@ from django.middleware.csrf import rotate_token
 from django.utils import timezone
 
 import django_keycloak.services.oidc_profile
+import django_keycloak.token_stores
 
 
 # Using a different session key than the standard django.contrib.auth to
@@ -35,7 +36,9 @@ def get_remote_user(request):
     except OpenIdConnectProfile.DoesNotExist:
         pass
     else:
-        if oidc_profile.refresh_expires_before > timezone.now():
+        django_keycloak.token_stores.get_token_store().load(oidc_profile)
+        if oidc_profile.refresh_expires_before is not None \
+                and oidc_profile.refresh_expires_before > timezone.now():
             user = oidc_profile.user
 
     return user or AnonymousUser()
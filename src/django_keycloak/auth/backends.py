@@ -11,7 +11,11 @@ from jose.exceptions import (
 )
 from keycloak.exceptions import KeycloakClientError
 
+from django_keycloak.permissions import PermissionSet
+from django_keycloak.remote_user import KeycloakTokenUser
+
 import django_keycloak.services.oidc_profile
+import django_keycloak.token_stores
 
 
 logger = logging.getLogger(__name__)
@@ -28,36 +32,61 @@ class KeycloakAuthorizationBase(object):
         except UserModel.DoesNotExist:
             return None
 
-        if user.oidc_profile.refresh_expires_before > timezone.now():
+        django_keycloak.token_stores.get_token_store().load(user.oidc_profile)
+        if user.oidc_profile.refresh_expires_before is not None \
+                and user.oidc_profile.refresh_expires_before > timezone.now():
             return user
 
         return None
 
     def get_all_permissions(self, user_obj, obj=None):
+        """
+        :rtype: django_keycloak.permissions.PermissionSet
+        """
         if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
-            return set()
+            return PermissionSet()
         if not hasattr(user_obj, '_keycloak_perm_cache'):
-            user_obj._keycloak_perm_cache = self.get_keycloak_permissions(
-                user_obj=user_obj)
-        return user_obj._keycloak_perm_cache
+            user_obj._keycloak_perm_cache = {}
+
+        # Cached per backend, the backends get the permissions in different
+        # ways.
+        key = '{}.{}'.format(type(self).__module__, type(self).__name__)
+        if key not in user_obj._keycloak_perm_cache:
+            user_obj._keycloak_perm_cache[key] = PermissionSet(
+                self.get_keycloak_permissions(user_obj=user_obj))
+        return user_obj._keycloak_perm_cache[key]
 
     def get_keycloak_permissions(self, user_obj):
-        if not hasattr(user_obj, 'oidc_profile'):
+        if getattr(user_obj, 'oidc_profile', None) is None:
             return set()
 
         rpt_decoded = django_keycloak.services.oidc_profile\
             .get_entitlement(oidc_profile=user_obj.oidc_profile)
 
+        return self.get_permissions_from_token(
+            token=rpt_decoded,
+            client_id=user_obj.oidc_profile.realm.client.client_id
+        )
+
+    def get_permissions_from_token(self, token, client_id):
+        """
+        Get the permissions granted by the claims of a decoded RPT or access
+        token.
+
+        :param dict token: decoded token
+        :param str client_id: client to get the roles for
+        :rtype: list
+        """
         if settings.KEYCLOAK_PERMISSIONS_METHOD == 'role':
             return [
-                role for role in rpt_decoded['resource_access'].get(
-                    user_obj.oidc_profile.realm.client.client_id,
+                role for role in token.get('resource_access', {}).get(
+                    client_id,
                     {'roles': []}
                 )['roles']
             ]
         elif settings.KEYCLOAK_PERMISSIONS_METHOD == 'resource':
             permissions = []
-            for p in rpt_decoded['authorization'].get('permissions', []):
+            for p in token.get('authorization', {}).get('permissions', []):
                 if 'scopes' in p:
                     for scope in p['scopes']:
                         if '.' in p['resource_set_name']:
@@ -87,8 +116,21 @@ class KeycloakAuthorizationBase(object):
         if not user_obj.is_active:
             return False
 
-        granted_perms = self.get_all_permissions(user_obj, obj)
-        return perm in granted_perms
+        return self.get_all_permissions(user_obj, obj).has_perm(perm)
+
+    def has_perms(self, user_obj, perm_list, obj=None):
+
+        if not user_obj.is_active:
+            return False
+
+        return self.get_all_permissions(user_obj, obj).has_perms(perm_list)
+
+    def has_module_perms(self, user_obj, app_label):
+
+        if not user_obj.is_active:
+            return False
+
+        return self.get_all_permissions(user_obj).has_module_perms(app_label)
 
 
 class KeycloakAuthorizationCodeBackend(KeycloakAuthorizationBase):
@@ -168,3 +210,52 @@ class KeycloakIDTokenAuthorizationBackend(KeycloakAuthorizationBase):
             return oidc_profile.user
 
         return None
+
+
+class KeycloakStatelessIDTokenAuthorizationBackend(
+        KeycloakIDTokenAuthorizationBackend):
+    """
+    Authenticates bearer tokens without storing a user or profile. The
+    verified claims of the access token become an in-memory user and the
+    permissions are read from the token, so no database queries are done.
+    """
+
+    def get_user(self, user_id):
+        # Token users only exist for the duration of a request.
+        return None
+
+    def authenticate(self, request, access_token):
+
+        if not hasattr(request, 'realm'):
+            raise ImproperlyConfigured(
+                'Add BaseKeycloakMiddleware to middlewares')
+
+        try:
+            claims = django_keycloak.services.oidc_profile.decode_id_token(
+                client=request.realm.client,
+                id_token=access_token
+            )
+        except ExpiredSignatureError:
+            logger.debug('KeycloakStatelessIDTokenAuthorizationBackend: '
+                         'failed to authenticate due to an expired access '
+                         'token.')
+        except JWTClaimsError as e:
+            logger.debug('KeycloakStatelessIDTokenAuthorizationBackend: '
+                         'failed to authenticate due to failing claim '
+                         'checks: "%s"' % str(e))
+        except JWTError:
+            logger.debug('KeycloakStatelessIDTokenAuthorizationBackend: '
+                         'failed to authenticate due to a malformed access '
+                         'token.')
+        else:
+            return KeycloakTokenUser(claims=claims,
+                                     client_id=request.realm.client.client_id)
+
+        return None
+
+    def get_keycloak_permissions(self, user_obj):
+        if not isinstance(user_obj, KeycloakTokenUser):
+            return set()
+
+        return self.get_permissions_from_token(token=user_obj.claims,
+                                               client_id=user_obj.client_id)
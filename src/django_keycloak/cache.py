@@ -0,0 +1,97 @@
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    Thread-safe, in-process cache with a maximum size which evicts the least
+    recently used items first. Items can be stored with an expiry time after
+    which they are no longer returned.
+    """
+
+    def __init__(self, maxsize):
+        """
+        :param int maxsize: maximum number of items to hold, 0 disables the
+            cache.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        :param key:
+        :param default: value to return when the key is unknown or expired
+        """
+        with self._lock:
+            try:
+                value, expires_at = self._items.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expires_at is not None and expires_at <= time.time():
+                self.misses += 1
+                return default
+
+            # Re-insert to mark the item as most recently used.
+            self._items[key] = (value, expires_at)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, expires_at=None):
+        """
+        :param key:
+        :param value:
+        :param float expires_at: (optional) timestamp after which the item
+            expires
+        """
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (value, expires_at)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def resize(self, maxsize):
+        """
+        Change the maximum size, the least recently used items which no
+        longer fit are evicted.
+
+        :param int maxsize: maximum number of items to hold, 0 disables the
+            cache.
+        """
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._items) > max(maxsize, 0):
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def evict(self, predicate):
+        """
+        Remove all items for which the value matches the predicate.
+
+        :param callable predicate: called with the value of the item
+        """
+        with self._lock:
+            for key in [key for key, (value, _) in self._items.items()
+                        if predicate(value)]:
+                del self._items[key]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
@@ -6,6 +6,7 @@ from django_keycloak.models import (
     Client,
     OpenIdConnectProfile,
     Realm,
+    RemoteClient,
     Server
 )
 
@@ -65,3 +66,13 @@ class ClientFactory(factory.DjangoModelFactory):
 
     client_id = factory.Faker('slug')
     secret = factory.Faker('uuid4')
+
+
+class RemoteClientFactory(factory.DjangoModelFactory):
+
+    class Meta(object):
+        model = RemoteClient
+
+    realm = factory.SubFactory(RealmFactory)
+
+    name = factory.Faker('slug')
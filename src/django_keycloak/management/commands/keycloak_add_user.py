@@ -1,12 +1,15 @@
 from __future__ import unicode_literals
 
+import io
 import logging
+import os
 
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 
 from django_keycloak.models import Realm
 
+import django_keycloak.services.oidc_profile
 import django_keycloak.services.users
 
 logger = logging.getLogger(__name__)
@@ -27,14 +30,76 @@ def user(username):
         raise TypeError('User does not exist')
 
 
+def local_users():
+    """
+    Users which were not created from Keycloak, those have the subject as
+    username.
+    """
+    UserModel = get_user_model()
+    OpenIdConnectProfileModel = django_keycloak.services.oidc_profile\
+        .get_openid_connect_profile_model()
+
+    if OpenIdConnectProfileModel.is_remote:
+        return UserModel.objects.exclude(
+            username__in=OpenIdConnectProfileModel.objects.values('sub'))
+
+    return UserModel.objects.filter(oidc_profile__isnull=True)
+
+
 class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('--realm', type=realm, required=True)
-        parser.add_argument('--user', type=user, required=True)
+        users = parser.add_mutually_exclusive_group(required=True)
+        users.add_argument('--user', type=user)
+        users.add_argument('--all', action='store_true',
+                           help='Add all users which were not created from '
+                                'Keycloak, in chunks')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Number of users per request')
+        parser.add_argument('--if-exists', default='SKIP',
+                            choices=['FAIL', 'SKIP', 'OVERWRITE'],
+                            help='What to do with users which exist in '
+                                 'Keycloak already')
+        parser.add_argument('--checkpoint',
+                            help='File to store the progress in, an '
+                                 'interrupted run continues from it')
 
     def handle(self, *args, **options):
-        user = options['user']
         realm = options['realm']
 
-        django_keycloak.services.users.add_user(client=realm.client, user=user)
+        if options['user']:
+            django_keycloak.services.users.add_user(client=realm.client,
+                                                    user=options['user'])
+            return
+
+        checkpoint = options['checkpoint']
+        start_after = None
+        if checkpoint and os.path.exists(checkpoint):
+            with io.open(checkpoint) as f:
+                start_after = f.read().strip() or None
+            self.stdout.write('Continuing after {}'.format(start_after))
+
+        reports = django_keycloak.services.users.add_users(
+            client=realm.client,
+            queryset=local_users(),
+            chunk_size=options['chunk_size'],
+            if_resource_exists=options['if_exists'],
+            start_after=start_after
+        )
+
+        failed = False
+        for report in reports:
+            self.stdout.write(
+                'Up to {last_pk}: {added} added, {skipped} skipped, '
+                '{overwritten} overwritten, {failures} failed'.format(
+                    failures=len(report['errors']), **report))
+            for username, error in sorted(report['errors'].items()):
+                self.stderr.write('  {}: {}'.format(username, error))
+
+            # The checkpoint is not moved past a failed chunk, so it gets
+            # retried by the next run. Later chunks are sent again as well.
+            failed = failed or report['failed']
+            if checkpoint and not failed:
+                with io.open(checkpoint, 'w') as f:
+                    f.write('{}'.format(report['last_pk']))
@@ -0,0 +1,52 @@
+from __future__ import unicode_literals
+
+import logging
+
+from django.core.management.base import BaseCommand
+
+from django_keycloak.models import Client
+
+import django_keycloak.services.permissions
+
+logger = logging.getLogger(__name__)
+
+
+def client(client_id):
+    try:
+        return Client.objects.get(client_id=client_id)
+    except Client.DoesNotExist:
+        raise TypeError('Client does not exist')
+
+
+class Command(BaseCommand):
+
+    help = 'Synchronize permissions as roles of the client in Keycloak'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--client', type=client, required=False)
+        parser.add_argument('--prune', action='store_true',
+                            help='Delete roles which do not match a '
+                                 'permission')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only show the changes')
+
+    def handle(self, *args, **options):
+        client = options.get('client')
+        clients = [client] if client else Client.objects.all()
+
+        for client in clients:
+            changes = django_keycloak.services.permissions.synchronize(
+                client=client,
+                prune=options['prune'],
+                dry_run=options['dry_run']
+            )
+
+            self.stdout.write('{}{}: {} to create, {} to update, {} to '
+                              'delete'.format(
+                                  '[dry-run] ' if options['dry_run'] else '',
+                                  client, len(changes['create']),
+                                  len(changes['update']),
+                                  len(changes['delete'])))
+            for action in ('create', 'update', 'delete'):
+                for name in changes[action]:
+                    self.stdout.write('  {} {}'.format(action, name))
@@ -22,12 +22,24 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('--client', type=client, required=False)
+        parser.add_argument('--force', action='store_true',
+                            help='Synchronize even when the models did not '
+                                 'change since the last synchronization')
 
     def handle(self, *args, **options):
         client = options.get('client')
-
-        if client:
-            django_keycloak.services.uma.synchronize_client(client=client)
-        else:
-            for client in Client.objects.all():
-                django_keycloak.services.uma.synchronize_client(client=client)
+        clients = [client] if client else Client.objects.all()
+
+        for client in clients:
+            changes = django_keycloak.services.uma.synchronize_client(
+                client=client, force=options['force'])
+
+            if changes is None:
+                self.stdout.write('{}: models unchanged, skipped'.format(
+                    client))
+            else:
+                self.stdout.write('{}: {} created, {} updated, {} '
+                                  'deleted'.format(
+                                      client, len(changes['create']),
+                                      len(changes['update']),
+                                      len(changes['delete'])))
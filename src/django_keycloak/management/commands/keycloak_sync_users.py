@@ -0,0 +1,44 @@
+from __future__ import unicode_literals
+
+import logging
+
+from django.core.management.base import BaseCommand
+
+from django_keycloak.models import Realm
+
+import django_keycloak.services.users
+
+logger = logging.getLogger(__name__)
+
+
+def realm(name):
+    try:
+        return Realm.objects.get(name=name)
+    except Realm.DoesNotExist:
+        raise TypeError('Realm does not exist')
+
+
+class Command(BaseCommand):
+
+    help = 'Create or update local users for all users of the realm in ' \
+           'Keycloak'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--realm', type=realm, required=True)
+        parser.add_argument('--page-size', type=int, default=500,
+                            help='Number of users per request')
+        parser.add_argument('--prune', action='store_true',
+                            help='Delete profiles of which the user no '
+                                 'longer exists in Keycloak')
+
+    def handle(self, *args, **options):
+        realm = options['realm']
+
+        counts = django_keycloak.services.users.synchronize_users(
+            client=realm.client,
+            page_size=options['page_size'],
+            prune=options['prune']
+        )
+
+        self.stdout.write('{}: {created} created, {updated} updated, '
+                          '{deleted} deleted'.format(realm, **counts))
@@ -6,14 +6,17 @@ from django.contrib.auth.models import AnonymousUser
 from django.utils.deprecation import MiddlewareMixin
 from django.utils.functional import SimpleLazyObject
 
-from django_keycloak.models import Realm
 from django_keycloak.auth import get_remote_user
 from django_keycloak.response import HttpResponseNotAuthorized
 
+import django_keycloak.services.realm
+import django_keycloak.token_stores
+
 
 def get_realm(request):
     if not hasattr(request, '_cached_realm'):
-        request._cached_realm = Realm.objects.first()
+        request._cached_realm = django_keycloak.services.realm\
+            .get_cached_realm()
     return request._cached_realm
 
 
@@ -38,32 +41,45 @@ class BaseKeycloakMiddleware(MiddlewareMixin):
         :param request: django request
         """
         request.realm = SimpleLazyObject(lambda: get_realm(request))
+        django_keycloak.token_stores.get_token_store().bind(request)
 
     def process_response(self, request, response):
 
-        if self.set_session_state_cookie:
-            return self.set_session_state_cookie_(request, response)
+        try:
+            if self.set_session_state_cookie:
+                return self.set_session_state_cookie_(request, response)
 
-        return response
+            return response
+        finally:
+            django_keycloak.token_stores.get_token_store().unbind()
 
     def set_session_state_cookie_(self, request, response):
 
         if not request.user.is_authenticated \
-                or not hasattr(request.user, 'oidc_profile'):
+                or getattr(request.user, 'oidc_profile', None) is None:
             return response
 
-        jwt = request.user.oidc_profile.jwt
-        if not jwt:
-            return response
+        oidc_profile = request.user.oidc_profile
+
+        session_state = oidc_profile.session_state
+        if session_state is None:
+            # Profiles which were stored before the session state was kept.
+            jwt = oidc_profile.jwt
+            if not jwt:
+                return response
+            session_state = jwt['session_state']
 
         cookie_name = getattr(settings, 'KEYCLOAK_SESSION_STATE_COOKIE_NAME',
                               'session_state')
 
+        if request.COOKIES.get(cookie_name) == session_state:
+            return response
+
         # Set a browser readable cookie which expires when the refresh token
         # expires.
         response.set_cookie(
-            cookie_name, value=jwt['session_state'],
-            expires=request.user.oidc_profile.refresh_expires_before,
+            cookie_name, value=session_state,
+            expires=oidc_profile.refresh_expires_before,
             httponly=False
         )
 
@@ -83,12 +99,8 @@ class KeycloakStatelessBearerAuthenticationMiddleware(BaseKeycloakMiddleware):
         super(KeycloakStatelessBearerAuthenticationMiddleware, self)\
             .process_request(request=request)
 
-        if hasattr(settings, 'KEYCLOAK_BEARER_AUTHENTICATION_EXEMPT_PATHS'):
-            path = request.path_info.lstrip('/')
-
-            if any(re.match(m, path) for m in
-                   settings.KEYCLOAK_BEARER_AUTHENTICATION_EXEMPT_PATHS):
-                return
+        if self.is_exempt(request):
+            return
 
         if self.header_key not in request.META:
             return HttpResponseNotAuthorized(
@@ -96,7 +108,7 @@ class KeycloakStatelessBearerAuthenticationMiddleware(BaseKeycloakMiddleware):
 
         user = authenticate(
             request=request,
-            access_token=request.META[self.header_key].split(' ')[1]
+            access_token=self.get_access_token(request)
         )
 
         if user is None:
@@ -105,6 +117,21 @@ class KeycloakStatelessBearerAuthenticationMiddleware(BaseKeycloakMiddleware):
         else:
             request.user = user
 
+    def is_exempt(self, request):
+        """
+        Whether the request path is exempt from bearer authentication.
+        """
+        if hasattr(settings, 'KEYCLOAK_BEARER_AUTHENTICATION_EXEMPT_PATHS'):
+            path = request.path_info.lstrip('/')
+
+            return any(re.match(m, path) for m in
+                       settings.KEYCLOAK_BEARER_AUTHENTICATION_EXEMPT_PATHS)
+
+        return False
+
+    def get_access_token(self, request):
+        return request.META[self.header_key].split(' ')[1]
+
 
 class RemoteUserAuthenticationMiddleware(MiddlewareMixin):
     set_session_state_cookie = False
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_keycloak', '0006_remove_client_service_account'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='openidconnectprofile',
+            name='session_state',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='remoteuseropenidconnectprofile',
+            name='session_state',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
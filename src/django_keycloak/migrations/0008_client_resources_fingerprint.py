@@ -0,0 +1,19 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_keycloak', '0007_openidconnectprofile_session_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='resources_fingerprint',
+            field=models.CharField(blank=True, editable=False,
+                                   max_length=64, null=True),
+        ),
+    ]
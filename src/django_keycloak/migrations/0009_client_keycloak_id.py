@@ -0,0 +1,19 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_keycloak', '0008_client_resources_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='keycloak_id',
+            field=models.CharField(blank=True, editable=False,
+                                   max_length=255, null=True),
+        ),
+    ]
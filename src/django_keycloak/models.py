@@ -88,6 +88,14 @@ class Client(models.Model):
         null=True
     )
 
+    # Internal id of the client in Keycloak, looked up once.
+    keycloak_id = models.CharField(max_length=255, null=True, blank=True,
+                                   editable=False)
+
+    # Fingerprint of the models which were last synchronized as resources.
+    resources_fingerprint = models.CharField(max_length=64, null=True,
+                                             blank=True, editable=False)
+
     @cached_property
     def admin_api_client(self):
         """
@@ -167,6 +175,8 @@ class OpenIdConnectProfileAbstract(TokenModelAbstract):
                               related_name='openid_profiles',
                               on_delete=models.CASCADE)
 
+    session_state = models.CharField(max_length=255, null=True, blank=True)
+
     class Meta(object):
         abstract = True
 
@@ -177,10 +187,12 @@ class OpenIdConnectProfileAbstract(TokenModelAbstract):
         """
         if not self.is_active:
             return None
+        import django_keycloak.services.realm
         client = self.realm.client
         return client.openid_api_client.decode_token(
             token=self.access_token,
-            key=client.realm.certs,
+            key=django_keycloak.services.realm.get_jwt_key(
+                realm=client.realm, token=self.access_token),
             algorithms=client.openid_api_client.well_known[
                 'id_token_signing_alg_values_supported']
         )
@@ -0,0 +1,35 @@
+class PermissionSet(frozenset):
+    """
+    Immutable set of granted permissions. Besides O(1) membership checks the
+    app labels of the permissions are precomputed for module permission
+    checks.
+    """
+
+    def __new__(cls, permissions=()):
+        instance = super(PermissionSet, cls).__new__(cls, permissions)
+        instance.app_labels = frozenset(
+            permission.split('.', 1)[0] for permission in instance
+            if '.' in permission
+        )
+        return instance
+
+    def has_perm(self, perm):
+        """
+        :param str perm: permission in the format "<app label>.<codename>"
+        :rtype: bool
+        """
+        return perm in self
+
+    def has_perms(self, perm_list):
+        """
+        :param iterable perm_list:
+        :rtype: bool
+        """
+        return self.issuperset(perm_list)
+
+    def has_module_perms(self, app_label):
+        """
+        :param str app_label:
+        :rtype: bool
+        """
+        return app_label in self.app_labels
@@ -2,6 +2,7 @@ from django.contrib import auth
 from django.core.exceptions import PermissionDenied
 
 from django_keycloak.models import RemoteUserOpenIdConnectProfile
+from django_keycloak.permissions import PermissionSet
 
 
 class KeycloakRemoteUser(object):
@@ -149,7 +150,7 @@ class KeycloakRemoteUser(object):
             if hasattr(backend, "get_all_permissions") \
                     and not backend.__module__.startswith('django.'):
                 permissions.update(backend.get_all_permissions(self, obj))
-        return permissions
+        return PermissionSet(permissions)
 
     @property
     def oidc_profile(self):
@@ -182,6 +183,22 @@ class KeycloakRemoteUser(object):
         return False
 
     def has_perms(self, perm_list, obj=None):
+        """
+        Check all permissions at once against the backends which support it.
+        :param perm_list:
+        :param obj:
+        :return:
+        """
+        perm_list = set(perm_list)
+        for backend in auth.get_backends():
+            if not hasattr(backend, 'has_perms') \
+                    or backend.__module__.startswith('django.contrib.auth'):
+                continue
+            try:
+                if backend.has_perms(self, perm_list, obj):
+                    return True
+            except PermissionDenied:
+                return False
         return all(self.has_perm(perm, obj) for perm in perm_list)
 
     def has_module_perms(self, module):
@@ -191,7 +208,8 @@ class KeycloakRemoteUser(object):
         :return:
         """
         for backend in auth.get_backends():
-            if not hasattr(backend, 'has_module_perms'):
+            if not hasattr(backend, 'has_module_perms') \
+                    or backend.__module__.startswith('django.contrib.auth'):
                 continue
             try:
                 if backend.has_module_perms(self, module):
@@ -211,3 +229,22 @@ class KeycloakRemoteUser(object):
         database-backed model and should not be used like one
         """
         raise NotImplementedError('This is not a database model')
+
+
+class KeycloakTokenUser(KeycloakRemoteUser):
+    """
+    A remote user which only exists for the duration of a request. It is
+    built from the verified claims of an access token and is not backed by
+    an OpenID Connect profile.
+    """
+
+    oidc_profile = None
+
+    def __init__(self, claims, client_id):
+        """
+        :param dict claims: the verified claims of the access token
+        :param str client_id: the client the token was verified for
+        """
+        super(KeycloakTokenUser, self).__init__(claims)
+        self.claims = claims
+        self.client_id = client_id
@@ -1,32 +1,84 @@
 import logging
+import threading
+import time
 
 from functools import partial
 
+from django.conf import settings
 from django.utils import timezone
 
+from django_keycloak.cache import LRUCache
+from django_keycloak.models import Client
 from django_keycloak.services.exceptions import TokensExpired
 
 import django_keycloak.services.oidc_profile
 
+try:
+    from urllib.parse import urlencode
+except ImportError:
+    from urllib import urlencode
 
 logger = logging.getLogger(__name__)
 
+# Service account access tokens by client, one entry per client.
+service_account_token_cache = LRUCache(
+    maxsize=settings.KEYCLOAK_SERVICE_ACCOUNT_TOKEN_CACHE_SIZE)
+
+# Striped locks to make sure only one thread in the process gets the service
+# account token of a client at the same time.
+_service_account_token_locks = [threading.Lock() for _ in range(16)]
+
+CLIENTS_PATH = '/auth/admin/realms/{realm}/clients?{query}'
+
 
 def get_keycloak_id(client):
     """
-    Get internal Keycloak id for client configured in Realm
-    :param django_keycloak.models.Realm realm:
-    :return:
-    """
-    keycloak_clients = client.admin_api_client.realms.by_name(
-        name=client.realm.name).clients.all()
+    Get internal Keycloak id for client configured in Realm. The id is looked
+    up once and stored on the client, see invalidate_keycloak_id.
+
+    :param django_keycloak.models.Client client:
+    :rtype: str | None
+    """
+    if client.keycloak_id:
+        return client.keycloak_id
+
+    # The clients are filtered by the server, the python-keycloak-client does
+    # not pass query parameters of GET requests.
+    keycloak_clients = client.admin_api_client.get(
+        url=client.admin_api_client.get_full_url(CLIENTS_PATH.format(
+            realm=client.realm.name,
+            query=urlencode({'clientId': client.client_id})
+        ))
+    )
     for keycloak_client in keycloak_clients:
         if keycloak_client['clientId'] == client.client_id:
-            return keycloak_client['id']
+            _set_keycloak_id(client=client, keycloak_id=keycloak_client['id'])
+            return client.keycloak_id
 
     return None
 
 
+def invalidate_keycloak_id(client):
+    """
+    Forget the stored Keycloak id of the client, for example when Keycloak
+    responds it does not exist (anymore).
+
+    :param django_keycloak.models.Client client:
+    """
+    _set_keycloak_id(client=client, keycloak_id=None)
+
+
+def _set_keycloak_id(client, keycloak_id):
+    """
+    :param django_keycloak.models.Client client:
+    :param str | None keycloak_id:
+    """
+    client.keycloak_id = keycloak_id
+    # Updated without saving the client, which would clear the registered
+    # realms and cached tokens.
+    Client.objects.filter(pk=client.pk).update(keycloak_id=keycloak_id)
+
+
 def get_authz_api_client(client):
     """
     :param django_keycloak.models.Client client:
@@ -111,15 +163,59 @@ def get_new_access_token(client):
 
 def get_access_token(client):
     """
-    Get access token from client's service account.
+    Get access token from client's service account. The token is cached
+    in-process until KEYCLOAK_SERVICE_ACCOUNT_TOKEN_MARGIN seconds before it
+    expires.
+
     :param django_keycloak.models.Client client:
     :rtype: str
     """
+    access_token = service_account_token_cache.get(client.pk)
+    if access_token is not None:
+        return access_token
 
+    lock = _service_account_token_locks[
+        hash(client.pk) % len(_service_account_token_locks)]
+
+    with lock:
+        # Another thread might have got a token in the meantime.
+        access_token = service_account_token_cache.get(client.pk)
+        if access_token is not None:
+            return access_token
+
+        oidc_profile = _get_active_service_account_profile(client=client)
+
+        expires_in = (oidc_profile.expires_before - timezone.now())\
+            .total_seconds() - settings.KEYCLOAK_SERVICE_ACCOUNT_TOKEN_MARGIN
+        if expires_in > 0:
+            service_account_token_cache.set(
+                client.pk, oidc_profile.access_token,
+                expires_at=time.time() + expires_in)
+
+        return oidc_profile.access_token
+
+
+def clear_access_token_cache(client=None):
+    """
+    Remove the cached service account token of given client or of all clients.
+
+    :param django_keycloak.models.Client | None client:
+    """
+    if client is None:
+        service_account_token_cache.clear()
+    else:
+        service_account_token_cache.delete(client.pk)
+
+
+def _get_active_service_account_profile(client):
+    """
+    :param django_keycloak.models.Client client:
+    :rtype: django_keycloak.models.OpenIdConnectProfile
+    """
     oidc_profile = get_service_account_profile(client=client)
 
     try:
-        return django_keycloak.services.oidc_profile.get_active_access_token(
+        django_keycloak.services.oidc_profile.get_active_access_token(
             oidc_profile=oidc_profile)
     except TokensExpired:
         token_reponse, initiate_time = get_new_access_token(client=client)
@@ -128,4 +224,5 @@ def get_access_token(client):
             token_response=token_reponse,
             initiate_time=initiate_time
         )
-        return oidc_profile.access_token
+
+    return oidc_profile
@@ -1,24 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
+import hashlib
 import logging
+import threading
+import time
 
 from django.apps import apps as django_apps
 from django.conf import settings
+from django.core.cache import caches
 from django.core.exceptions import ImproperlyConfigured
 from django.contrib.auth import get_user_model
-from django.db import transaction
+from django.db import connection, transaction
 from django.utils import timezone
 from django.utils.module_loading import import_string
+from jose import jwt
+from jose.exceptions import JWTError
 from keycloak.exceptions import KeycloakClientError
 
+from django_keycloak.cache import LRUCache
+from django_keycloak.models import OpenIdConnectProfileAbstract
 from django_keycloak.services.exceptions import TokensExpired
 from django_keycloak.remote_user import KeycloakRemoteUser
 
 
 import django_keycloak.services.realm
+import django_keycloak.token_stores
 
 logger = logging.getLogger(__name__)
 
+# Decoded claims of verified tokens, keyed by realm and a hash of the token.
+verified_token_cache = LRUCache(
+    maxsize=settings.KEYCLOAK_VERIFIED_TOKEN_CACHE_SIZE)
+
+# Userinfo responses for remote users, keyed by realm and a hash of the
+# access token.
+userinfo_cache = LRUCache(
+    maxsize=settings.KEYCLOAK_REMOTE_USER_USERINFO_CACHE_SIZE)
+
+# Striped locks to make sure only one thread in the process refreshes the
+# tokens of a profile at the same time.
+_refresh_locks = [threading.Lock() for _ in range(64)]
+
+# Executor for refreshing tokens ahead of expiry and the primary keys of the
+# profiles which are scheduled for refresh.
+_refresh_executor = None
+_scheduled_refreshes = set()
+_scheduled_refreshes_lock = threading.Lock()
+
 
 def get_openid_connect_profile_model():
     """
@@ -61,18 +90,56 @@ def get_or_create_from_id_token(client, id_token):
     :param str id_token:
     :rtype: django_keycloak.models.OpenIdConnectProfile
     """
+    id_token_object = decode_id_token(client=client, id_token=id_token)
+
+    return update_or_create_user_and_oidc_profile(
+        client=client, id_token_object=id_token_object)
+
+
+def decode_id_token(client, id_token):
+    """
+    Verify and decode given id_token. The decoded claims are cached until the
+    token expires so the signature does not get verified on every request.
+
+    :param django_keycloak.models.Client client:
+    :param str id_token:
+    :rtype: dict
+    :raises jose.exceptions.JWTError: If the token is invalid in any way.
+    """
+    cache_key = (client.realm.pk,
+                 hashlib.sha256(id_token.encode('utf-8')).hexdigest())
+
+    id_token_object = verified_token_cache.get(cache_key)
+    if id_token_object is not None:
+        return id_token_object
+
     issuer = django_keycloak.services.realm.get_issuer(client.realm)
 
     id_token_object = client.openid_api_client.decode_token(
         token=id_token,
-        key=client.realm.certs,
+        key=django_keycloak.services.realm.get_jwt_key(realm=client.realm,
+                                                       token=id_token),
         algorithms=client.openid_api_client.well_known[
             'id_token_signing_alg_values_supported'],
         issuer=issuer
     )
 
-    return update_or_create_user_and_oidc_profile(
-        client=client, id_token_object=id_token_object)
+    if 'exp' in id_token_object:
+        verified_token_cache.set(cache_key, id_token_object,
+                                 expires_at=id_token_object['exp'])
+
+    return id_token_object
+
+
+def evict_verified_tokens(sub):
+    """
+    Remove all cached verified tokens of given subject, for example on logout.
+
+    :param str sub:
+    """
+    verified_token_cache.evict(
+        lambda id_token_object: id_token_object.get('sub') == sub)
+    userinfo_cache.evict(lambda userinfo: userinfo.get('sub') == sub)
 
 
 def update_or_create_user_and_oidc_profile(client, id_token_object):
@@ -85,6 +152,12 @@ def update_or_create_user_and_oidc_profile(client, id_token_object):
 
     OpenIdConnectProfileModel = get_openid_connect_profile_model()
 
+    if settings.KEYCLOAK_SYNC_CHANGED_CLAIMS_ONLY:
+        oidc_profile = _get_unchanged_oidc_profile(
+            client=client, id_token_object=id_token_object)
+        if oidc_profile is not None:
+            return oidc_profile
+
     if OpenIdConnectProfileModel.is_remote:
         oidc_profile, _ = OpenIdConnectProfileModel.objects.\
             update_or_create(
@@ -101,14 +174,9 @@ def update_or_create_user_and_oidc_profile(client, id_token_object):
 
     with transaction.atomic():
         UserModel = get_user_model()
-        email_field_name = UserModel.get_email_field_name()
         user, _ = UserModel.objects.update_or_create(
             username=id_token_object['sub'],
-            defaults={
-                email_field_name: id_token_object.get('email', ''),
-                'first_name': id_token_object.get('given_name', ''),
-                'last_name': id_token_object.get('family_name', '')
-            }
+            defaults=_get_user_defaults(id_token_object=id_token_object)
         )
 
         oidc_profile, _ = OpenIdConnectProfileModel.objects.update_or_create(
@@ -122,20 +190,93 @@ def update_or_create_user_and_oidc_profile(client, id_token_object):
     return oidc_profile
 
 
+def _get_user_defaults(id_token_object):
+    """
+    Get the user fields which are synchronized from the claims.
+
+    :param dict id_token_object:
+    :rtype: dict
+    """
+    UserModel = get_user_model()
+    return {
+        UserModel.get_email_field_name(): id_token_object.get('email', ''),
+        'first_name': id_token_object.get('given_name', ''),
+        'last_name': id_token_object.get('family_name', '')
+    }
+
+
+def _get_unchanged_oidc_profile(client, id_token_object):
+    """
+    Get the existing OpenID Connect profile for given claims when the stored
+    profile (and user) already match them. This requires a single query and
+    no writes or row locks.
+
+    :param django_keycloak.models.Client client:
+    :param dict id_token_object:
+    :rtype: django_keycloak.models.OpenIdConnectProfile | None
+    """
+    OpenIdConnectProfileModel = get_openid_connect_profile_model()
+
+    queryset = OpenIdConnectProfileModel.objects.filter(
+        sub=id_token_object['sub'], realm=client.realm)
+
+    if OpenIdConnectProfileModel.is_remote:
+        oidc_profile = queryset.first()
+        if oidc_profile is not None:
+            UserModel = get_remote_user_model()
+            oidc_profile.user = UserModel(id_token_object)
+        return oidc_profile
+
+    oidc_profile = queryset.select_related('user').first()
+    if oidc_profile is None \
+            or not _is_user_unchanged(user=oidc_profile.user,
+                                      id_token_object=id_token_object):
+        return None
+
+    return oidc_profile
+
+
+def _is_user_unchanged(user, id_token_object):
+    """
+    :param django.contrib.auth.models.AbstractUser user:
+    :param dict id_token_object:
+    :rtype: bool
+    """
+    if user.username != id_token_object['sub']:
+        return False
+
+    for field_name, value in _get_user_defaults(
+            id_token_object=id_token_object).items():
+        if getattr(user, field_name) != value:
+            return False
+
+    return True
+
+
 def get_remote_user_from_profile(oidc_profile):
     """
+    Build the remote user of a profile from the claims of its access token,
+    or from the userinfo when KEYCLOAK_REMOTE_USER_USERINFO_CACHE_TIMEOUT is
+    set.
 
     :param oidc_profile:
     :return:
     """
-
-    try:
-        userinfo = oidc_profile.realm.client.openid_api_client.userinfo(
-            token=oidc_profile.access_token
-        )
-    except KeycloakClientError:
+    if not oidc_profile.access_token:
         return None
 
+    if settings.KEYCLOAK_REMOTE_USER_USERINFO_CACHE_TIMEOUT is None:
+        # The access token was received directly from Keycloak and verified
+        # before it got stored.
+        try:
+            userinfo = jwt.get_unverified_claims(oidc_profile.access_token)
+        except JWTError:
+            return None
+    else:
+        userinfo = get_userinfo(oidc_profile=oidc_profile)
+        if userinfo is None:
+            return None
+
     # Get the user from the KEYCLOAK_REMOTE_USER_MODEL in the settings
     UserModel = get_remote_user_model()
 
@@ -146,6 +287,40 @@ def get_remote_user_from_profile(oidc_profile):
     return user
 
 
+def get_userinfo(oidc_profile):
+    """
+    Get the userinfo for the access token of the profile. Responses are
+    cached for KEYCLOAK_REMOTE_USER_USERINFO_CACHE_TIMEOUT seconds, but not
+    after the access token expires.
+
+    :param oidc_profile:
+    :rtype: dict | None
+    """
+    cache_key = (oidc_profile.realm_id, hashlib.sha256(
+        oidc_profile.access_token.encode('utf-8')).hexdigest())
+
+    userinfo = userinfo_cache.get(cache_key)
+    if userinfo is not None:
+        return userinfo
+
+    try:
+        userinfo = oidc_profile.realm.client.openid_api_client.userinfo(
+            token=oidc_profile.access_token
+        )
+    except KeycloakClientError:
+        return None
+
+    timeout = settings.KEYCLOAK_REMOTE_USER_USERINFO_CACHE_TIMEOUT
+    if oidc_profile.expires_before is not None:
+        timeout = min(timeout, (oidc_profile.expires_before -
+                                timezone.now()).total_seconds())
+    if timeout > 0:
+        userinfo_cache.set(cache_key, userinfo,
+                           expires_at=time.time() + timeout)
+
+    return userinfo
+
+
 def update_or_create_from_code(code, client, redirect_uri):
     """
     Update or create an user based on an authentication code.
@@ -216,7 +391,8 @@ def _update_or_create(client, token_response, initiate_time):
 
     token_object = client.openid_api_client.decode_token(
         token=token_response[token_response_key],
-        key=client.realm.certs,
+        key=django_keycloak.services.realm.get_jwt_key(
+            realm=client.realm, token=token_response[token_response_key]),
         algorithms=client.openid_api_client.well_known[
             'id_token_signing_alg_values_supported'],
         issuer=issuer
@@ -226,6 +402,8 @@ def _update_or_create(client, token_response, initiate_time):
         client=client,
         id_token_object=token_object)
 
+    invalidate_entitlement(oidc_profile=oidc_profile)
+
     return update_tokens(token_model=oidc_profile,
                          token_response=token_response,
                          initiate_time=initiate_time)
@@ -250,11 +428,12 @@ def update_tokens(token_model, token_response, initiate_time):
     token_model.refresh_token = token_response['refresh_token']
     token_model.refresh_expires_before = refresh_expires_before
 
-    token_model.save(update_fields=['access_token',
-                                    'expires_before',
-                                    'refresh_token',
-                                    'refresh_expires_before'])
-    return token_model
+    if isinstance(token_model, OpenIdConnectProfileAbstract):
+        # Stored so the session state cookie can be set without decoding
+        # the access token.
+        token_model.session_state = token_response.get('session_state')
+
+    return django_keycloak.token_stores.get_token_store().save(token_model)
 
 
 def get_active_access_token(oidc_profile):
@@ -265,6 +444,9 @@ def get_active_access_token(oidc_profile):
     :rtype: string
     :raise: django_keycloak.services.exceptions.TokensExpired
     """
+    token_store = django_keycloak.token_stores.get_token_store()
+    token_store.load(oidc_profile)
+
     initiate_time = timezone.now()
 
     if oidc_profile.refresh_expires_before is None \
@@ -272,15 +454,93 @@ def get_active_access_token(oidc_profile):
         raise TokensExpired()
 
     if initiate_time > oidc_profile.expires_before:
-        # Refresh token
+        oidc_profile = refresh_tokens(oidc_profile=oidc_profile,
+                                      refresh_before=initiate_time)
+
+    elif settings.KEYCLOAK_TOKEN_REFRESH_AHEAD is not None \
+            and not token_store.request_bound \
+            and oidc_profile.expires_before - initiate_time < timedelta(
+                seconds=settings.KEYCLOAK_TOKEN_REFRESH_AHEAD):
+        schedule_refresh(oidc_profile=oidc_profile)
+
+    return oidc_profile.access_token
+
+
+def schedule_refresh(oidc_profile):
+    """
+    Refresh the tokens of the profile in a background thread, so the refresh
+    does not delay the request which is using them.
+
+    :param django_keycloak.models.KeycloakOpenIDProfile oidc_profile:
+    """
+    global _refresh_executor
+
+    with _scheduled_refreshes_lock:
+        if oidc_profile.pk in _scheduled_refreshes:
+            return
+        _scheduled_refreshes.add(oidc_profile.pk)
+
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(
+                max_workers=settings.KEYCLOAK_TOKEN_REFRESH_AHEAD_WORKERS)
+
+    _refresh_executor.submit(_refresh_in_background,
+                             model=type(oidc_profile), pk=oidc_profile.pk)
+
+
+def _refresh_in_background(model, pk):
+    try:
+        oidc_profile = model.objects.select_related(
+            'realm__server', 'realm__client').get(pk=pk)
+        refresh_tokens(oidc_profile=oidc_profile,
+                       refresh_before=timezone.now() + timedelta(
+                           seconds=settings.KEYCLOAK_TOKEN_REFRESH_AHEAD))
+    except Exception:
+        logger.exception('Refreshing tokens ahead of expiry failed')
+    finally:
+        with _scheduled_refreshes_lock:
+            _scheduled_refreshes.discard(pk)
+        connection.close()
+
+
+def refresh_tokens(oidc_profile, refresh_before):
+    """
+    Refresh the tokens of the profile when the access token expires before
+    given time.
+
+    Concurrent refreshes of the same profile are serialized, within the process
+    by a lock and across processes by the lock of the token store (a row lock
+    for the database). Whoever gets the lock last re-uses the tokens which got
+    refreshed in the meantime, so the refresh token is only used once.
+
+    :param django_keycloak.models.KeycloakOpenIDProfile oidc_profile:
+    :param datetime.datetime refresh_before:
+    :rtype: django_keycloak.models.KeycloakOpenIDProfile
+    :raise: django_keycloak.services.exceptions.TokensExpired
+    """
+    lock = _refresh_locks[hash(oidc_profile.pk) % len(_refresh_locks)]
+
+    with lock, django_keycloak.token_stores.get_token_store().lock(
+            oidc_profile):
+        initiate_time = timezone.now()
+
+        if oidc_profile.refresh_expires_before is None \
+                or initiate_time > oidc_profile.refresh_expires_before:
+            raise TokensExpired()
+
+        if oidc_profile.expires_before is not None \
+                and oidc_profile.expires_before > refresh_before:
+            # Refreshed concurrently
+            return oidc_profile
+
         token_response = oidc_profile.realm.client.openid_api_client\
             .refresh_token(refresh_token=oidc_profile.refresh_token)
 
-        oidc_profile = update_tokens(token_model=oidc_profile,
-                                     token_response=token_response,
-                                     initiate_time=initiate_time)
+        invalidate_entitlement(oidc_profile=oidc_profile)
 
-    return oidc_profile.access_token
+        return update_tokens(token_model=oidc_profile,
+                             token_response=token_response,
+                             initiate_time=initiate_time)
 
 
 def get_entitlement(oidc_profile):
@@ -295,19 +555,89 @@ def get_entitlement(oidc_profile):
     """
     access_token = get_active_access_token(oidc_profile=oidc_profile)
 
+    cache = _get_entitlement_cache()
+    if cache is not None:
+        rpt_decoded = cache.get(_get_entitlement_cache_key(oidc_profile))
+        if rpt_decoded is not None:
+            return rpt_decoded
+
     rpt = oidc_profile.realm.client.authz_api_client.entitlement(
         token=access_token)
 
-    rpt_decoded = oidc_profile.realm.client.openid_api_client.decode_token(
-        token=rpt['rpt'],
-        key=oidc_profile.realm.certs,
+    rpt_decoded = _decode_rpt(oidc_profile=oidc_profile, rpt=rpt['rpt'])
+
+    if cache is not None:
+        timeout = _get_entitlement_cache_timeout(rpt_decoded)
+        if timeout is not None:
+            cache.set(_get_entitlement_cache_key(oidc_profile),
+                      rpt_decoded, timeout)
+
+    return rpt_decoded
+
+
+def _decode_rpt(oidc_profile, rpt):
+    """
+    :param django_keycloak.models.KeycloakOpenIDProfile oidc_profile:
+    :param str rpt:
+    :rtype: dict
+    """
+    return oidc_profile.realm.client.openid_api_client.decode_token(
+        token=rpt,
+        key=django_keycloak.services.realm.get_jwt_key(
+            realm=oidc_profile.realm, token=rpt),
         options={
             'verify_signature': True,
             'exp': True,
             'iat': True,
             'aud': True
         })
-    return rpt_decoded
+
+
+def invalidate_entitlement(oidc_profile):
+    """
+    Remove the cached entitlement of the profile, for example because the
+    tokens got refreshed or the user logged out.
+
+    :param django_keycloak.models.KeycloakOpenIDProfile oidc_profile:
+    """
+    cache = _get_entitlement_cache()
+    if cache is None:
+        return
+
+    cache.delete(_get_entitlement_cache_key(oidc_profile))
+
+
+def _get_entitlement_cache():
+    if settings.KEYCLOAK_ENTITLEMENT_CACHE is None:
+        return None
+    return caches[settings.KEYCLOAK_ENTITLEMENT_CACHE]
+
+
+def _get_entitlement_cache_key(oidc_profile):
+    """
+    The entitlement is cached per Keycloak session, so it is not shared
+    between the sessions of a user.
+
+    :param django_keycloak.models.KeycloakOpenIDProfile oidc_profile: with
+        loaded tokens
+    :rtype: str
+    """
+    return 'django_keycloak:entitlement:{}:{}'.format(
+        oidc_profile.sub, oidc_profile.session_state)
+
+
+def _get_entitlement_cache_timeout(rpt_decoded):
+    """
+    Number of seconds the decoded RPT can be cached, None when it should not
+    be cached.
+
+    :param dict rpt_decoded:
+    :rtype: int | None
+    """
+    if 'exp' not in rpt_decoded:
+        return None
+    timeout = int(rpt_decoded['exp'] - time.time())
+    return timeout if timeout > 0 else None
 
 
 def get_decoded_jwt(oidc_profile):
@@ -322,7 +652,8 @@ def get_decoded_jwt(oidc_profile):
 
     return client.openid_api_client.decode_token(
         token=active_access_token,
-        key=client.realm.certs,
+        key=django_keycloak.services.realm.get_jwt_key(
+            realm=client.realm, token=active_access_token),
         algorithms=client.openid_api_client.well_known[
             'id_token_signing_alg_values_supported']
     )
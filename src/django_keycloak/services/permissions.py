@@ -1,36 +1,139 @@
 import logging
 
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
 from django.contrib.auth.models import Permission
+from keycloak.exceptions import KeycloakClientError
 from requests.exceptions import HTTPError
 
 import django_keycloak.services.client
 
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote
+
 logger = logging.getLogger(__name__)
 
+ROLES_PATH = '/auth/admin/realms/{realm}/clients/{id}/roles'
 
-def synchronize(client):
+
+def synchronize(client, prune=False, dry_run=False):
     """
+    Synchronize the permissions as roles of the client in Keycloak. The
+    existing roles are fetched once and only the differences are sent to
+    Keycloak, concurrently (KEYCLOAK_SYNC_WORKERS).
+
     :param django_keycloak.models.Client client:
-    :return:
+    :param bool prune: delete roles which do not match a permission
+    :param bool dry_run: only determine the changes
+    :rtype: dict
+    :return: names of the roles to create, update and delete
+    :raise: keycloak.exceptions.KeycloakClientError
     """
-    keycloak_client_id = django_keycloak.services.client.get_keycloak_id(
-        client=client)
+    try:
+        keycloak_client_id, roles_url, roles = _get_roles(client=client)
+    except KeycloakClientError as e:
+        if e.original_exc.response.status_code != 404:
+            raise
+        # The client got re-created in Keycloak, look up its id again.
+        django_keycloak.services.client.invalidate_keycloak_id(client=client)
+        keycloak_client_id, roles_url, roles = _get_roles(client=client)
+
+    changes = get_changes(
+        roles=roles,
+        descriptions=dict(Permission.objects.values_list('codename', 'name')),
+        prune=prune
+    )
+    summary = {action: sorted(names) for action, names in changes.items()}
+
+    logger.debug('Permissions of {}: {} to create, {} to update, {} to '
+                 'delete'.format(client, len(changes['create']),
+                                 len(changes['update']),
+                                 len(changes['delete'])))
+
+    if dry_run:
+        return summary
 
     role_api = client.admin_api_client.realms.by_name(client.realm.name)\
         .clients.by_id(keycloak_client_id).roles
 
-    for permission in Permission.objects.all():
+    def create(name):
+        role_api.create(name=name, description=changes['create'][name])
 
+    def update(name):
+        role_api.by_name(name).update(name=name,
+                                      description=changes['update'][name])
+
+    def delete(name):
+        response = client.admin_api_client.delete(
+            url='{}/{}'.format(roles_url, quote(name, safe='')))
         try:
-            role_api.create(name=permission.codename,
-                            description=permission.name)
+            response.raise_for_status()
         except HTTPError as e:
-            if e.response.status_code != 409:
-                raise
+            # The client returns the response of a delete unchecked, raise
+            # the same error as the other calls.
+            raise KeycloakClientError(original_exc=e)
+
+    tasks = [(create, name) for name in changes['create']] + \
+        [(update, name) for name in changes['update']] + \
+        [(delete, name) for name in changes['delete']]
+
+    if tasks:
+        with ThreadPoolExecutor(
+                max_workers=settings.KEYCLOAK_SYNC_WORKERS) as executor:
+            # Consume the results to raise the first failure.
+            list(executor.map(lambda task: task[0](task[1]), tasks))
+
+    return summary
+
+
+def _get_roles(client):
+    """
+    :param django_keycloak.models.Client client:
+    :rtype: tuple
+    :return: the Keycloak id of the client, the URL of its roles and the
+        existing role representations by name
+    """
+    keycloak_client_id = django_keycloak.services.client.get_keycloak_id(
+        client=client)
+
+    roles_url = client.admin_api_client.get_full_url(
+        ROLES_PATH.format(realm=client.realm.name, id=keycloak_client_id))
+
+    roles = {
+        role['name']: role for role in client.admin_api_client.get(
+            url=roles_url)
+    }
+
+    return keycloak_client_id, roles_url, roles
+
+
+def get_changes(roles, descriptions, prune=False):
+    """
+    Compare the permissions with the existing roles.
+
+    :param dict roles: existing role representations by name
+    :param dict descriptions: permission names by codename
+    :param bool prune: delete roles which do not match a permission
+    :rtype: dict
+    :return: descriptions of the roles to create and update by name and the
+        names of the roles to delete.
+    """
+    create = {}
+    update = {}
+    for name, description in descriptions.items():
+        if name not in roles:
+            create[name] = description
+        elif roles[name].get('description') != description:
+            update[name] = description
 
-        else:
-            continue
+    delete = [name for name in roles if name not in descriptions] \
+        if prune else []
 
-        # Update role
-        role_api.by_name(permission.codename) \
-            .update(name=permission.codename, description=permission.name)
+    return {
+        'create': create,
+        'update': update,
+        'delete': delete
+    }
@@ -1,16 +1,174 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from jose import jwk, jwt
+from jose.exceptions import JWKError, JWTError
 from keycloak.realm import KeycloakRealm
+from requests.adapters import HTTPAdapter
 
 try:
     from urllib.parse import urlparse
 except ImportError:
     from urlparse import urlparse
 
+logger = logging.getLogger(__name__)
+
+# Per-process registry of constructed JWK's. Maps the realm's primary key to a
+# tuple of the raw certs the keys were constructed from and a dict mapping the
+# key id ("kid") to the constructed key.
+_jwks_registry = {}
+_jwks_registry_lock = threading.Lock()
+
+# Per-process registry of realms (with server and client) shared between
+# requests. Maps the realm name (None for the default realm) to a tuple of the
+# realm and the timestamp it was loaded.
+_realm_registry = {}
+_realm_registry_lock = threading.Lock()
+
+# Per-process registry of Keycloak realm API clients. Every API client holds a
+# pooled HTTP session which is shared by all clients of the realm. Maps the
+# server url, internal url and realm name to the API client.
+_realm_api_clients = {}
+_realm_api_clients_lock = threading.Lock()
+
+
+class KeycloakHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter which applies a default timeout to every request.
+    """
+
+    def __init__(self, timeout=None, *args, **kwargs):
+        self.timeout = timeout
+        super(KeycloakHTTPAdapter, self).__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super(KeycloakHTTPAdapter, self).send(request, **kwargs)
+
+
+def get_cached_realm(name=None):
+    """
+    Get a realm with its server and client preloaded. The same instance is
+    returned to every caller until a Server, Realm or Client gets saved or
+    deleted in this process or the configured KEYCLOAK_REALM_CACHE_TIMEOUT
+    passed.
+
+    :param str | None name: name of the realm, the first realm when not given
+    :rtype: django_keycloak.models.Realm | None
+    """
+    from django_keycloak.models import Realm
+
+    try:
+        return get_registered_realm(name=name)
+    except KeyError:
+        pass
+
+    timeout = settings.KEYCLOAK_REALM_CACHE_TIMEOUT
+
+    queryset = Realm.objects.select_related('server', 'client')
+    if name is None:
+        realm = queryset.first()
+    else:
+        realm = queryset.filter(name=name).first()
+
+    # A missing realm is not registered, it can be created by another
+    # process which can't clear the registry of this process.
+    if realm is not None and timeout != 0:
+        with _realm_registry_lock:
+            _realm_registry[name] = (realm, time.time())
+
+    return realm
+
+
+def get_registered_realm(name=None):
+    """
+    Get a realm from the registry without touching the database.
+
+    :param str | None name: name of the realm, the first realm when not given
+    :rtype: django_keycloak.models.Realm | None
+    :raises KeyError: when the realm is not (or no longer) registered
+    """
+    timeout = settings.KEYCLOAK_REALM_CACHE_TIMEOUT
+
+    realm, registered_at = _realm_registry[name]
+    if timeout is not None and registered_at + timeout <= time.time():
+        raise KeyError(name)
+
+    return realm
+
+
+def clear_realm_registry():
+    """
+    Remove all realms from the registry.
+    """
+    with _realm_registry_lock:
+        _realm_registry.clear()
+
 
 def get_realm_api_client(realm):
     """
+    Get the realm API client for given realm. API clients are shared within
+    the process, so connections to the Keycloak server are re-used.
+
     :param django_keycloak.models.Realm realm:
     :return keycloak.realm.Realm:
     """
+    key = (realm.server.url, realm.server.internal_url, realm.name)
+
+    realm_api_client = _realm_api_clients.get(key)
+    if realm_api_client is not None:
+        return realm_api_client
+
+    with _realm_api_clients_lock:
+        realm_api_client = _realm_api_clients.get(key)
+        if realm_api_client is None:
+            realm_api_client = _create_realm_api_client(realm=realm)
+            _realm_api_clients[key] = realm_api_client
+
+    return realm_api_client
+
+
+def clear_realm_api_clients():
+    """
+    Remove all realm API clients from the registry.
+    """
+    with _realm_api_clients_lock:
+        _realm_api_clients.clear()
+
+
+def _create_realm_api_client(realm):
+    """
+    :param django_keycloak.models.Realm realm:
+    :return keycloak.realm.Realm:
+    """
+    server_url, headers = get_server_url_and_headers(realm)
+
+    realm_api_client = KeycloakRealm(server_url=server_url,
+                                     realm_name=realm.name, headers=headers)
+
+    adapter = KeycloakHTTPAdapter(
+        timeout=settings.KEYCLOAK_HTTP_TIMEOUT,
+        pool_connections=settings.KEYCLOAK_HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.KEYCLOAK_HTTP_POOL_MAXSIZE
+    )
+    realm_api_client.client.session.mount('https://', adapter)
+    realm_api_client.client.session.mount('http://', adapter)
+
+    return realm_api_client
+
+
+def get_server_url_and_headers(realm):
+    """
+    Get the URL to connect to the Keycloak server of the realm and the
+    headers to send along with every request.
+
+    :param django_keycloak.models.Realm realm:
+    :rtype: tuple
+    """
     headers = {}
     server_url = realm.server.url
     if realm.server.internal_url:
@@ -23,8 +181,10 @@ def get_realm_api_client(realm):
         if parsed_url.scheme == 'https':
             headers['X-Forwarded-Proto'] = 'https'
 
-    return KeycloakRealm(server_url=server_url, realm_name=realm.name,
-                         headers=headers)
+    if not settings.KEYCLOAK_HTTP_KEEP_ALIVE:
+        headers['Connection'] = 'close'
+
+    return server_url, headers
 
 
 def refresh_certs(realm):
@@ -34,9 +194,88 @@ def refresh_certs(realm):
     """
     realm.certs = realm.client.openid_api_client.certs()
     realm.save(update_fields=['_certs'])
+    clear_jwks_registry(realm=realm)
     return realm
 
 
+def get_jwks(realm):
+    """
+    Get the constructed public keys of the realm, keyed by their key id.
+
+    Keys are constructed once per process and re-used until the certificates
+    of the realm change.
+
+    :param django_keycloak.models.Realm realm:
+    :rtype: dict
+    """
+    entry = _jwks_registry.get(realm.pk)
+    if entry is not None and entry[0] == realm._certs:
+        return entry[1]
+
+    with _jwks_registry_lock:
+        entry = _jwks_registry.get(realm.pk)
+        if entry is None or entry[0] != realm._certs:
+            entry = (realm._certs, _construct_jwks(realm.certs))
+            _jwks_registry[realm.pk] = entry
+
+    return entry[1]
+
+
+def get_jwt_key(realm, token):
+    """
+    Get the key to verify the signature of given token with. When the key id
+    of the token is unknown all keys of the realm are returned.
+
+    :param django_keycloak.models.Realm realm:
+    :param str token:
+    :rtype: jose.jwk.Key | list
+    """
+    keys = get_jwks(realm=realm)
+
+    try:
+        kid = jwt.get_unverified_header(token).get('kid')
+    except JWTError:
+        kid = None
+
+    if kid in keys:
+        return keys[kid]
+
+    return list(keys.values())
+
+
+def clear_jwks_registry(realm=None):
+    """
+    Remove the constructed keys of given realm, or of all realms when no
+    realm is given, from the registry.
+
+    :param django_keycloak.models.Realm | None realm:
+    """
+    with _jwks_registry_lock:
+        if realm is None:
+            _jwks_registry.clear()
+        else:
+            _jwks_registry.pop(realm.pk, None)
+
+
+def _construct_jwks(certs):
+    """
+    :param dict certs: JSON Web Key Set
+    :rtype: dict
+    """
+    keys = {}
+    for key_data in certs.get('keys', []):
+        if key_data.get('use', 'sig') != 'sig':
+            continue
+
+        try:
+            keys[key_data.get('kid')] = jwk.construct(
+                key_data, algorithm=key_data.get('alg', 'RS256'))
+        except JWKError:
+            logger.warning('Unable to construct key {}'.format(
+                key_data.get('kid')))
+    return keys
+
+
 def refresh_well_known_oidc(realm):
     """
     Refresh Open ID Connect .well-known
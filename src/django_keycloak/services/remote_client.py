@@ -1,26 +1,39 @@
+import contextlib
 import logging
+import threading
 
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.utils import timezone
+from keycloak.exceptions import KeycloakClientError
 
 from django_keycloak.models import ExchangedToken
 
 import django_keycloak.services.oidc_profile
+import django_keycloak.token_stores
 
 
 logger = logging.getLogger(__name__)
 
+# Serializes the refreshes of exchanged tokens within the process, striped by
+# profile and remote client.
+_refresh_locks = [threading.Lock() for _ in range(64)]
+
 
-def exchange_token(oidc_profile, remote_client):
+def exchange_token(oidc_profile, remote_client, subject_token=None):
     """
     Exchange access token from OpenID Connect profile for a token of given
     remote client.
 
     :param django_keycloak.models.OpenIdConnectProfile oidc_profile:
     :param django_keycloak.models.RemoteClient remote_client:
+    :param str subject_token: (optional) active access token of the profile
     :rtype: dict
     """
-    active_access_token = django_keycloak.services.oidc_profile\
-        .get_active_access_token(oidc_profile=oidc_profile)
+    active_access_token = subject_token or django_keycloak.services\
+        .oidc_profile.get_active_access_token(oidc_profile=oidc_profile)
 
     # http://www.keycloak.org/docs/latest/securing_apps/index.html#_token-exchange
     return oidc_profile.realm.client.openid_api_client.token_exchange(
@@ -32,28 +45,262 @@ def exchange_token(oidc_profile, remote_client):
 
 def get_active_remote_client_token(oidc_profile, remote_client):
     """
-    Get an active remote client token. Exchange when not available or expired.
+    Get an active remote client token. Refresh or exchange when not available
+    or expired.
 
     :param django_keycloak.models.OpenIdConnectProfile oidc_profile:
     :param django_keycloak.models.RemoteClient remote_client:
     :rtype: str
     """
-    exchanged_token, _ = ExchangedToken.objects.get_or_create(
+    exchanged_token = ExchangedToken.objects.filter(
         oidc_profile=oidc_profile,
         remote_client=remote_client
-    )
+    ).first()
 
-    initiate_time = timezone.now()
+    if exchanged_token is not None:
+        django_keycloak.token_stores.get_token_store().load(exchanged_token)
+
+    if exchanged_token is not None \
+            and _is_active(exchanged_token, timezone.now()):
+        return exchanged_token.access_token
 
-    if exchanged_token.refresh_expires_before is None \
-            or initiate_time > exchanged_token.refresh_expires_before \
-            or initiate_time > exchanged_token.expires_before:
-        token_response = exchange_token(oidc_profile, remote_client)
+    if exchanged_token is None:
+        exchanged_token = ExchangedToken(oidc_profile=oidc_profile,
+                                         remote_client=remote_client)
 
-        exchanged_token = django_keycloak.services.oidc_profile.update_tokens(
-            token_model=exchanged_token,
+    with lock_exchanged_tokens([exchanged_token]):
+        initiate_time = timezone.now()
+
+        if _is_active(exchanged_token, initiate_time):
+            # Refreshed concurrently
+            return exchanged_token.access_token
+
+        token_response = refresh_exchanged_token(
+            oidc_profile=oidc_profile,
+            remote_client=remote_client,
+            exchanged_token=exchanged_token,
+            initiate_time=initiate_time
+        )
+
+        exchanged_token = store_exchanged_token(
+            exchanged_token=exchanged_token,
             token_response=token_response,
             initiate_time=initiate_time
         )
 
     return exchanged_token.access_token
+
+
+def get_active_remote_client_tokens(oidc_profile, remote_clients):
+    """
+    Get active tokens for multiple remote clients at once. The exchanged
+    tokens are loaded in one query and the stale ones get refreshed or
+    exchanged concurrently.
+
+    :param django_keycloak.models.OpenIdConnectProfile oidc_profile:
+    :param list remote_clients: django_keycloak.models.RemoteClient's
+    :rtype: dict
+    :return: access tokens by name of the remote client
+    """
+    exchanged_tokens = {
+        exchanged_token.remote_client_id: exchanged_token
+        for exchanged_token in django_keycloak.token_stores.get_token_store()
+        .load_many(list(ExchangedToken.objects.filter(
+            oidc_profile=oidc_profile,
+            remote_client__in=remote_clients
+        )))
+    }
+
+    initiate_time = timezone.now()
+
+    access_tokens = {}
+    stale = []
+    for remote_client in remote_clients:
+        exchanged_token = exchanged_tokens.get(remote_client.pk)
+        if exchanged_token is not None \
+                and _is_active(exchanged_token, initiate_time):
+            access_tokens[remote_client.name] = exchanged_token.access_token
+            continue
+
+        if exchanged_token is None:
+            exchanged_token = ExchangedToken(oidc_profile=oidc_profile,
+                                             remote_client=remote_client)
+        stale.append((remote_client, exchanged_token))
+
+    if not stale:
+        return access_tokens
+
+    with lock_exchanged_tokens([item[1] for item in stale]):
+        initiate_time = timezone.now()
+
+        refresh = []
+        for remote_client, exchanged_token in stale:
+            if _is_active(exchanged_token, initiate_time):
+                # Refreshed concurrently
+                access_tokens[remote_client.name] = \
+                    exchanged_token.access_token
+            else:
+                refresh.append((remote_client, exchanged_token))
+
+        if not refresh:
+            return access_tokens
+
+        # Get the subject token once (it might need a refresh) instead of in
+        # every exchange.
+        subject_token = django_keycloak.services.oidc_profile\
+            .get_active_access_token(oidc_profile=oidc_profile)
+
+        # Load the realm and client in this thread, so the workers only call
+        # Keycloak.
+        oidc_profile.realm.client.openid_api_client
+
+        with ThreadPoolExecutor(
+                max_workers=min(len(refresh),
+                                settings.KEYCLOAK_TOKEN_EXCHANGE_WORKERS)
+        ) as executor:
+            token_responses = list(executor.map(
+                lambda item: refresh_exchanged_token(
+                    oidc_profile=oidc_profile,
+                    remote_client=item[0],
+                    exchanged_token=item[1],
+                    initiate_time=initiate_time,
+                    subject_token=subject_token
+                ),
+                refresh
+            ))
+
+        # The tokens are stored in this thread, so the database is not
+        # accessed from the workers.
+        for (remote_client, exchanged_token), token_response in zip(
+                refresh, token_responses):
+            exchanged_token = store_exchanged_token(
+                exchanged_token=exchanged_token,
+                token_response=token_response,
+                initiate_time=initiate_time
+            )
+            access_tokens[remote_client.name] = exchanged_token.access_token
+
+    return access_tokens
+
+
+@contextlib.contextmanager
+def lock_exchanged_tokens(exchanged_tokens):
+    """
+    Context manager which serializes refreshes of the exchanged tokens,
+    within the process by a lock and across processes by the lock of the
+    token store. The current tokens are loaded once the locks are acquired,
+    so whoever gets the locks last re-uses the tokens which got refreshed in
+    the meantime.
+
+    Exchanged tokens which are not stored yet are only locked within the
+    process; when they get created concurrently by another process the tokens
+    get stored on that one (see `store_exchanged_token`).
+
+    :param list exchanged_tokens: django_keycloak.models.ExchangedToken's
+    """
+    token_store = django_keycloak.token_stores.get_token_store()
+
+    # Acquired in a fixed order, so concurrent requests for overlapping
+    # remote clients don't deadlock.
+    stripes = sorted({
+        hash((exchanged_token.oidc_profile_id,
+              exchanged_token.remote_client_id)) % len(_refresh_locks)
+        for exchanged_token in exchanged_tokens
+    })
+    locks = [_refresh_locks[stripe] for stripe in stripes]
+    locks.extend(
+        token_store.lock(exchanged_token)
+        for exchanged_token in sorted(
+            exchanged_tokens, key=lambda token: token.remote_client_id)
+        if exchanged_token.pk is not None
+    )
+
+    with _nested(locks):
+        yield
+
+
+@contextlib.contextmanager
+def _nested(context_managers):
+    """
+    Enter the context managers in order and exit them in reverse order.
+
+    :param list context_managers:
+    """
+    if not context_managers:
+        yield
+        return
+
+    with context_managers[0], _nested(context_managers[1:]):
+        yield
+
+
+def _is_active(exchanged_token, initiate_time):
+    """
+    :param django_keycloak.models.ExchangedToken exchanged_token:
+    :param datetime.datetime initiate_time:
+    :rtype: bool
+    """
+    return exchanged_token.expires_before is not None \
+        and initiate_time <= exchanged_token.expires_before
+
+
+def refresh_exchanged_token(oidc_profile, remote_client, exchanged_token,
+                            initiate_time, subject_token=None):
+    """
+    Get new tokens for an exchanged token. The refresh token is used when it
+    is still valid, otherwise or when the refresh fails the access token of
+    the profile gets exchanged again.
+
+    :param django_keycloak.models.OpenIdConnectProfile oidc_profile:
+    :param django_keycloak.models.RemoteClient remote_client:
+    :param django_keycloak.models.ExchangedToken exchanged_token:
+    :param datetime.datetime initiate_time:
+    :param str subject_token: (optional) active access token of the profile
+    :rtype: dict
+    """
+    if exchanged_token.refresh_token \
+            and exchanged_token.refresh_expires_before is not None \
+            and initiate_time < exchanged_token.refresh_expires_before:
+        try:
+            # The exchanged tokens are issued to the client of the realm.
+            return oidc_profile.realm.client.openid_api_client.refresh_token(
+                refresh_token=exchanged_token.refresh_token)
+        except KeycloakClientError:
+            logger.debug('Refreshing exchanged token for {} failed, '
+                         'exchanging again'.format(remote_client.name))
+
+    return exchange_token(oidc_profile, remote_client,
+                          subject_token=subject_token)
+
+
+def store_exchanged_token(exchanged_token, token_response, initiate_time):
+    """
+    Store the tokens on the exchanged token. When it gets created
+    concurrently by another request the tokens get stored on that one.
+
+    :param django_keycloak.models.ExchangedToken exchanged_token:
+    :param dict token_response:
+    :param datetime.datetime initiate_time:
+    :rtype: django_keycloak.models.ExchangedToken
+    """
+    try:
+        with transaction.atomic():
+            return django_keycloak.services.oidc_profile.update_tokens(
+                token_model=exchanged_token,
+                token_response=token_response,
+                initiate_time=initiate_time
+            )
+    except IntegrityError:
+        if exchanged_token.pk is not None:
+            raise
+
+    exchanged_token = ExchangedToken.objects.get(
+        oidc_profile_id=exchanged_token.oidc_profile_id,
+        remote_client_id=exchanged_token.remote_client_id
+    )
+    # No need to load the tokens, they get overwritten.
+    return django_keycloak.services.oidc_profile.update_tokens(
+        token_model=exchanged_token,
+        token_response=token_response,
+        initiate_time=initiate_time
+    )
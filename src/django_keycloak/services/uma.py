@@ -1,22 +1,51 @@
+import hashlib
+import json
+
+from concurrent.futures import ThreadPoolExecutor
+
 from django.apps.registry import apps
+from django.conf import settings
 from django.utils.text import slugify
-
 from keycloak.exceptions import KeycloakClientError
 
 import django_keycloak.services.client
 
+# Number of resources per request when listing the registered resources,
+# Keycloak limits unpaged listings.
+PAGE_SIZE = 100
 
-def synchronize_client(client):
+
+def synchronize_client(client, force=False):
     """
     Synchronize all models as resources for a client.
 
+    The registered resources are listed once and compared with the models,
+    only the differences are sent to Keycloak. Resources of models which no
+    longer exist are deleted. When the models did not change since the last
+    synchronization nothing is requested at all, unless forced.
+
     :type client: django_keycloak.models.Client
+    :param bool force: synchronize even when the models did not change
+    :rtype: dict | None
+    :return: names of the resources to create, update and delete or None when
+        the synchronization was skipped
     """
-    for app_config in apps.get_app_configs():
-        synchronize_resources(
-            client=client,
-            app_config=app_config
-        )
+    resources = {}
+    for klass in apps.get_models():
+        resources.update(_get_resources(client=client, model=klass))
+
+    fingerprint = hashlib.sha256(
+        json.dumps(resources, sort_keys=True).encode('utf-8')).hexdigest()
+
+    if not force and client.resources_fingerprint == fingerprint:
+        return None
+
+    changes = _synchronize(client=client, resources=resources, prune=True)
+
+    client.resources_fingerprint = fingerprint
+    client.save(update_fields=['resources_fingerprint'])
+
+    return changes
 
 
 def synchronize_resources(client, app_config):
@@ -26,34 +55,142 @@ def synchronize_resources(client, app_config):
 
     :type client: django_keycloak.models.Client
     :type app_config: django.apps.config.AppConfig
+    :rtype: dict
     """
 
     if not app_config.models_module:
         return
 
+    resources = {}
+    for klass in app_config.get_models():
+        resources.update(_get_resources(client=client, model=klass))
+
+    return _synchronize(client=client, resources=resources, prune=False)
+
+
+def _synchronize(client, resources, prune):
+    """
+    :type client: django_keycloak.models.Client
+    :param dict resources: type and scopes of the resources by name
+    :param bool prune: delete resources of the client's type which are not
+        given
+    :rtype: dict
+    """
     uma1_client = client.uma1_api_client
 
     access_token = django_keycloak.services.client.get_access_token(
         client=client
     )
 
-    for klass in app_config.get_models():
-        scopes = _get_all_permissions(klass._meta)
+    type_prefix = _get_type(client=client, name='')
+    registered = {
+        resource['name']: resource for resource in
+        _list_resources(uma1_client=uma1_client, token=access_token)
+        if (resource.get('type') or '').startswith(type_prefix)
+    }
+
+    create = [name for name in resources if name not in registered]
+    update = [
+        name for name in resources if name in registered and
+        set(_get_scope_names(registered[name])) !=
+        set(resources[name]['scopes'])
+    ]
+    delete = [name for name in registered if name not in resources] \
+        if prune else []
 
+    def create_resource(name):
         try:
             uma1_client.resource_set_create(
                 token=access_token,
-                name=klass._meta.label_lower,
-                type='urn:{client}:resources:{model}'.format(
-                    client=slugify(client.client_id),
-                    model=klass._meta.label_lower
-                ),
-                scopes=scopes
+                name=name,
+                type=resources[name]['type'],
+                scopes=resources[name]['scopes']
             )
         except KeycloakClientError as e:
+            # Created concurrently
             if e.original_exc.response.status_code != 409:
                 raise
 
+    def update_resource(name):
+        uma1_client.resource_set_update(
+            token=access_token,
+            id=registered[name]['_id'],
+            name=name,
+            type=resources[name]['type'],
+            scopes=resources[name]['scopes']
+        )
+
+    def delete_resource(name):
+        response = uma1_client.resource_set_delete(
+            token=access_token, id=registered[name]['_id'])
+        response.raise_for_status()
+
+    tasks = [(create_resource, name) for name in create] + \
+        [(update_resource, name) for name in update] + \
+        [(delete_resource, name) for name in delete]
+
+    if tasks:
+        with ThreadPoolExecutor(
+                max_workers=settings.KEYCLOAK_SYNC_WORKERS) as executor:
+            # Consume the results to raise the first failure.
+            list(executor.map(lambda task: task[0](task[1]), tasks))
+
+    return {
+        'create': sorted(create),
+        'update': sorted(update),
+        'delete': sorted(delete)
+    }
+
+
+def _list_resources(uma1_client, token):
+    """
+    :param keycloak.uma1.KeycloakUMA1 uma1_client:
+    :param str token:
+    :return: generator of the registered resources
+    :rtype: collections.Iterator[dict]
+    """
+    first = 0
+    while True:
+        page = uma1_client.resource_set_list(token=token, deep='true',
+                                             first=first, max=PAGE_SIZE)
+        for resource in page:
+            yield resource
+        if len(page) < PAGE_SIZE:
+            return
+        first += len(page)
+
+
+def _get_resources(client, model):
+    """
+    :type client: django_keycloak.models.Client
+    :type model: django.db.models.Model
+    :rtype: dict
+    """
+    name = model._meta.label_lower
+    return {
+        name: {
+            'type': _get_type(client=client, name=name),
+            'scopes': list(_get_all_permissions(model._meta))
+        }
+    }
+
+
+def _get_type(client, name):
+    return 'urn:{client}:resources:{model}'.format(
+        client=slugify(client.client_id),
+        model=name
+    )
+
+
+def _get_scope_names(resource):
+    """
+    :param dict resource: resource representation as listed by Keycloak
+    :rtype: list
+    """
+    scopes = resource.get('resource_scopes', resource.get('scopes', []))
+    return [scope['name'] if isinstance(scope, dict) else scope
+            for scope in scopes]
+
 
 def _get_all_permissions(meta):
     """
@@ -1,4 +1,25 @@
 import base64
+import itertools
+import json
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from keycloak.exceptions import KeycloakClientError
+
+from django_keycloak.models import Client
+
+import django_keycloak.services.oidc_profile
+
+try:
+    from urllib.parse import urlencode
+except ImportError:
+    from urllib import urlencode
+
+logger = logging.getLogger(__name__)
+
+PARTIAL_IMPORT_PATH = '/auth/admin/realms/{realm}/partialImport'
+USERS_PATH = '/auth/admin/realms/{realm}/users?{query}'
 
 
 def credential_representation_from_hash(hash_, temporary=False):
@@ -31,3 +52,311 @@ def add_user(client, user):
         email=user.email,
         enabled=user.is_active
     )
+
+
+def user_representation(user):
+    """
+    Keycloak representation of a local user including password.
+
+    :param django.contrib.auth.models.User user:
+    :rtype: dict
+    """
+    representation = {
+        'username': user.username,
+        'firstName': user.first_name,
+        'lastName': user.last_name,
+        'email': user.email,
+        'enabled': user.is_active
+    }
+
+    if user.has_usable_password():
+        representation['credentials'] = [
+            credential_representation_from_hash(hash_=user.password)
+        ]
+
+    return representation
+
+
+def add_users(client, queryset, chunk_size=500, if_resource_exists='SKIP',
+              start_after=None):
+    """
+    Create users in Keycloak based on local users including passwords.
+
+    The users are streamed ordered by primary key and imported per chunk
+    with one request to the partial import endpoint of the realm. A failing
+    chunk does not stop the import, it is reported instead.
+
+    :param django_keycloak.models.Client client:
+    :param django.db.models.QuerySet queryset: users to add
+    :param int chunk_size: number of users per request
+    :param str if_resource_exists: FAIL, SKIP or OVERWRITE users which exist
+        in Keycloak already
+    :param start_after: (optional) primary key of the last user which got
+        added in a previous run, to resume
+    :return: generator of a report per chunk with the primary key of the last
+        user (`last_pk`), the number of users `added`, `skipped` and
+        `overwritten`, the `errors` by username and whether the import
+        request `failed`.
+    :rtype: collections.Iterator[dict]
+    """
+    queryset = queryset.order_by('pk')
+    if start_after is not None:
+        queryset = queryset.filter(pk__gt=start_after)
+
+    url = client.admin_api_client.get_full_url(
+        PARTIAL_IMPORT_PATH.format(realm=client.realm.name))
+
+    users = queryset.iterator()
+    while True:
+        chunk = list(itertools.islice(users, chunk_size))
+        if not chunk:
+            return
+
+        report = {
+            'last_pk': chunk[-1].pk,
+            'added': 0,
+            'skipped': 0,
+            'overwritten': 0,
+            'errors': {},
+            'failed': False
+        }
+
+        representations = []
+        for user in chunk:
+            try:
+                representations.append(user_representation(user))
+            except ValueError as e:
+                # Password hashed in a format Keycloak does not support.
+                report['errors'][user.username] = str(e)
+
+        if representations:
+            try:
+                result = client.admin_api_client.post(
+                    url=url,
+                    data=json.dumps({
+                        'ifResourceExists': if_resource_exists,
+                        'users': representations
+                    })
+                )
+            except KeycloakClientError as e:
+                error = str(e.original_exc)
+                report['failed'] = True
+                logger.warning('Failed to import users up to {}: {}'.format(
+                    report['last_pk'], error))
+                report['errors'].update({
+                    representation['username']: error
+                    for representation in representations
+                })
+            else:
+                for key in ('added', 'skipped', 'overwritten'):
+                    report[key] = result.get(key, 0)
+
+        yield report
+
+
+def get_keycloak_users(client, page_size=500):
+    """
+    Page through the users of the realm in Keycloak.
+
+    :param django_keycloak.models.Client client:
+    :param int page_size: number of users per request
+    :return: generator of pages of user representations
+    :rtype: collections.Iterator[list]
+    """
+    first = 0
+    while True:
+        # Query parameters are not passed by KeycloakAdmin.get, so they are
+        # part of the URL.
+        page = client.admin_api_client.get(
+            url=client.admin_api_client.get_full_url(USERS_PATH.format(
+                realm=client.realm.name,
+                query=urlencode([('first', first), ('max', page_size)])
+            ))
+        )
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        first += len(page)
+
+
+def synchronize_users(client, page_size=500, prune=False):
+    """
+    Create or update the local users and OpenID Connect profiles for all
+    users of the realm in Keycloak, so they don't have to be written on the
+    first login. Every page of users is written in bulk in one transaction.
+
+    :param django_keycloak.models.Client client:
+    :param int page_size: number of users per request and per write
+    :param bool prune: delete the profiles of the realm which no longer have
+        a user in Keycloak
+    :rtype: dict
+    :return: number of profiles created, updated and deleted
+    """
+    counts = {'created': 0, 'updated': 0, 'deleted': 0}
+    subs = set()
+
+    for page in get_keycloak_users(client=client, page_size=page_size):
+        claims = [_get_claims(representation) for representation in page]
+        with transaction.atomic():
+            created, updated = _write_users(client=client, claims=claims)
+        counts['created'] += created
+        counts['updated'] += updated
+        subs.update(claim['sub'] for claim in claims)
+
+        logger.debug('Synchronized {} users of {}'.format(len(subs), client))
+
+    if prune:
+        counts['deleted'] = _prune(client=client, subs=subs,
+                                   chunk_size=page_size)
+
+    return counts
+
+
+def _get_claims(representation):
+    """
+    Map a Keycloak user representation to the claims of an ID token.
+
+    :param dict representation:
+    :rtype: dict
+    """
+    return {
+        'sub': representation['id'],
+        'email': representation.get('email', ''),
+        'given_name': representation.get('firstName', ''),
+        'family_name': representation.get('lastName', '')
+    }
+
+
+def _write_users(client, claims):
+    """
+    :param django_keycloak.models.Client client:
+    :param list claims: claims of the users
+    :rtype: tuple
+    :return: number of profiles created and updated
+    """
+    OpenIdConnectProfileModel = django_keycloak.services.oidc_profile\
+        .get_openid_connect_profile_model()
+
+    subs = [claim['sub'] for claim in claims]
+    users = {} if OpenIdConnectProfileModel.is_remote else \
+        _write_local_users(claims=claims)
+
+    profiles = OpenIdConnectProfileModel.objects.in_bulk(subs,
+                                                         field_name='sub')
+    create = []
+    update = []
+    for sub in subs:
+        fields = {'realm_id': client.realm.pk}
+        if sub in users:
+            fields['user_id'] = users[sub].pk
+
+        oidc_profile = profiles.get(sub)
+        if oidc_profile is None:
+            create.append(OpenIdConnectProfileModel(sub=sub, **fields))
+        elif _update_fields(oidc_profile, fields):
+            update.append(oidc_profile)
+
+    OpenIdConnectProfileModel.objects.bulk_create(create)
+    _bulk_update(OpenIdConnectProfileModel, update,
+                 ['realm'] if OpenIdConnectProfileModel.is_remote
+                 else ['realm', 'user'])
+
+    return len(create), len(update)
+
+
+def _write_local_users(claims):
+    """
+    :param list claims: claims of the users
+    :rtype: dict
+    :return: the users by username (subject)
+    """
+    UserModel = get_user_model()
+
+    users = UserModel.objects.in_bulk([claim['sub'] for claim in claims],
+                                      field_name='username')
+    create = []
+    update = []
+    field_names = set()
+    for claim in claims:
+        fields = django_keycloak.services.oidc_profile._get_user_defaults(
+            id_token_object=claim)
+        field_names.update(fields)
+        user = users.get(claim['sub'])
+        if user is None:
+            user = UserModel(username=claim['sub'], **fields)
+            user.set_unusable_password()
+            create.append(user)
+        elif _update_fields(user, fields):
+            update.append(user)
+
+    UserModel.objects.bulk_create(create)
+    _bulk_update(UserModel, update, sorted(field_names))
+
+    if create:
+        # Primary keys are not set by bulk_create on all databases.
+        users.update(UserModel.objects.in_bulk(
+            [user.username for user in create], field_name='username'))
+
+    return users
+
+
+def _update_fields(instance, fields):
+    """
+    :param django.db.models.Model instance:
+    :param dict fields: values by attribute name
+    :rtype: bool
+    :return: whether a value changed
+    """
+    changed = False
+    for name, value in fields.items():
+        if getattr(instance, name) != value:
+            setattr(instance, name, value)
+            changed = True
+    return changed
+
+
+def _bulk_update(model, instances, fields):
+    """
+    :param type model:
+    :param list instances:
+    :param list fields:
+    """
+    if not instances:
+        return
+
+    if hasattr(model.objects, 'bulk_update'):
+        model.objects.bulk_update(instances, fields)
+    else:
+        # Django < 2.2
+        for instance in instances:
+            instance.save(update_fields=fields)
+
+
+def _prune(client, subs, chunk_size):
+    """
+    :param django_keycloak.models.Client client:
+    :param set subs: subjects of the users which exist in Keycloak
+    :param int chunk_size: number of profiles to delete per query
+    :rtype: int
+    :return: number of profiles deleted
+    """
+    OpenIdConnectProfileModel = django_keycloak.services.oidc_profile\
+        .get_openid_connect_profile_model()
+
+    service_accounts = Client.objects.filter(
+        service_account_profile__isnull=False
+    ).values_list('service_account_profile', flat=True)
+
+    queryset = OpenIdConnectProfileModel.objects.filter(realm=client.realm)
+    stale = [
+        pk for pk, sub in queryset.exclude(pk__in=service_accounts)
+        .values_list('pk', 'sub').iterator()
+        if sub not in subs
+    ]
+
+    for i in range(0, len(stale), chunk_size):
+        OpenIdConnectProfileModel.objects.filter(
+            pk__in=stale[i:i + chunk_size]).delete()
+
+    return len(stale)
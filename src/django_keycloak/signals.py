@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from django_keycloak.models import Client, Realm, Server
+
+import django_keycloak.services.client
+import django_keycloak.services.oidc_profile
+import django_keycloak.services.realm
+
+
+@receiver(post_save, sender=Server)
+@receiver(post_save, sender=Realm)
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Server)
+@receiver(post_delete, sender=Realm)
+@receiver(post_delete, sender=Client)
+def clear_realm_registry(sender, **kwargs):
+    django_keycloak.services.realm.clear_realm_registry()
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def clear_access_token_cache(sender, instance, **kwargs):
+    django_keycloak.services.client.clear_access_token_cache(client=instance)
+
+
+@receiver(pre_save, sender=Client)
+def reset_keycloak_id(sender, instance, update_fields=None, **kwargs):
+    # The stored Keycloak id belongs to the client id in the realm.
+    if not instance.pk or not instance.keycloak_id or (
+            update_fields is not None and
+            not {'client_id', 'realm'} & set(update_fields)):
+        return
+
+    stored = sender.objects.filter(pk=instance.pk)\
+        .values('client_id', 'realm_id').first()
+    if stored != {'client_id': instance.client_id,
+                  'realm_id': instance.realm_id}:
+        instance.keycloak_id = None
+
+
+@receiver(setting_changed)
+def resize_caches(sender, setting, **kwargs):
+    # The in-process caches are created when the services get imported.
+    cache = {
+        'KEYCLOAK_VERIFIED_TOKEN_CACHE_SIZE':
+            django_keycloak.services.oidc_profile.verified_token_cache,
+        'KEYCLOAK_REMOTE_USER_USERINFO_CACHE_SIZE':
+            django_keycloak.services.oidc_profile.userinfo_cache,
+        'KEYCLOAK_SERVICE_ACCOUNT_TOKEN_CACHE_SIZE':
+            django_keycloak.services.client.service_account_token_cache,
+    }.get(setting)
+    if cache is not None:
+        cache.resize(getattr(settings, setting))
@@ -0,0 +1,111 @@
+import django
+import mock
+
+from datetime import datetime
+from unittest import skipIf
+
+from django.test import TestCase, override_settings
+from freezegun import freeze_time
+
+from django_keycloak.factories import OpenIdConnectProfileFactory
+from django_keycloak.services.exceptions import TokensExpired
+from django_keycloak.tests.mixins import MockTestCaseMixin
+from django_keycloak.token_stores import (
+    DatabaseTokenStore,
+    SessionTokenStore
+)
+
+if django.VERSION >= (4, 1):
+    import django_keycloak.aio.services.oidc_profile
+
+
+@skipIf(django.VERSION < (4, 1), 'Requires Django 4.1 or higher')
+class AioServicesOpenIDProfileGetActiveAccessTokenTestCase(
+        MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.mocked_refresh_tokens = self.setup_mock(
+            'django_keycloak.services.oidc_profile.refresh_tokens'
+        )
+
+        self.oidc_profile = OpenIdConnectProfileFactory(
+            access_token='access-token',
+            expires_before=datetime(2018, 3, 5, 1, 0, 0),
+            refresh_token='refresh-token',
+            refresh_expires_before=datetime(2018, 3, 5, 2, 0, 0)
+        )
+
+    @freeze_time('2018-03-05 00:59:00')
+    async def test_not_expired(self):
+        """
+        Case: the access token is not expired.
+        Expected: the access token is returned without a refresh.
+        """
+        access_token = await django_keycloak.aio.services.oidc_profile\
+            .aget_active_access_token(oidc_profile=self.oidc_profile)
+
+        self.assertEqual(access_token, 'access-token')
+        self.assertFalse(self.mocked_refresh_tokens.called)
+
+    @freeze_time('2018-03-05 01:30:00')
+    async def test_expired(self):
+        """
+        Case: the access token is expired.
+        Expected: the tokens are refreshed and the new access token is
+        returned.
+        """
+        self.mocked_refresh_tokens.return_value.access_token = 'new-token'
+
+        access_token = await django_keycloak.aio.services.oidc_profile\
+            .aget_active_access_token(oidc_profile=self.oidc_profile)
+
+        self.assertEqual(access_token, 'new-token')
+        self.mocked_refresh_tokens.assert_called_once_with(
+            oidc_profile=self.oidc_profile,
+            refresh_before=datetime(2018, 3, 5, 1, 30, 0)
+        )
+
+    @freeze_time('2018-03-05 02:30:00')
+    async def test_refresh_token_expired(self):
+        """
+        Case: the refresh token is expired.
+        Expected: TokensExpired is raised.
+        """
+        with self.assertRaises(TokensExpired):
+            await django_keycloak.aio.services.oidc_profile\
+                .aget_active_access_token(oidc_profile=self.oidc_profile)
+
+    @freeze_time('2018-03-05 00:59:00')
+    async def test_session_token_store(self):
+        """
+        Case: the tokens are kept by the session token store.
+        Expected: the tokens are loaded from the token store.
+        """
+        def load(token_model):
+            token_model.access_token = 'session-access-token'
+            return token_model
+
+        with override_settings(KEYCLOAK_TOKEN_STORE='django_keycloak.'
+                                                    'token_stores.'
+                                                    'SessionTokenStore'), \
+                mock.patch.object(SessionTokenStore, 'load',
+                                  side_effect=load) as mocked_load:
+            access_token = await django_keycloak.aio.services.oidc_profile\
+                .aget_active_access_token(oidc_profile=self.oidc_profile)
+
+        self.assertEqual(access_token, 'session-access-token')
+        mocked_load.assert_called_once_with(self.oidc_profile)
+
+    @freeze_time('2018-03-05 00:59:00')
+    async def test_database_token_store(self):
+        """
+        Case: the tokens are kept by the database token store.
+        Expected: the tokens loaded with the row are used, without calling
+        the token store.
+        """
+        with mock.patch.object(DatabaseTokenStore, 'load') as mocked_load:
+            access_token = await django_keycloak.aio.services.oidc_profile\
+                .aget_active_access_token(oidc_profile=self.oidc_profile)
+
+        self.assertEqual(access_token, 'access-token')
+        self.assertFalse(mocked_load.called)
@@ -0,0 +1,88 @@
+import django
+import mock
+
+from datetime import datetime
+from unittest import skipIf
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from django_keycloak.factories import OpenIdConnectProfileFactory
+from django_keycloak.tests.mixins import MockTestCaseMixin
+
+if django.VERSION >= (4, 1):
+    import django_keycloak.aio.services.oidc_profile
+
+
+@skipIf(django.VERSION < (4, 1), 'Requires Django 4.1 or higher')
+@override_settings(KEYCLOAK_ENTITLEMENT_CACHE='default')
+class AioServicesOpenIDProfileGetEntitlementTestCase(
+        MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.mocked_get_active_access_token = self.setup_mock(
+            'django_keycloak.aio.services.oidc_profile'
+            '.aget_active_access_token',
+            return_value='access-token'
+        )
+        self.mocked_get_authz_api_client = self.setup_mock(
+            'django_keycloak.aio.services.client.aget_authz_api_client'
+        )
+        self.mocked_entitlement = mock.AsyncMock(
+            return_value={'rpt': 'RPT_VALUE'})
+        self.mocked_get_authz_api_client.return_value.entitlement = \
+            self.mocked_entitlement
+        self.mocked_decode_rpt = self.setup_mock(
+            'django_keycloak.services.oidc_profile._decode_rpt',
+            return_value={'exp': 4102444800}  # 2100-01-01 00:00:00
+        )
+
+        self.oidc_profile = OpenIdConnectProfileFactory(
+            access_token='access-token',
+            expires_before=datetime(2018, 3, 5, 1, 0, 0),
+            refresh_token='refresh-token',
+            session_state='some-session'
+        )
+
+        cache.clear()
+
+    async def test(self):
+        """
+        Case: the entitlement is requested.
+        Expected: the RPT is requested with the async API client and
+        decoded.
+        """
+        rpt = await django_keycloak.aio.services.oidc_profile\
+            .aget_entitlement(oidc_profile=self.oidc_profile)
+
+        self.assertEqual(rpt, {'exp': 4102444800})
+        self.mocked_entitlement.assert_awaited_once_with(
+            token=self.mocked_get_active_access_token.return_value)
+        self.mocked_decode_rpt.assert_called_once_with(
+            oidc_profile=self.oidc_profile, rpt='RPT_VALUE')
+
+    async def test_cached(self):
+        """
+        Case: the entitlement is requested multiple times.
+        Expected: the entitlement is requested from Keycloak only once.
+        """
+        for _ in range(3):
+            await django_keycloak.aio.services.oidc_profile\
+                .aget_entitlement(oidc_profile=self.oidc_profile)
+
+        self.mocked_entitlement.assert_awaited_once()
+
+    async def test_other_session(self):
+        """
+        Case: the entitlement is requested again for another session.
+        Expected: the entitlement is requested from Keycloak again.
+        """
+        await django_keycloak.aio.services.oidc_profile\
+            .aget_entitlement(oidc_profile=self.oidc_profile)
+
+        self.oidc_profile.session_state = 'other-session'
+
+        await django_keycloak.aio.services.oidc_profile\
+            .aget_entitlement(oidc_profile=self.oidc_profile)
+
+        self.assertEqual(self.mocked_entitlement.await_count, 2)
@@ -0,0 +1,63 @@
+import django
+
+from unittest import skipIf
+
+from django.test import TestCase, override_settings
+
+from django_keycloak.factories import RealmFactory
+
+if django.VERSION >= (4, 1):
+    import aiohttp
+
+    import django_keycloak.aio.services.realm
+
+
+@skipIf(django.VERSION < (4, 1), 'Requires Django 4.1 or higher')
+class AioServicesRealmGetRealmApiClientTestCase(TestCase):
+
+    def setUp(self):
+        self.realm = RealmFactory(
+            name='test-realm',
+            server__url='https://keycloak.example.com',
+            server__internal_url='http://keycloak.internal'
+        )
+
+    async def test_shared_within_loop(self):
+        """
+        Case: the API client is requested multiple times within an event
+        loop.
+        Expected: the same initialised client is returned every time.
+        """
+        try:
+            first = await django_keycloak.aio.services.realm\
+                .aget_realm_api_client(realm=self.realm)
+            second = await django_keycloak.aio.services.realm\
+                .aget_realm_api_client(realm=self.realm)
+
+            self.assertIs(first, second)
+            self.assertEqual(first.client.server_url,
+                             'http://keycloak.internal')
+            self.assertEqual(first.client.session.headers['Host'],
+                             'keycloak.example.com')
+        finally:
+            await django_keycloak.aio.services.realm\
+                .aclear_realm_api_clients()
+
+    @override_settings(KEYCLOAK_HTTP_POOL_MAXSIZE=4,
+                       KEYCLOAK_HTTP_TIMEOUT=(2, 5))
+    async def test_pool_settings(self):
+        """
+        Case: the pool size and timeout are configured.
+        Expected: the session of the client uses them.
+        """
+        try:
+            realm_api_client = await django_keycloak.aio.services.realm\
+                .aget_realm_api_client(realm=self.realm)
+
+            session = realm_api_client.client.session
+            self.assertEqual(session.connector.limit, 4)
+            self.assertEqual(session.timeout, aiohttp.ClientTimeout(
+                sock_connect=2, sock_read=5))
+        finally:
+            await django_keycloak.aio.services.realm\
+                .aclear_realm_api_clients()
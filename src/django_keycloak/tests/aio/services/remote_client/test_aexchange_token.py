@@ -0,0 +1,58 @@
+import django
+import mock
+
+from unittest import skipIf
+
+from django.test import TestCase
+
+from django_keycloak.factories import (
+    OpenIdConnectProfileFactory,
+    RemoteClientFactory
+)
+from django_keycloak.tests.mixins import MockTestCaseMixin
+
+if django.VERSION >= (4, 1):
+    import django_keycloak.aio.services.remote_client
+
+
+@skipIf(django.VERSION < (4, 1), 'Requires Django 4.1 or higher')
+class AioServicesRemoteClientExchangeTokenTestCase(
+        MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.mocked_get_active_access_token = self.setup_mock(
+            'django_keycloak.aio.services.oidc_profile'
+            '.aget_active_access_token',
+            return_value='access-token'
+        )
+        self.mocked_get_openid_client = self.setup_mock(
+            'django_keycloak.aio.services.client.aget_openid_client'
+        )
+        self.mocked_token_exchange = mock.AsyncMock(
+            return_value={'access_token': 'exchanged-token'})
+        self.mocked_get_openid_client.return_value.token_exchange = \
+            self.mocked_token_exchange
+
+        self.oidc_profile = OpenIdConnectProfileFactory()
+        self.remote_client = RemoteClientFactory(
+            realm=self.oidc_profile.realm, name='remote-client')
+
+    async def test(self):
+        """
+        Case: the access token of a profile is exchanged for a remote client.
+        Expected: the exchange is done with the async API client of the
+        client of the realm.
+        """
+        token_response = await django_keycloak.aio.services.remote_client\
+            .aexchange_token(oidc_profile=self.oidc_profile,
+                             remote_client=self.remote_client)
+
+        self.assertEqual(token_response, {'access_token': 'exchanged-token'})
+        self.mocked_get_openid_client.assert_awaited_once_with(
+            client=self.oidc_profile.realm.client)
+        self.mocked_token_exchange.assert_awaited_once_with(
+            audience='remote-client',
+            subject_token='access-token',
+            requested_token_type='urn:ietf:params:oauth:token-type:'
+                                 'refresh_token'
+        )
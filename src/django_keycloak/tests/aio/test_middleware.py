@@ -0,0 +1,155 @@
+import django
+import mock
+
+from unittest import skipIf
+
+from django.http.response import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from jose.exceptions import JWTError
+
+from django_keycloak.factories import OpenIdConnectProfileFactory
+from django_keycloak.remote_user import KeycloakTokenUser
+from django_keycloak.tests.mixins import MockTestCaseMixin
+from django_keycloak.token_stores import DatabaseTokenStore
+
+import django_keycloak.services.realm
+
+if django.VERSION >= (4, 1):
+    from asgiref.sync import async_to_sync
+
+    from django_keycloak.aio.middleware import \
+        KeycloakStatelessBearerAuthenticationMiddleware
+
+
+@skipIf(django.VERSION < (4, 1), 'Requires Django 4.1 or higher')
+@override_settings(AUTHENTICATION_BACKENDS=[
+    'django.contrib.auth.backends.ModelBackend',
+    'django_keycloak.auth.backends.KeycloakIDTokenAuthorizationBackend'
+])
+class AioKeycloakStatelessBearerAuthenticationMiddlewareTestCase(
+        MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.profile = OpenIdConnectProfileFactory(
+            sub='some-sub',
+            user__username='some-sub'
+        )
+
+        self.mocked_decode_id_token = self.setup_mock(
+            'django_keycloak.services.oidc_profile.decode_id_token',
+            return_value={
+                'sub': 'some-sub',
+                'email': '',
+                'given_name': '',
+                'family_name': ''
+            }
+        )
+
+        async def get_response(request):
+            return HttpResponse()
+
+        self.middleware = KeycloakStatelessBearerAuthenticationMiddleware(
+            get_response)
+
+        django_keycloak.services.realm.clear_realm_registry()
+
+    def test_authenticated(self):
+        """
+        Case: a request with a valid bearer token is handled asynchronously.
+        Expected: the user of the profile is set to the request.
+        """
+        request = RequestFactory().get(
+            '/', HTTP_AUTHORIZATION='Bearer some-token')
+
+        response = async_to_sync(self.middleware)(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(request.user.pk, self.profile.user.pk)
+        self.assertEqual(request.user.backend,
+                         'django_keycloak.auth.backends'
+                         '.KeycloakIDTokenAuthorizationBackend')
+        self.assertEqual(request.realm.pk, self.profile.realm.pk)
+        self.mocked_decode_id_token.assert_called_once_with(
+            client=request.realm.client, id_token='some-token')
+
+    def test_process_response(self):
+        """
+        Case: a request is handled asynchronously.
+        Expected: the response is processed, which unbinds the token store.
+        """
+        request = RequestFactory().get(
+            '/', HTTP_AUTHORIZATION='Bearer some-token')
+
+        with mock.patch.object(DatabaseTokenStore, 'unbind') as mocked_unbind:
+            async_to_sync(self.middleware)(request)
+
+        mocked_unbind.assert_called_once_with()
+
+    def test_invalid_token(self):
+        """
+        Case: a request with an invalid bearer token is handled
+        asynchronously.
+        Expected: a not authorized response is returned.
+        """
+        self.mocked_decode_id_token.side_effect = JWTError()
+
+        request = RequestFactory().get(
+            '/', HTTP_AUTHORIZATION='Bearer some-token')
+
+        response = async_to_sync(self.middleware)(request)
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_missing_token(self):
+        """
+        Case: a request without bearer token is handled asynchronously.
+        Expected: a not authorized response is returned.
+        """
+        response = async_to_sync(self.middleware)(RequestFactory().get('/'))
+
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(AUTHENTICATION_BACKENDS=[
+        'django.contrib.auth.backends.ModelBackend'
+    ])
+    def test_no_id_token_backend(self):
+        """
+        Case: no ID token backend is configured and a request with a valid
+        bearer token is handled asynchronously.
+        Expected: a not authorized response is returned, like the
+        synchronous middleware.
+        """
+        middleware = KeycloakStatelessBearerAuthenticationMiddleware(
+            self.middleware.get_response)
+        request = RequestFactory().get(
+            '/', HTTP_AUTHORIZATION='Bearer some-token')
+
+        response = async_to_sync(middleware)(request)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(self.mocked_decode_id_token.called)
+
+    @override_settings(AUTHENTICATION_BACKENDS=[
+        'django_keycloak.auth.backends'
+        '.KeycloakStatelessIDTokenAuthorizationBackend'
+    ])
+    def test_stateless_backend(self):
+        """
+        Case: the stateless backend is configured and a request with a valid
+        bearer token is handled asynchronously.
+        Expected: a token user is set to the request without storing a
+        profile.
+        """
+        middleware = KeycloakStatelessBearerAuthenticationMiddleware(
+            self.middleware.get_response)
+        request = RequestFactory().get(
+            '/', HTTP_AUTHORIZATION='Bearer some-token')
+
+        async_to_sync(middleware)(request)
+
+        with self.assertNumQueries(0):
+            response = async_to_sync(middleware)(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(request.user, KeycloakTokenUser)
+        self.assertEqual(request.user.sub, 'some-sub')
@@ -0,0 +1,73 @@
+from django.test import TestCase, override_settings
+
+from django_keycloak.factories import OpenIdConnectProfileFactory
+from django_keycloak.permissions import PermissionSet
+from django_keycloak.tests.mixins import MockTestCaseMixin
+from django_keycloak.auth.backends import KeycloakAuthorizationBase
+
+
+@override_settings(KEYCLOAK_PERMISSIONS_METHOD='resource')
+class BackendsKeycloakAuthorizationBaseGetAllPermissionsTestCase(
+        MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.backend = KeycloakAuthorizationBase()
+
+        self.profile = OpenIdConnectProfileFactory(user__is_active=True)
+
+        self.mocked_get_entitlement = self.setup_mock(
+            'django_keycloak.services.oidc_profile.get_entitlement',
+            return_value={
+                'authorization': {
+                    'permissions': [
+                        {
+                            'resource_set_name': 'app.model',
+                            'scopes': [
+                                'view',
+                                'change'
+                            ]
+                        },
+                        {
+                            'resource_set_name': 'Resource'
+                        }
+                    ]
+                }
+            }
+        )
+
+    def test_get_all_permissions(self):
+        """
+        Case: all permissions are requested for a user.
+        Expected: an index of the permissions is returned with the app labels
+        precomputed.
+        """
+        permissions = self.backend.get_all_permissions(
+            user_obj=self.profile.user)
+
+        self.assertIsInstance(permissions, PermissionSet)
+        self.assertEqual(permissions, {'app.view_model', 'app.change_model',
+                                       'Resource'})
+        self.assertEqual(permissions.app_labels, {'app'})
+
+    def test_entitlement_requested_once(self):
+        """
+        Case: multiple permissions are checked for the same user object.
+        Expected: the entitlement is requested only once.
+        """
+        for perm in ['app.view_model', 'app.add_model', 'Resource']:
+            self.backend.has_perm(user_obj=self.profile.user, perm=perm)
+
+        self.assertEqual(self.mocked_get_entitlement.call_count, 1)
+
+    def test_has_perms(self):
+        """
+        Case: a batch of permissions is checked.
+        Expected: permission is only granted when all permissions are
+        available.
+        """
+        self.assertTrue(self.backend.has_perms(
+            user_obj=self.profile.user,
+            perm_list=['app.view_model', 'app.change_model']))
+        self.assertFalse(self.backend.has_perms(
+            user_obj=self.profile.user,
+            perm_list=['app.view_model', 'app.add_model']))
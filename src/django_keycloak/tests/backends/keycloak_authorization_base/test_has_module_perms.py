@@ -0,0 +1,65 @@
+from django.test import TestCase, override_settings
+
+from django_keycloak.factories import OpenIdConnectProfileFactory
+from django_keycloak.tests.mixins import MockTestCaseMixin
+from django_keycloak.auth.backends import KeycloakAuthorizationBase
+
+
+@override_settings(KEYCLOAK_PERMISSIONS_METHOD='resource')
+class BackendsKeycloakAuthorizationBaseHasModulePermsTestCase(
+        MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.backend = KeycloakAuthorizationBase()
+
+        self.profile = OpenIdConnectProfileFactory(user__is_active=True)
+
+        self.mocked_get_entitlement = self.setup_mock(
+            'django_keycloak.services.oidc_profile.get_entitlement',
+            return_value={
+                'authorization': {
+                    'permissions': [
+                        {
+                            'resource_set_name': 'app.model',
+                            'scopes': [
+                                'view'
+                            ]
+                        }
+                    ]
+                }
+            }
+        )
+
+    def test_module_with_permission(self):
+        """
+        Case: module permissions are checked for an app the user has a
+        permission for.
+        Expected: Permission granted.
+        """
+        self.assertTrue(self.backend.has_module_perms(
+            user_obj=self.profile.user, app_label='app'))
+
+    def test_module_without_permission(self):
+        """
+        Case: module permissions are checked for an app the user has no
+        permissions for.
+        Expected: Permission denied.
+        """
+        self.assertFalse(self.backend.has_module_perms(
+            user_obj=self.profile.user, app_label='other'))
+
+    def test_no_additional_calls(self):
+        """
+        Case: module permissions and permissions are checked for the same user
+        object.
+        Expected: the entitlement is requested once and no queries are done.
+        """
+        user = self.profile.user
+        self.backend.has_perm(user_obj=user, perm='app.view_model')
+
+        with self.assertNumQueries(0):
+            for app_label in ['app', 'other', 'auth']:
+                self.backend.has_module_perms(user_obj=user,
+                                              app_label=app_label)
+
+        self.assertEqual(self.mocked_get_entitlement.call_count, 1)
@@ -0,0 +1,86 @@
+from django.test import RequestFactory, TestCase, override_settings
+from jose.exceptions import ExpiredSignatureError
+
+from django_keycloak.auth.backends import \
+    KeycloakStatelessIDTokenAuthorizationBackend
+from django_keycloak.factories import ClientFactory
+from django_keycloak.remote_user import KeycloakTokenUser
+from django_keycloak.tests.mixins import MockTestCaseMixin
+
+
+class BackendsKeycloakStatelessIDTokenAuthorizationBackendAuthenticateTestCase(
+        MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.backend = KeycloakStatelessIDTokenAuthorizationBackend()
+
+        self.keycloak_client = ClientFactory(client_id='some-client')
+
+        self.request = RequestFactory().get('/')
+        self.request.realm = self.keycloak_client.realm
+
+        self.mocked_decode_id_token = self.setup_mock(
+            'django_keycloak.services.oidc_profile.decode_id_token',
+            return_value={
+                'sub': 'some-sub',
+                'preferred_username': 'some-user',
+                'email': 'user@example.com',
+                'resource_access': {
+                    'some-client': {'roles': ['app.view_model']},
+                    'other-client': {'roles': ['app.change_model']}
+                }
+            }
+        )
+
+    def test_authenticate(self):
+        """
+        Case: a valid access token is authenticated.
+        Expected: an in-memory user is built from the claims without any
+        database queries.
+        """
+        with self.assertNumQueries(0):
+            user = self.backend.authenticate(request=self.request,
+                                             access_token='some-token')
+
+        self.assertIsInstance(user, KeycloakTokenUser)
+        self.assertEqual(user.username, 'some-user')
+        self.assertEqual(user.email, 'user@example.com')
+        self.assertIsNone(user.oidc_profile)
+        self.mocked_decode_id_token.assert_called_once_with(
+            client=self.keycloak_client, id_token='some-token')
+
+    def test_invalid_token(self):
+        """
+        Case: the access token cannot be verified.
+        Expected: no user is returned.
+        """
+        self.mocked_decode_id_token.side_effect = ExpiredSignatureError
+
+        self.assertIsNone(self.backend.authenticate(
+            request=self.request, access_token='some-token'))
+
+    @override_settings(
+        KEYCLOAK_PERMISSIONS_METHOD='role',
+        AUTHENTICATION_BACKENDS=[
+            'django_keycloak.auth.backends'
+            '.KeycloakStatelessIDTokenAuthorizationBackend'
+        ]
+    )
+    def test_permissions_from_claims(self):
+        """
+        Case: the permissions of the token user are checked.
+        Expected: the roles of the client in the token are granted without
+        requesting the entitlement.
+        """
+        mocked_get_entitlement = self.setup_mock(
+            'django_keycloak.services.oidc_profile.get_entitlement')
+
+        user = self.backend.authenticate(request=self.request,
+                                         access_token='some-token')
+
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm('app.view_model'))
+            self.assertFalse(user.has_perm('app.change_model'))
+            self.assertTrue(user.has_module_perms('app'))
+
+        self.assertFalse(mocked_get_entitlement.called)
@@ -0,0 +1,36 @@
+from django.test import TestCase, override_settings
+
+from django_keycloak.remote_user import KeycloakTokenUser
+
+
+@override_settings(
+    KEYCLOAK_PERMISSIONS_METHOD='role',
+    AUTHENTICATION_BACKENDS=[
+        'django_keycloak.auth.backends.KeycloakIDTokenAuthorizationBackend',
+        'django_keycloak.auth.backends'
+        '.KeycloakStatelessIDTokenAuthorizationBackend',
+    ]
+)
+class BackendsKeycloakStatelessGetAllPermissionsTestCase(
+        TestCase):
+
+    def setUp(self):
+        self.user = KeycloakTokenUser(
+            claims={
+                'sub': 'some-sub',
+                'resource_access': {
+                    'some-client': {'roles': ['app.view_model']}
+                }
+            },
+            client_id='some-client'
+        )
+
+    def test_after_other_keycloak_backend(self):
+        """
+        Case: permissions of a token user are checked while another Keycloak
+        backend is configured before the stateless backend.
+        Expected: the permissions of the token are granted, the empty
+        permissions of the other backend don't shadow them.
+        """
+        self.assertTrue(self.user.has_perm('app.view_model'))
+        self.assertFalse(self.user.has_perm('app.change_model'))
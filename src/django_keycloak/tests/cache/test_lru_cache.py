@@ -0,0 +1,49 @@
+from django.test import TestCase
+
+from django_keycloak.cache import LRUCache
+
+
+class LRUCacheTestCase(TestCase):
+
+    def test_least_recently_used_evicted(self):
+        """
+        Case: more items are stored than the maximum size of the cache.
+        Expected: the least recently used item is evicted.
+        """
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_disabled(self):
+        """
+        Case: the cache is configured with a maximum size of 0.
+        Expected: nothing is stored.
+        """
+        cache = LRUCache(maxsize=0)
+        cache.set('a', 1)
+
+        self.assertIsNone(cache.get('a'))
+
+    def test_resize(self):
+        """
+        Case: the cache is resized to fewer items than it holds.
+        Expected: the least recently used items are evicted.
+        """
+        cache = LRUCache(maxsize=3)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('c', 3)
+        cache.get('a')
+
+        cache.resize(maxsize=2)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
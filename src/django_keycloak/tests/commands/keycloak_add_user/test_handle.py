@@ -0,0 +1,136 @@
+import io
+import json
+import mock
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+from keycloak.admin import KeycloakAdmin
+from keycloak.exceptions import KeycloakClientError
+from requests.exceptions import HTTPError
+
+from django_keycloak.factories import (
+    OpenIdConnectProfileFactory,
+    RealmFactory,
+    UserFactory
+)
+from django_keycloak.tests.mixins import MockTestCaseMixin
+
+
+class CommandsKeycloakAddUserHandleTestCase(MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.mocked_add_users = self.setup_mock(
+            'django_keycloak.services.users.add_users')
+
+        self.realm = RealmFactory(name='realm')
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.checkpoint = os.path.join(directory, 'checkpoint')
+
+    def add_users(self):
+        call_command('keycloak_add_user', '--realm=realm', '--all',
+                     '--checkpoint={}'.format(self.checkpoint),
+                     stdout=io.StringIO(), stderr=io.StringIO())
+
+    def report(self, last_pk, failed=False):
+        return {
+            'last_pk': last_pk,
+            'added': 0 if failed else 2,
+            'skipped': 0,
+            'overwritten': 0,
+            'errors': {'user': '500 Server Error'} if failed else {},
+            'failed': failed
+        }
+
+    def test_resume_after_failed_chunk(self):
+        """
+        Case: a chunk fails while the following chunks are imported.
+        Expected: the checkpoint stays before the failed chunk, so the next
+        run continues with it.
+        """
+        self.mocked_add_users.return_value = iter([
+            self.report(2), self.report(4, failed=True), self.report(6)])
+
+        self.add_users()
+
+        with io.open(self.checkpoint) as f:
+            self.assertEqual(f.read(), '2')
+
+        self.mocked_add_users.return_value = iter([self.report(6)])
+
+        self.add_users()
+
+        self.assertEqual(
+            self.mocked_add_users.call_args[1]['start_after'], '2')
+        with io.open(self.checkpoint) as f:
+            self.assertEqual(f.read(), '6')
+
+    def test_keycloak_users_excluded(self):
+        """
+        Case: all users are added while some users were created from
+        Keycloak.
+        Expected: only the local users are added.
+        """
+        local_user = UserFactory()
+        OpenIdConnectProfileFactory(realm=self.realm)
+        self.mocked_add_users.return_value = iter([])
+
+        self.add_users()
+
+        self.assertEqual(
+            list(self.mocked_add_users.call_args[1]['queryset']),
+            [local_user])
+
+
+class CommandsKeycloakAddUserHandleFailedImportTestCase(
+        MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.mocked_get_admin_client = self.setup_mock(
+            'django_keycloak.services.client.get_admin_client',
+            return_value=mock.MagicMock(spec_set=KeycloakAdmin)
+        )
+        self.admin_api_client = self.mocked_get_admin_client.return_value
+        self.admin_api_client.get_full_url.side_effect = \
+            lambda path: 'https://keycloak.example.com' + path
+
+        RealmFactory(name='realm')
+        self.users = [
+            UserFactory(username='user-{}'.format(i),
+                        password='pbkdf2_sha512$30000$salt$hash')
+            for i in range(4)
+        ]
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.checkpoint = os.path.join(directory, 'checkpoint')
+
+    def test_failed_import(self):
+        """
+        Case: Keycloak rejects the import of the second chunk.
+        Expected: the users of the chunk are reported instead of aborting the
+        run and the checkpoint stays before the failed chunk.
+        """
+        self.admin_api_client.post.side_effect = [
+            {'added': 2},
+            KeycloakClientError(original_exc=HTTPError('500 Server Error')),
+        ]
+        stderr = io.StringIO()
+
+        call_command('keycloak_add_user', '--realm=realm', '--all',
+                     '--chunk-size=2',
+                     '--checkpoint={}'.format(self.checkpoint),
+                     stdout=io.StringIO(), stderr=stderr)
+
+        self.assertEqual(self.admin_api_client.post.call_count, 2)
+        self.assertEqual(
+            [user['username'] for user in json.loads(
+                self.admin_api_client.post.call_args[1]['data'])['users']],
+            ['user-2', 'user-3'])
+        self.assertIn('user-2: 500 Server Error', stderr.getvalue())
+        with io.open(self.checkpoint) as f:
+            self.assertEqual(f.read(), str(self.users[1].pk))
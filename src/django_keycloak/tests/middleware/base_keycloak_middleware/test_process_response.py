@@ -0,0 +1,85 @@
+import mock
+
+from datetime import datetime
+
+from django.http.response import HttpResponse
+from django.test import RequestFactory, TestCase
+from freezegun import freeze_time
+
+from django_keycloak.factories import OpenIdConnectProfileFactory
+from django_keycloak.middleware import BaseKeycloakMiddleware
+
+
+@freeze_time('2018-03-05 00:00:00')
+class MiddlewareBaseKeycloakMiddlewareProcessResponseTestCase(TestCase):
+
+    def setUp(self):
+        self.middleware = BaseKeycloakMiddleware(lambda request: None)
+
+        self.profile = OpenIdConnectProfileFactory(
+            session_state='some-session',
+            refresh_expires_before=datetime(2018, 3, 5, 1, 0, 0)
+        )
+
+        self.request = RequestFactory().get('/')
+        self.request.user = self.profile.user
+
+        patcher = mock.patch(
+            'django_keycloak.models.OpenIdConnectProfile.jwt',
+            new_callable=mock.PropertyMock,
+            return_value={'session_state': 'legacy-session'}
+        )
+        self.mocked_jwt = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_set_cookie(self):
+        """
+        Case: a response for a user without session state cookie.
+        Expected: the cookie is set from the stored session state.
+        """
+        response = self.middleware.process_response(self.request,
+                                                    HttpResponse())
+
+        self.assertEqual(response.cookies['session_state'].value,
+                         'some-session')
+        self.assertFalse(self.mocked_jwt.called)
+
+    def test_cookie_up_to_date(self):
+        """
+        Case: a response for a user which already has a cookie with the
+        current session state.
+        Expected: the cookie is not written again.
+        """
+        self.request.COOKIES['session_state'] = 'some-session'
+
+        response = self.middleware.process_response(self.request,
+                                                    HttpResponse())
+
+        self.assertNotIn('session_state', response.cookies)
+
+    def test_stale_cookie(self):
+        """
+        Case: a response for a user which has a cookie of another session.
+        Expected: the cookie is replaced.
+        """
+        self.request.COOKIES['session_state'] = 'other-session'
+
+        response = self.middleware.process_response(self.request,
+                                                    HttpResponse())
+
+        self.assertEqual(response.cookies['session_state'].value,
+                         'some-session')
+
+    def test_legacy_profile(self):
+        """
+        Case: a response for a user of which the profile was stored without
+        session state.
+        Expected: the session state is read from the access token.
+        """
+        self.profile.session_state = None
+
+        response = self.middleware.process_response(self.request,
+                                                    HttpResponse())
+
+        self.assertEqual(response.cookies['session_state'].value,
+                         'legacy-session')
@@ -0,0 +1,111 @@
+from datetime import datetime
+
+from django.test import TestCase, override_settings
+from freezegun import freeze_time
+
+from django_keycloak.factories import ClientFactory
+from django_keycloak.services.exceptions import TokensExpired
+from django_keycloak.tests.mixins import MockTestCaseMixin
+
+import django_keycloak.services.client
+
+
+class ServicesClientGetAccessTokenTestCase(MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.client = ClientFactory(
+            service_account_profile__access_token='access-token',
+            service_account_profile__expires_before=datetime(
+                2018, 3, 5, 0, 5, 0)
+        )
+
+        self.mocked_get_active_access_token = self.setup_mock(
+            'django_keycloak.services.oidc_profile.get_active_access_token'
+        )
+        self.mocked_get_new_access_token = self.setup_mock(
+            'django_keycloak.services.client.get_new_access_token'
+        )
+
+        django_keycloak.services.client.clear_access_token_cache()
+        self.addCleanup(
+            django_keycloak.services.client.clear_access_token_cache)
+
+    @freeze_time('2018-03-05 00:00:00')
+    def test_cached(self):
+        """
+        Case: the access token is requested multiple times.
+        Expected: the service account profile is only checked once.
+        """
+        for _ in range(3):
+            access_token = django_keycloak.services.client.get_access_token(
+                client=self.client)
+            self.assertEqual(access_token, 'access-token')
+
+        self.assertEqual(self.mocked_get_active_access_token.call_count, 1)
+        self.assertFalse(self.mocked_get_new_access_token.called)
+
+    @override_settings(KEYCLOAK_SERVICE_ACCOUNT_TOKEN_CACHE_SIZE=0)
+    @freeze_time('2018-03-05 00:00:00')
+    def test_cache_disabled(self):
+        """
+        Case: the cache is disabled by the setting.
+        Expected: the service account profile is checked every time.
+        """
+        for _ in range(2):
+            django_keycloak.services.client.get_access_token(
+                client=self.client)
+
+        self.assertEqual(self.mocked_get_active_access_token.call_count, 2)
+
+    def test_expired_within_margin(self):
+        """
+        Case: the cached access token gets within the margin of its expiry.
+        Expected: the service account profile is checked again.
+        """
+        with freeze_time('2018-03-05 00:00:00'):
+            django_keycloak.services.client.get_access_token(
+                client=self.client)
+
+        with freeze_time('2018-03-05 00:04:45'):
+            django_keycloak.services.client.get_access_token(
+                client=self.client)
+
+        self.assertEqual(self.mocked_get_active_access_token.call_count, 2)
+
+    @freeze_time('2018-03-05 00:00:00')
+    def test_cleared_on_client_save(self):
+        """
+        Case: the client gets saved after its access token got cached.
+        Expected: the service account profile is checked again.
+        """
+        django_keycloak.services.client.get_access_token(client=self.client)
+
+        self.client.save()
+
+        django_keycloak.services.client.get_access_token(client=self.client)
+
+        self.assertEqual(self.mocked_get_active_access_token.call_count, 2)
+
+    @freeze_time('2018-03-05 00:00:00')
+    def test_tokens_expired(self):
+        """
+        Case: the tokens of the service account profile are expired.
+        Expected: a new access token is retrieved and cached.
+        """
+        self.mocked_get_active_access_token.side_effect = TokensExpired
+        self.mocked_get_new_access_token.return_value = (
+            {
+                'access_token': 'new-access-token',
+                'expires_in': 300,
+                'refresh_token': 'refresh-token',
+                'refresh_expires_in': 1800
+            },
+            datetime(2018, 3, 5, 0, 0, 0)
+        )
+
+        for _ in range(2):
+            access_token = django_keycloak.services.client.get_access_token(
+                client=self.client)
+            self.assertEqual(access_token, 'new-access-token')
+
+        self.assertEqual(self.mocked_get_new_access_token.call_count, 1)
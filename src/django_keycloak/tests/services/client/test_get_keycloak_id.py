@@ -0,0 +1,74 @@
+import mock
+
+from django.test import TestCase
+from keycloak.admin import KeycloakAdmin
+
+from django_keycloak.factories import ClientFactory
+from django_keycloak.models import Client
+
+import django_keycloak.services.client
+
+
+class ServicesClientGetKeycloakIdTestCase(TestCase):
+
+    def setUp(self):
+        self.client = ClientFactory(realm__name='realm', client_id='my-client')
+        self.client.admin_api_client = mock.MagicMock(spec_set=KeycloakAdmin)
+        self.client.admin_api_client.get_full_url.side_effect = \
+            lambda path: 'https://keycloak.example.com' + path
+        self.client.admin_api_client.get.return_value = [
+            {'id': 'keycloak-id', 'clientId': 'my-client'}
+        ]
+
+    def test_lookup(self):
+        """
+        Case: the Keycloak id of a client is requested for the first time.
+        Expected: the clients are filtered by the server and the id is stored.
+        """
+        keycloak_id = django_keycloak.services.client.get_keycloak_id(
+            client=self.client)
+
+        self.assertEqual(keycloak_id, 'keycloak-id')
+        self.client.admin_api_client.get.assert_called_once_with(
+            url='https://keycloak.example.com/auth/admin/realms/realm/'
+                'clients?clientId=my-client')
+        self.assertEqual(
+            Client.objects.get(pk=self.client.pk).keycloak_id, 'keycloak-id')
+
+    def test_stored(self):
+        """
+        Case: the Keycloak id of the client is stored already.
+        Expected: the stored id is returned without requesting Keycloak.
+        """
+        self.client.keycloak_id = 'stored-id'
+
+        keycloak_id = django_keycloak.services.client.get_keycloak_id(
+            client=self.client)
+
+        self.assertEqual(keycloak_id, 'stored-id')
+        self.assertFalse(self.client.admin_api_client.get.called)
+
+    def test_unknown(self):
+        """
+        Case: the client does not exist in Keycloak.
+        Expected: None is returned and nothing is stored.
+        """
+        self.client.admin_api_client.get.return_value = []
+
+        keycloak_id = django_keycloak.services.client.get_keycloak_id(
+            client=self.client)
+
+        self.assertIsNone(keycloak_id)
+        self.assertIsNone(Client.objects.get(pk=self.client.pk).keycloak_id)
+
+    def test_reset_on_changed_client_id(self):
+        """
+        Case: the client id gets changed after the Keycloak id was stored.
+        Expected: the stored Keycloak id is reset.
+        """
+        django_keycloak.services.client.get_keycloak_id(client=self.client)
+
+        self.client.client_id = 'other-client'
+        self.client.save()
+
+        self.assertIsNone(Client.objects.get(pk=self.client.pk).keycloak_id)
@@ -0,0 +1,103 @@
+import mock
+
+from django.test import TestCase, override_settings
+from freezegun import freeze_time
+from keycloak.openid_connect import KeycloakOpenidConnect
+
+from django_keycloak.factories import ClientFactory
+from django_keycloak.tests.mixins import MockTestCaseMixin
+
+import django_keycloak.services.oidc_profile
+
+
+class ServicesOpenIDProfileDecodeIdTokenTestCase(
+        MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.client = ClientFactory(
+            realm___certs='{}',
+            realm___well_known_oidc='{"issuer": "https://issuer"}'
+        )
+        self.client.openid_api_client = mock.MagicMock(
+            spec_set=KeycloakOpenidConnect)
+        self.client.openid_api_client.well_known = {
+            'id_token_signing_alg_values_supported': ['signing-alg']
+        }
+        self.client.openid_api_client.decode_token.return_value = {
+            'sub': 'some-sub',
+            'exp': 1520211600  # 2018-03-05 01:00:00
+        }
+
+        django_keycloak.services.oidc_profile.verified_token_cache.clear()
+
+    @freeze_time('2018-03-05 00:59:00')
+    def test_cached_until_expired(self):
+        """
+        Case: the same token gets decoded multiple times before it expires.
+        Expected: the signature is verified only once.
+        """
+        for _ in range(3):
+            id_token_object = django_keycloak.services.oidc_profile\
+                .decode_id_token(client=self.client, id_token='some-token')
+
+        self.assertEqual(id_token_object['sub'], 'some-sub')
+        self.client.openid_api_client.decode_token.assert_called_once_with(
+            token='some-token',
+            key=[],
+            algorithms=['signing-alg'],
+            issuer='https://issuer'
+        )
+
+        cache = django_keycloak.services.oidc_profile.verified_token_cache
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 1)
+
+    @override_settings(KEYCLOAK_VERIFIED_TOKEN_CACHE_SIZE=0)
+    @freeze_time('2018-03-05 00:59:00')
+    def test_cache_disabled(self):
+        """
+        Case: the cache is disabled by the setting after the services got
+        imported.
+        Expected: the token is verified every time.
+        """
+        for _ in range(2):
+            django_keycloak.services.oidc_profile.decode_id_token(
+                client=self.client, id_token='some-token')
+
+        self.assertEqual(
+            self.client.openid_api_client.decode_token.call_count, 2)
+
+    def test_not_cached_after_expiry(self):
+        """
+        Case: a cached token gets decoded again after it has expired.
+        Expected: the token is verified again.
+        """
+        with freeze_time('2018-03-05 00:59:00'):
+            django_keycloak.services.oidc_profile.decode_id_token(
+                client=self.client, id_token='some-token')
+
+        with freeze_time('2018-03-05 01:01:00'):
+            django_keycloak.services.oidc_profile.decode_id_token(
+                client=self.client, id_token='some-token')
+
+        self.assertEqual(
+            self.client.openid_api_client.decode_token.call_count, 2)
+
+    @freeze_time('2018-03-05 00:59:00')
+    def test_evict_verified_tokens(self):
+        """
+        Case: the cached tokens of a subject get evicted, for example on
+        logout.
+        Expected: the token is verified again.
+        """
+        django_keycloak.services.oidc_profile.decode_id_token(
+            client=self.client, id_token='some-token')
+
+        django_keycloak.services.oidc_profile.evict_verified_tokens(
+            sub='some-sub')
+
+        django_keycloak.services.oidc_profile.decode_id_token(
+            client=self.client, id_token='some-token')
+
+        self.assertEqual(
+            self.client.openid_api_client.decode_token.call_count, 2)
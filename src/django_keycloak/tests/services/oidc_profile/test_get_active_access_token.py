@@ -2,7 +2,7 @@ import mock
 
 from datetime import datetime
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from freezegun import freeze_time
 from keycloak.openid_connect import KeycloakOpenidConnect
 
@@ -67,3 +67,85 @@ class ServicesKeycloakOpenIDProfileGetActiveAccessTokenTestCase(
         self.assertEqual(self.oidc_profile.refresh_token, 'new-refresh-token')
         self.assertEqual(self.oidc_profile.refresh_expires_before,
                          datetime(2018, 3, 5, 2, 1, 0))
+
+    @freeze_time('2018-03-05 01:01:00')
+    def test_expired_refreshed_concurrently(self):
+        """
+        Case: access token get requested but current one is expired, while
+        the tokens were already refreshed by a concurrent request.
+        Expected: the refreshed token is returned without refreshing again.
+        """
+        type(self.oidc_profile).objects.filter(pk=self.oidc_profile.pk)\
+            .update(access_token='concurrent-access-token',
+                    expires_before=datetime(2018, 3, 5, 1, 10, 0),
+                    refresh_token='concurrent-refresh-token')
+
+        access_token = django_keycloak.services.oidc_profile \
+            .get_active_access_token(oidc_profile=self.oidc_profile)
+
+        self.assertEqual(access_token, 'concurrent-access-token')
+        self.assertEqual(self.oidc_profile.refresh_token,
+                         'concurrent-refresh-token')
+        self.assertFalse(
+            self.oidc_profile.realm.client.openid_api_client.refresh_token
+                .called
+        )
+
+    @override_settings(KEYCLOAK_TOKEN_REFRESH_AHEAD=120)
+    @freeze_time('2018-03-05 00:59:00')
+    def test_refresh_ahead(self):
+        """
+        Case: access token get requested which expires within the refresh
+        ahead window.
+        Expected: current token is returned and a refresh is scheduled.
+        """
+        mocked_schedule_refresh = self.setup_mock(
+            'django_keycloak.services.oidc_profile.schedule_refresh')
+
+        access_token = django_keycloak.services.oidc_profile\
+            .get_active_access_token(oidc_profile=self.oidc_profile)
+
+        self.assertEqual(access_token, 'access-token')
+        mocked_schedule_refresh.assert_called_once_with(
+            oidc_profile=self.oidc_profile)
+
+    @override_settings(KEYCLOAK_TOKEN_REFRESH_AHEAD=120)
+    @freeze_time('2018-03-05 00:57:00')
+    def test_refresh_ahead_outside_window(self):
+        """
+        Case: access token get requested which expires after the refresh
+        ahead window.
+        Expected: current token is returned and no refresh is scheduled.
+        """
+        mocked_schedule_refresh = self.setup_mock(
+            'django_keycloak.services.oidc_profile.schedule_refresh')
+
+        access_token = django_keycloak.services.oidc_profile\
+            .get_active_access_token(oidc_profile=self.oidc_profile)
+
+        self.assertEqual(access_token, 'access-token')
+        self.assertFalse(mocked_schedule_refresh.called)
+
+    def test_schedule_refresh_once(self):
+        """
+        Case: a refresh is scheduled multiple times for the same profile
+        before the background refresh ran.
+        Expected: the refresh is submitted only once.
+        """
+        mocked_executor = self.setup_mock(
+            'django_keycloak.services.oidc_profile._refresh_executor',
+            autospec=False)
+        patcher = mock.patch.object(django_keycloak.services.oidc_profile,
+                                    '_scheduled_refreshes', set())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        for _ in range(3):
+            django_keycloak.services.oidc_profile.schedule_refresh(
+                oidc_profile=self.oidc_profile)
+
+        mocked_executor.submit.assert_called_once_with(
+            django_keycloak.services.oidc_profile._refresh_in_background,
+            model=type(self.oidc_profile),
+            pk=self.oidc_profile.pk
+        )
@@ -2,7 +2,9 @@ import mock
 
 from datetime import datetime
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from freezegun import freeze_time
 from keycloak.openid_connect import KeycloakOpenidConnect
 from keycloak.authz import KeycloakAuthz
 
@@ -20,6 +22,9 @@ class ServicesKeycloakOpenIDProfileGetActiveAccessTokenTestCase(
             'django_keycloak.services.oidc_profile'
             '.get_active_access_token'
         )
+        self.mocked_get_jwt_key = self.setup_mock(
+            'django_keycloak.services.realm.get_jwt_key'
+        )
 
         self.oidc_profile = OpenIdConnectProfileFactory(
             access_token='access-token',
@@ -34,12 +39,15 @@ class ServicesKeycloakOpenIDProfileGetActiveAccessTokenTestCase(
             .return_value = {
                 'rpt': 'RPT_VALUE'
             }
-        self.oidc_profile.realm.certs = {'cert': 'cert-value'}
 
     def test(self):
         django_keycloak.services.oidc_profile.get_entitlement(
             oidc_profile=self.oidc_profile
         )
+        self.mocked_get_jwt_key.assert_called_once_with(
+            realm=self.oidc_profile.realm,
+            token='RPT_VALUE'
+        )
         self.oidc_profile.realm.client.authz_api_client.entitlement\
             .assert_called_once_with(
                 token=self.mocked_get_active_access_token.return_value
@@ -47,7 +55,7 @@ class ServicesKeycloakOpenIDProfileGetActiveAccessTokenTestCase(
         self.oidc_profile.realm.client.openid_api_client.decode_token\
             .assert_called_once_with(
                 token='RPT_VALUE',
-                key=self.oidc_profile.realm.certs,
+                key=self.mocked_get_jwt_key.return_value,
                 options={
                     'verify_signature': True,
                     'exp': True,
@@ -55,3 +63,94 @@ class ServicesKeycloakOpenIDProfileGetActiveAccessTokenTestCase(
                     'aud': True
                 }
             )
+
+
+@override_settings(KEYCLOAK_ENTITLEMENT_CACHE='default')
+@freeze_time('2018-03-05 00:00:00')
+class ServicesKeycloakOpenIDProfileGetEntitlementCachedTestCase(
+        MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.mocked_get_active_access_token = self.setup_mock(
+            'django_keycloak.services.oidc_profile'
+            '.get_active_access_token',
+            return_value='access-token'
+        )
+        self.setup_mock('django_keycloak.services.realm.get_jwt_key')
+
+        self.oidc_profile = OpenIdConnectProfileFactory(
+            access_token='access-token',
+            expires_before=datetime(2018, 3, 5, 1, 0, 0),
+            refresh_token='refresh-token',
+            session_state='some-session'
+        )
+        self.oidc_profile.realm.client.openid_api_client = mock.MagicMock(
+            spec_set=KeycloakOpenidConnect)
+        self.oidc_profile.realm.client.openid_api_client.decode_token\
+            .return_value = {
+                'exp': 1520208300  # 2018-03-05 00:05:00
+            }
+        self.oidc_profile.realm.client.authz_api_client = mock.MagicMock(
+            spec_set=KeycloakAuthz)
+        self.oidc_profile.realm.client.authz_api_client.entitlement\
+            .return_value = {
+                'rpt': 'RPT_VALUE'
+            }
+
+        cache.clear()
+
+    def test_cached(self):
+        """
+        Case: the entitlement is requested multiple times.
+        Expected: the entitlement is requested from Keycloak only once.
+        """
+        for _ in range(3):
+            rpt = django_keycloak.services.oidc_profile.get_entitlement(
+                oidc_profile=self.oidc_profile
+            )
+
+        self.assertEqual(rpt, {'exp': 1520208300})
+        self.oidc_profile.realm.client.authz_api_client.entitlement\
+            .assert_called_once_with(
+                token=self.mocked_get_active_access_token.return_value
+            )
+
+    def test_other_session(self):
+        """
+        Case: the entitlement is requested again for another session.
+        Expected: the entitlement is requested from Keycloak again.
+        """
+        django_keycloak.services.oidc_profile.get_entitlement(
+            oidc_profile=self.oidc_profile
+        )
+
+        self.oidc_profile.session_state = 'other-session'
+
+        django_keycloak.services.oidc_profile.get_entitlement(
+            oidc_profile=self.oidc_profile
+        )
+
+        self.assertEqual(
+            self.oidc_profile.realm.client.authz_api_client.entitlement
+                .call_count, 2)
+
+    def test_invalidated(self):
+        """
+        Case: the entitlement is requested again after it got invalidated.
+        Expected: the entitlement is requested from Keycloak again.
+        """
+        django_keycloak.services.oidc_profile.get_entitlement(
+            oidc_profile=self.oidc_profile
+        )
+
+        django_keycloak.services.oidc_profile.invalidate_entitlement(
+            oidc_profile=self.oidc_profile
+        )
+
+        django_keycloak.services.oidc_profile.get_entitlement(
+            oidc_profile=self.oidc_profile
+        )
+
+        self.assertEqual(
+            self.oidc_profile.realm.client.authz_api_client.entitlement
+                .call_count, 2)
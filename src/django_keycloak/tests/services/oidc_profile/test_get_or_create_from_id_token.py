@@ -46,7 +46,7 @@ class ServicesOpenIDProfileGetOrCreateFromIdTokenTestCase(
 
         self.client.openid_api_client.decode_token.assert_called_with(
             token='some-id-token',
-            key=dict(),
+            key=[],
             algorithms=['signing-alg'],
             issuer='https://issuer'
         )
@@ -78,7 +78,7 @@ class ServicesOpenIDProfileGetOrCreateFromIdTokenTestCase(
 
         self.client.openid_api_client.decode_token.assert_called_with(
             token='some-id-token',
-            key=dict(),
+            key=[],
             algorithms=['signing-alg'],
             issuer='https://issuer'
         )
@@ -107,7 +107,7 @@ class ServicesOpenIDProfileGetOrCreateFromIdTokenTestCase(
 
         self.client.openid_api_client.decode_token.assert_called_with(
             token='some-id-token',
-            key=dict(),
+            key=[],
             algorithms=['signing-alg'],
             issuer='https://issuer'
         )
@@ -144,7 +144,7 @@ class ServicesOpenIDProfileGetOrCreateFromIdTokenTestCase(
 
         self.client.openid_api_client.decode_token.assert_called_with(
             token='some-id-token',
-            key=dict(),
+            key=[],
             algorithms=['signing-alg'],
             issuer='https://issuer'
         )
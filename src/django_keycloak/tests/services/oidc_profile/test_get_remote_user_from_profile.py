@@ -0,0 +1,92 @@
+import mock
+
+from datetime import datetime
+
+from django.test import TestCase, override_settings
+from freezegun import freeze_time
+from jose import jwt
+from keycloak.openid_connect import KeycloakOpenidConnect
+
+from django_keycloak.factories import OpenIdConnectProfileFactory
+from django_keycloak.remote_user import KeycloakRemoteUser
+
+import django_keycloak.services.oidc_profile
+
+
+@freeze_time('2018-03-05 00:00:00')
+class ServicesOpenIDProfileGetRemoteUserFromProfileTestCase(TestCase):
+
+    def setUp(self):
+        self.oidc_profile = OpenIdConnectProfileFactory(
+            access_token=jwt.encode({
+                'sub': 'some-sub',
+                'preferred_username': 'some-user',
+                'email': 'user@example.com'
+            }, 'secret'),
+            expires_before=datetime(2018, 3, 5, 0, 5, 0)
+        )
+        self.oidc_profile.realm.client.openid_api_client = mock.MagicMock(
+            spec_set=KeycloakOpenidConnect)
+        self.oidc_profile.realm.client.openid_api_client.userinfo\
+            .return_value = {
+                'sub': 'some-sub',
+                'preferred_username': 'userinfo-user'
+            }
+
+        django_keycloak.services.oidc_profile.userinfo_cache.clear()
+
+    def test_from_claims(self):
+        """
+        Case: the remote user of a profile is requested.
+        Expected: the user is built from the claims of the stored access
+        token without requesting the userinfo.
+        """
+        user = django_keycloak.services.oidc_profile\
+            .get_remote_user_from_profile(oidc_profile=self.oidc_profile)
+
+        self.assertIsInstance(user, KeycloakRemoteUser)
+        self.assertEqual(user.username, 'some-user')
+        self.assertEqual(user.email, 'user@example.com')
+        self.assertFalse(self.oidc_profile.realm.client.openid_api_client
+                         .userinfo.called)
+
+    def test_without_access_token(self):
+        """
+        Case: the remote user of a profile without access token is requested.
+        Expected: no user is returned.
+        """
+        self.oidc_profile.access_token = None
+
+        self.assertIsNone(django_keycloak.services.oidc_profile
+                          .get_remote_user_from_profile(
+                              oidc_profile=self.oidc_profile))
+
+    @override_settings(KEYCLOAK_REMOTE_USER_USERINFO_CACHE_TIMEOUT=60)
+    def test_from_cached_userinfo(self):
+        """
+        Case: the remote user is requested multiple times with a userinfo
+        cache timeout configured.
+        Expected: the user is built from the userinfo, which is requested
+        only once.
+        """
+        for _ in range(3):
+            user = django_keycloak.services.oidc_profile\
+                .get_remote_user_from_profile(oidc_profile=self.oidc_profile)
+
+        self.assertEqual(user.username, 'userinfo-user')
+        self.oidc_profile.realm.client.openid_api_client.userinfo\
+            .assert_called_once_with(token=self.oidc_profile.access_token)
+
+    @override_settings(KEYCLOAK_REMOTE_USER_USERINFO_CACHE_TIMEOUT=0)
+    def test_userinfo_not_cached(self):
+        """
+        Case: the remote user is requested multiple times with a userinfo
+        cache timeout of 0.
+        Expected: the userinfo is requested every time.
+        """
+        for _ in range(2):
+            django_keycloak.services.oidc_profile\
+                .get_remote_user_from_profile(oidc_profile=self.oidc_profile)
+
+        self.assertEqual(self.oidc_profile.realm.client.openid_api_client
+                         .userinfo.call_count, 2)
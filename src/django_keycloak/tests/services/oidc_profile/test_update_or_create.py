@@ -29,7 +29,8 @@ class ServicesKeycloakOpenIDProfileUpdateOrCreateTestCase(MockTestCaseMixin,
             'expires_in': 600,
             'refresh_expires_in': 3600,
             'access_token': 'access-token',
-            'refresh_token': 'refresh-token'
+            'refresh_token': 'refresh-token',
+            'session_state': 'some-session'
         }
         self.client.openid_api_client.well_known = {
             'id_token_signing_alg_values_supported': ['signing-alg']
@@ -53,7 +54,7 @@ class ServicesKeycloakOpenIDProfileUpdateOrCreateTestCase(MockTestCaseMixin,
                                      redirect_uri='https://redirect')
         self.client.openid_api_client.decode_token.assert_called_once_with(
             token='id-token',
-            key=dict(),
+            key=[],
             algorithms=['signing-alg'],
             issuer='https://issuer'
         )
@@ -62,6 +63,7 @@ class ServicesKeycloakOpenIDProfileUpdateOrCreateTestCase(MockTestCaseMixin,
         self.assertEqual(profile.sub, 'some-sub'),
         self.assertEqual(profile.access_token, 'access-token')
         self.assertEqual(profile.refresh_token, 'refresh-token')
+        self.assertEqual(profile.session_state, 'some-session')
         self.assertEqual(profile.expires_before, datetime(
             year=2018, month=3, day=1, hour=0, minute=10, second=0
         ))
@@ -103,7 +105,7 @@ class ServicesKeycloakOpenIDProfileUpdateOrCreateTestCase(MockTestCaseMixin,
                                      redirect_uri='https://redirect')
         self.client.openid_api_client.decode_token.assert_called_once_with(
             token='id-token',
-            key=dict(),
+            key=[],
             algorithms=['signing-alg'],
             issuer='https://issuer'
         )
@@ -112,6 +114,7 @@ class ServicesKeycloakOpenIDProfileUpdateOrCreateTestCase(MockTestCaseMixin,
         self.assertEqual(profile.sub, 'some-sub')
         self.assertEqual(profile.access_token, 'access-token')
         self.assertEqual(profile.refresh_token, 'refresh-token')
+        self.assertEqual(profile.session_state, 'some-session')
         self.assertEqual(profile.expires_before, datetime(
             year=2018, month=3, day=1, hour=0, minute=10, second=0
         ))
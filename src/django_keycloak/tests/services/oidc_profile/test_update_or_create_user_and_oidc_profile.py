@@ -0,0 +1,58 @@
+from django.test import TestCase, override_settings
+
+from django_keycloak.factories import ClientFactory, \
+    OpenIdConnectProfileFactory
+from django_keycloak.tests.mixins import MockTestCaseMixin
+
+import django_keycloak.services.oidc_profile
+
+
+@override_settings(KEYCLOAK_SYNC_CHANGED_CLAIMS_ONLY=True)
+class ServicesOpenIDProfileUpdateOrCreateUserAndOidcProfileTestCase(
+        MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.client = ClientFactory()
+        self.profile = OpenIdConnectProfileFactory(
+            sub='some-sub',
+            realm=self.client.realm,
+            user__username='some-sub',
+            user__email='test@example.com',
+            user__first_name='Some given name',
+            user__last_name='Some family name'
+        )
+        self.id_token_object = {
+            'sub': 'some-sub',
+            'email': 'test@example.com',
+            'given_name': 'Some given name',
+            'family_name': 'Some family name'
+        }
+
+    def test_unchanged_claims(self):
+        """
+        Case: the claims match the stored user and profile.
+        Expected: the profile is returned with a single query and without
+        writes.
+        """
+        with self.assertNumQueries(1):
+            profile = django_keycloak.services.oidc_profile\
+                .update_or_create_user_and_oidc_profile(
+                    client=self.client, id_token_object=self.id_token_object)
+
+        self.assertEqual(profile.pk, self.profile.pk)
+        self.assertEqual(profile.user.pk, self.profile.user.pk)
+
+    def test_changed_claims(self):
+        """
+        Case: the email in the claims differs from the stored user.
+        Expected: the user gets updated.
+        """
+        self.id_token_object['email'] = 'changed@example.com'
+
+        profile = django_keycloak.services.oidc_profile\
+            .update_or_create_user_and_oidc_profile(
+                client=self.client, id_token_object=self.id_token_object)
+
+        profile.user.refresh_from_db()
+        self.assertEqual(profile.pk, self.profile.pk)
+        self.assertEqual(profile.user.email, 'changed@example.com')
@@ -0,0 +1,135 @@
+import mock
+
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+from keycloak.admin import KeycloakAdmin
+from keycloak.exceptions import KeycloakClientError
+from requests.exceptions import HTTPError
+
+from django_keycloak.factories import ClientFactory
+from django_keycloak.models import Realm
+from django_keycloak.tests.mixins import MockTestCaseMixin
+
+import django_keycloak.services.permissions
+
+
+class ServicesPermissionsSynchronizeTestCase(MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.mocked_get_keycloak_id = self.setup_mock(
+            'django_keycloak.services.client.get_keycloak_id',
+            return_value='keycloak-id')
+        self.mocked_invalidate_keycloak_id = self.setup_mock(
+            'django_keycloak.services.client.invalidate_keycloak_id')
+
+        self.client = ClientFactory(realm__name='realm')
+        self.client.admin_api_client = mock.MagicMock(spec_set=KeycloakAdmin)
+        self.client.admin_api_client.get_full_url.side_effect = \
+            lambda path: 'https://keycloak.example.com' + path
+        self.client.admin_api_client.get.return_value = [
+            {'name': 'view_realm', 'description': 'Can view realm'},
+            {'name': 'change_realm', 'description': 'Old description'},
+            {'name': 'manual role', 'description': 'Created in Keycloak'}
+        ]
+
+        Permission.objects.all().delete()
+        content_type = ContentType.objects.get_for_model(Realm)
+        for codename, name in [('view_realm', 'Can view realm'),
+                               ('change_realm', 'Can change realm'),
+                               ('add_realm', 'Can add realm')]:
+            Permission.objects.create(codename=codename, name=name,
+                                      content_type=content_type)
+
+        self.role_api = self.client.admin_api_client.realms.by_name\
+            .return_value.clients.by_id.return_value.roles
+
+    def test_synchronize(self):
+        """
+        Case: permissions are synchronized with roles of which some exist.
+        Expected: the roles are fetched once, only missing roles are created
+        and only changed roles are updated.
+        """
+        changes = django_keycloak.services.permissions.synchronize(
+            client=self.client)
+
+        self.assertEqual(changes, {
+            'create': ['add_realm'],
+            'update': ['change_realm'],
+            'delete': []
+        })
+        self.client.admin_api_client.get.assert_called_once_with(
+            url='https://keycloak.example.com/auth/admin/realms/realm/'
+                'clients/keycloak-id/roles')
+        self.role_api.create.assert_called_once_with(
+            name='add_realm', description='Can add realm')
+        self.role_api.by_name.assert_called_once_with('change_realm')
+        self.role_api.by_name.return_value.update.assert_called_once_with(
+            name='change_realm', description='Can change realm')
+        self.assertFalse(self.client.admin_api_client.delete.called)
+
+    def test_prune(self):
+        """
+        Case: permissions are synchronized with pruning enabled.
+        Expected: roles which don't match a permission are deleted.
+        """
+        changes = django_keycloak.services.permissions.synchronize(
+            client=self.client, prune=True)
+
+        self.assertEqual(changes['delete'], ['manual role'])
+        self.client.admin_api_client.delete.assert_called_once_with(
+            url='https://keycloak.example.com/auth/admin/realms/realm/'
+                'clients/keycloak-id/roles/manual%20role')
+
+    def test_dry_run(self):
+        """
+        Case: a dry run of the synchronization.
+        Expected: the changes are returned, but not applied.
+        """
+        changes = django_keycloak.services.permissions.synchronize(
+            client=self.client, prune=True, dry_run=True)
+
+        self.assertEqual(changes, {
+            'create': ['add_realm'],
+            'update': ['change_realm'],
+            'delete': ['manual role']
+        })
+        self.assertFalse(self.role_api.create.called)
+        self.assertFalse(self.role_api.by_name.called)
+        self.assertFalse(self.client.admin_api_client.delete.called)
+
+    def test_keycloak_id_not_found(self):
+        """
+        Case: the roles of the stored Keycloak id of the client are not found.
+        Expected: the Keycloak id is invalidated and looked up again.
+        """
+        roles = self.client.admin_api_client.get.return_value
+        self.client.admin_api_client.get.side_effect = [
+            KeycloakClientError(original_exc=HTTPError(
+                response=mock.MagicMock(status_code=404))),
+            roles
+        ]
+
+        changes = django_keycloak.services.permissions.synchronize(
+            client=self.client)
+
+        self.assertEqual(changes['create'], ['add_realm'])
+        self.mocked_invalidate_keycloak_id.assert_called_once_with(
+            client=self.client)
+        self.assertEqual(self.mocked_get_keycloak_id.call_count, 2)
+
+    def test_delete_failed(self):
+        """
+        Case: Keycloak rejects deleting a role.
+        Expected: the error is raised like failures of the other calls.
+        """
+        response = self.client.admin_api_client.delete.return_value
+        response.raise_for_status.side_effect = HTTPError(
+            response=mock.MagicMock(status_code=403))
+
+        with self.assertRaises(KeycloakClientError) as context:
+            django_keycloak.services.permissions.synchronize(
+                client=self.client, prune=True)
+
+        self.assertEqual(
+            context.exception.original_exc.response.status_code, 403)
@@ -0,0 +1,85 @@
+from django.test import TestCase, override_settings
+from freezegun import freeze_time
+
+from django_keycloak.factories import RealmFactory
+from django_keycloak.tests.mixins import MockTestCaseMixin
+
+import django_keycloak.services.realm
+
+
+class ServicesRealmGetCachedRealmTestCase(MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.realm = RealmFactory(name='test-realm')
+
+        django_keycloak.services.realm.clear_realm_registry()
+
+    def test_shared_instance(self):
+        """
+        Case: the default realm is requested multiple times.
+        Expected: the realm is loaded once including server and client and the
+        same instance is returned every time.
+        """
+        with self.assertNumQueries(1):
+            realm = django_keycloak.services.realm.get_cached_realm()
+            self.assertEqual(realm.server.pk, self.realm.server.pk)
+            self.assertEqual(realm.client.pk, self.realm.client.pk)
+
+        with self.assertNumQueries(0):
+            self.assertIs(django_keycloak.services.realm.get_cached_realm(),
+                          realm)
+
+    def test_by_name(self):
+        """
+        Case: a realm is requested by name.
+        Expected: the realm with the given name is returned.
+        """
+        RealmFactory(name='other-realm')
+
+        realm = django_keycloak.services.realm.get_cached_realm(
+            name='other-realm')
+
+        self.assertEqual(realm.name, 'other-realm')
+
+    def test_missing(self):
+        """
+        Case: a realm is requested which does not exist (yet).
+        Expected: None is returned and not cached, so a realm created by
+        another process is found on the next request.
+        """
+        with self.assertNumQueries(1):
+            self.assertIsNone(django_keycloak.services.realm.get_cached_realm(
+                name='other-realm'))
+
+        with self.assertNumQueries(1):
+            django_keycloak.services.realm.get_cached_realm(
+                name='other-realm')
+
+    def test_cleared_on_save(self):
+        """
+        Case: the realm gets saved after it was cached.
+        Expected: the realm is loaded again.
+        """
+        realm = django_keycloak.services.realm.get_cached_realm()
+
+        self.realm.save()
+
+        self.assertIsNot(django_keycloak.services.realm.get_cached_realm(),
+                         realm)
+
+    @override_settings(KEYCLOAK_REALM_CACHE_TIMEOUT=60)
+    def test_timeout(self):
+        """
+        Case: the realm is requested after the cache timeout passed.
+        Expected: the realm is loaded again.
+        """
+        with freeze_time('2018-03-05 00:00:00'):
+            realm = django_keycloak.services.realm.get_cached_realm()
+
+        with freeze_time('2018-03-05 00:00:59'):
+            self.assertIs(django_keycloak.services.realm.get_cached_realm(),
+                          realm)
+
+        with freeze_time('2018-03-05 00:01:01'):
+            self.assertIsNot(
+                django_keycloak.services.realm.get_cached_realm(), realm)
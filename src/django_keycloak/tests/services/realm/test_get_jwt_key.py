@@ -0,0 +1,112 @@
+import json
+import mock
+
+from django.test import TestCase
+from jose.utils import base64url_encode
+from keycloak.openid_connect import KeycloakOpenidConnect
+
+from django_keycloak.factories import RealmFactory
+from django_keycloak.tests.mixins import MockTestCaseMixin
+
+import django_keycloak.services.realm
+
+
+def make_token(header):
+    return '{}.e30.c2ln'.format(
+        base64url_encode(json.dumps(header).encode()).decode())
+
+
+class ServicesRealmGetJwtKeyTestCase(MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.realm = RealmFactory(
+            _certs=json.dumps({
+                'keys': [
+                    {'kid': 'key-1', 'alg': 'RS256', 'use': 'sig'},
+                    {'kid': 'key-2', 'alg': 'RS256'},
+                    {'kid': 'key-3', 'alg': 'RSA-OAEP', 'use': 'enc'}
+                ]
+            })
+        )
+
+        self.mocked_construct = self.setup_mock(
+            'jose.jwk.construct',
+            side_effect=lambda key_data, algorithm: 'constructed-{}'.format(
+                key_data['kid'])
+        )
+
+        django_keycloak.services.realm.clear_jwks_registry()
+
+    def test_key_by_kid(self):
+        """
+        Case: a key is requested for a token with a known key id.
+        Expected: the constructed key with the matching kid is returned.
+        """
+        key = django_keycloak.services.realm.get_jwt_key(
+            realm=self.realm, token=make_token({'kid': 'key-2'}))
+
+        self.assertEqual(key, 'constructed-key-2')
+
+    def test_unknown_kid(self):
+        """
+        Case: a key is requested for a token with an unknown key id or a
+        malformed token.
+        Expected: all signing keys of the realm are returned.
+        """
+        key = django_keycloak.services.realm.get_jwt_key(
+            realm=self.realm, token=make_token({'kid': 'other'}))
+
+        self.assertEqual(sorted(key),
+                         ['constructed-key-1', 'constructed-key-2'])
+
+        key = django_keycloak.services.realm.get_jwt_key(
+            realm=self.realm, token='malformed')
+
+        self.assertEqual(sorted(key),
+                         ['constructed-key-1', 'constructed-key-2'])
+
+    def test_keys_constructed_once(self):
+        """
+        Case: keys are requested multiple times for the same realm.
+        Expected: the keys are constructed only once.
+        """
+        for _ in range(3):
+            django_keycloak.services.realm.get_jwt_key(
+                realm=self.realm, token=make_token({'kid': 'key-1'}))
+
+        self.assertEqual(self.mocked_construct.call_count, 2)
+
+    def test_keys_reconstructed_on_changed_certs(self):
+        """
+        Case: the certs of the realm change after the keys were constructed.
+        Expected: the keys are constructed again from the new certs.
+        """
+        django_keycloak.services.realm.get_jwt_key(
+            realm=self.realm, token=make_token({'kid': 'key-1'}))
+
+        self.realm.certs = {'keys': [{'kid': 'key-4', 'alg': 'RS256'}]}
+
+        key = django_keycloak.services.realm.get_jwt_key(
+            realm=self.realm, token=make_token({'kid': 'key-4'}))
+
+        self.assertEqual(key, 'constructed-key-4')
+        self.assertEqual(self.mocked_construct.call_count, 3)
+
+    def test_keys_reconstructed_after_refresh_certs(self):
+        """
+        Case: the certs of the realm get refreshed from the Keycloak server.
+        Expected: the registry is cleared and keys are constructed again.
+        """
+        django_keycloak.services.realm.get_jwt_key(
+            realm=self.realm, token=make_token({'kid': 'key-1'}))
+
+        self.realm.client.openid_api_client = mock.MagicMock(
+            spec_set=KeycloakOpenidConnect)
+        self.realm.client.openid_api_client.certs.return_value = \
+            self.realm.certs
+        django_keycloak.services.realm.refresh_certs(realm=self.realm)
+
+        django_keycloak.services.realm.get_jwt_key(
+            realm=self.realm, token=make_token({'kid': 'key-1'}))
+
+        self.assertEqual(self.mocked_construct.call_count, 4)
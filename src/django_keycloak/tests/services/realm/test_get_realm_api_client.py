@@ -1,6 +1,7 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from django_keycloak.factories import ServerFactory, RealmFactory
+from django_keycloak.models import Realm
 from django_keycloak.tests.mixins import MockTestCaseMixin
 
 import django_keycloak.services.realm
@@ -20,6 +21,8 @@ class ServicesRealmGetRealmApiClientTestCase(
             name='test-realm'
         )
 
+        django_keycloak.services.realm.clear_realm_api_clients()
+
     def test_get_realm_api_client(self):
         """
         Case: a realm api client is requested for a realm on a server without
@@ -47,3 +50,38 @@ class ServicesRealmGetRealmApiClientTestCase(
 
         self.assertEqual(client.server_url, self.server.internal_url)
         self.assertEqual(client.realm_name, self.realm.name)
+
+    def test_get_realm_api_client_shared(self):
+        """
+        Case: a realm api client is requested multiple times for the same
+        realm.
+        Expected: the same client, and so the same pooled HTTP session, is
+        returned every time.
+        """
+        client = django_keycloak.services.realm.\
+            get_realm_api_client(realm=self.realm)
+
+        self.assertIs(
+            django_keycloak.services.realm.get_realm_api_client(
+                realm=Realm.objects.get(pk=self.realm.pk)),
+            client
+        )
+
+    @override_settings(KEYCLOAK_HTTP_TIMEOUT=5,
+                       KEYCLOAK_HTTP_POOL_MAXSIZE=20)
+    def test_get_realm_api_client_pool_settings(self):
+        """
+        Case: a realm api client is requested with connection pool settings
+        configured.
+        Expected: the HTTP session uses an adapter with these settings.
+        """
+        client = django_keycloak.services.realm.\
+            get_realm_api_client(realm=self.realm)
+
+        adapter = client.client.session.get_adapter(self.server.url)
+
+        self.assertIsInstance(adapter,
+                              django_keycloak.services.realm
+                              .KeycloakHTTPAdapter)
+        self.assertEqual(adapter.timeout, 5)
+        self.assertEqual(adapter._pool_maxsize, 20)
@@ -0,0 +1,170 @@
+import mock
+
+from datetime import datetime
+
+from django.test import TestCase
+from freezegun import freeze_time
+from keycloak.exceptions import KeycloakClientError
+from keycloak.openid_connect import KeycloakOpenidConnect
+
+from django_keycloak.factories import (
+    OpenIdConnectProfileFactory,
+    RemoteClientFactory
+)
+from django_keycloak.models import ExchangedToken
+from django_keycloak.tests.mixins import MockTestCaseMixin
+
+import django_keycloak.services.remote_client
+
+
+@freeze_time('2018-03-05 00:00:00')
+class ServicesRemoteClientGetActiveRemoteClientTokenTestCase(
+        MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.mocked_exchange_token = self.setup_mock(
+            'django_keycloak.services.remote_client.exchange_token',
+            return_value={
+                'access_token': 'exchanged-access-token',
+                'expires_in': 300,
+                'refresh_token': 'exchanged-refresh-token',
+                'refresh_expires_in': 1800
+            }
+        )
+
+        self.oidc_profile = OpenIdConnectProfileFactory()
+        self.oidc_profile.realm.client.openid_api_client = mock.MagicMock(
+            spec_set=KeycloakOpenidConnect)
+        self.oidc_profile.realm.client.openid_api_client.refresh_token\
+            .return_value = {
+                'access_token': 'refreshed-access-token',
+                'expires_in': 300,
+                'refresh_token': 'refreshed-refresh-token',
+                'refresh_expires_in': 1800
+            }
+
+        self.remote_client = RemoteClientFactory(
+            realm=self.oidc_profile.realm)
+
+    def create_exchanged_token(self, expires_before, refresh_expires_before):
+        return ExchangedToken.objects.create(
+            oidc_profile=self.oidc_profile,
+            remote_client=self.remote_client,
+            access_token='access-token',
+            expires_before=expires_before,
+            refresh_token='refresh-token',
+            refresh_expires_before=refresh_expires_before
+        )
+
+    def test_active(self):
+        """
+        Case: the exchanged access token is still valid.
+        Expected: the stored access token is returned without calling
+        Keycloak or writing the token.
+        """
+        self.create_exchanged_token(
+            expires_before=datetime(2018, 3, 5, 0, 5, 0),
+            refresh_expires_before=datetime(2018, 3, 5, 0, 30, 0))
+
+        with self.assertNumQueries(1):
+            access_token = django_keycloak.services.remote_client\
+                .get_active_remote_client_token(
+                    oidc_profile=self.oidc_profile,
+                    remote_client=self.remote_client)
+
+        self.assertEqual(access_token, 'access-token')
+        self.assertFalse(self.mocked_exchange_token.called)
+
+    def test_refresh(self):
+        """
+        Case: the exchanged access token expired, but the refresh token is
+        still valid.
+        Expected: the tokens are refreshed instead of exchanged.
+        """
+        self.create_exchanged_token(
+            expires_before=datetime(2018, 3, 4, 23, 55, 0),
+            refresh_expires_before=datetime(2018, 3, 5, 0, 30, 0))
+
+        access_token = django_keycloak.services.remote_client\
+            .get_active_remote_client_token(
+                oidc_profile=self.oidc_profile,
+                remote_client=self.remote_client)
+
+        self.assertEqual(access_token, 'refreshed-access-token')
+        self.oidc_profile.realm.client.openid_api_client.refresh_token\
+            .assert_called_once_with(refresh_token='refresh-token')
+        self.assertFalse(self.mocked_exchange_token.called)
+
+        exchanged_token = ExchangedToken.objects.get()
+        self.assertEqual(exchanged_token.refresh_token,
+                         'refreshed-refresh-token')
+        self.assertEqual(exchanged_token.expires_before,
+                         datetime(2018, 3, 5, 0, 5, 0))
+
+    def test_refreshed_concurrently(self):
+        """
+        Case: the exchanged tokens get refreshed by another request after
+        they were loaded.
+        Expected: the tokens which are current once the lock is acquired are
+        used, instead of refreshing them again.
+        """
+        exchanged_token = self.create_exchanged_token(
+            expires_before=datetime(2018, 3, 4, 23, 55, 0),
+            refresh_expires_before=datetime(2018, 3, 5, 0, 30, 0))
+
+        def refresh_concurrently(token_store, token_model):
+            ExchangedToken.objects.filter(pk=exchanged_token.pk).update(
+                access_token='concurrent-access-token',
+                expires_before=datetime(2018, 3, 5, 0, 5, 0))
+            return token_model
+
+        self.setup_mock('django_keycloak.token_stores.DatabaseTokenStore.load',
+                        side_effect=refresh_concurrently)
+
+        access_token = django_keycloak.services.remote_client\
+            .get_active_remote_client_token(
+                oidc_profile=self.oidc_profile,
+                remote_client=self.remote_client)
+
+        self.assertEqual(access_token, 'concurrent-access-token')
+        self.assertFalse(self.oidc_profile.realm.client.openid_api_client
+                         .refresh_token.called)
+        self.assertFalse(self.mocked_exchange_token.called)
+
+    def test_refresh_failed(self):
+        """
+        Case: refreshing the exchanged tokens fails.
+        Expected: the access token of the profile is exchanged again.
+        """
+        self.create_exchanged_token(
+            expires_before=datetime(2018, 3, 4, 23, 55, 0),
+            refresh_expires_before=datetime(2018, 3, 5, 0, 30, 0))
+        self.oidc_profile.realm.client.openid_api_client.refresh_token\
+            .side_effect = KeycloakClientError(original_exc=Exception())
+
+        access_token = django_keycloak.services.remote_client\
+            .get_active_remote_client_token(
+                oidc_profile=self.oidc_profile,
+                remote_client=self.remote_client)
+
+        self.assertEqual(access_token, 'exchanged-access-token')
+        self.mocked_exchange_token.assert_called_once_with(
+            self.oidc_profile, self.remote_client, subject_token=None)
+
+    def test_new(self):
+        """
+        Case: no token was exchanged for the remote client yet.
+        Expected: the token is exchanged and stored with a single insert.
+        """
+        # Select, insert and the savepoint around the insert.
+        with self.assertNumQueries(4):
+            access_token = django_keycloak.services.remote_client\
+                .get_active_remote_client_token(
+                    oidc_profile=self.oidc_profile,
+                    remote_client=self.remote_client)
+
+        self.assertEqual(access_token, 'exchanged-access-token')
+        self.assertFalse(self.oidc_profile.realm.client.openid_api_client
+                         .refresh_token.called)
+        self.assertEqual(ExchangedToken.objects.get().access_token,
+                         'exchanged-access-token')
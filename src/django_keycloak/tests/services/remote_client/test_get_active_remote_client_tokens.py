@@ -0,0 +1,145 @@
+import mock
+
+from datetime import datetime
+
+from django.test import TestCase
+from freezegun import freeze_time
+from keycloak.openid_connect import KeycloakOpenidConnect
+
+from django_keycloak.factories import (
+    OpenIdConnectProfileFactory,
+    RemoteClientFactory
+)
+from django_keycloak.models import ExchangedToken
+from django_keycloak.tests.mixins import MockTestCaseMixin
+
+import django_keycloak.services.remote_client
+
+
+@freeze_time('2018-03-05 00:00:00')
+class ServicesRemoteClientGetActiveRemoteClientTokensTestCase(
+        MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.mocked_get_active_access_token = self.setup_mock(
+            'django_keycloak.services.oidc_profile.get_active_access_token',
+            return_value='subject-token'
+        )
+
+        self.oidc_profile = OpenIdConnectProfileFactory()
+        self.oidc_profile.realm.client.openid_api_client = mock.MagicMock(
+            spec_set=KeycloakOpenidConnect)
+        self.oidc_profile.realm.client.openid_api_client.token_exchange\
+            .side_effect = lambda audience, **kwargs: {
+                'access_token': '{}-access-token'.format(audience),
+                'expires_in': 300,
+                'refresh_token': '{}-refresh-token'.format(audience),
+                'refresh_expires_in': 1800
+            }
+
+        self.active_client = RemoteClientFactory(
+            realm=self.oidc_profile.realm, name='active')
+        self.expired_client = RemoteClientFactory(
+            realm=self.oidc_profile.realm, name='expired')
+        self.new_client = RemoteClientFactory(
+            realm=self.oidc_profile.realm, name='new')
+
+        ExchangedToken.objects.create(
+            oidc_profile=self.oidc_profile,
+            remote_client=self.active_client,
+            access_token='active-token',
+            expires_before=datetime(2018, 3, 5, 0, 5, 0),
+            refresh_expires_before=datetime(2018, 3, 5, 0, 30, 0)
+        )
+        ExchangedToken.objects.create(
+            oidc_profile=self.oidc_profile,
+            remote_client=self.expired_client,
+            access_token='expired-token',
+            expires_before=datetime(2018, 3, 4, 23, 0, 0),
+            refresh_expires_before=datetime(2018, 3, 4, 23, 30, 0)
+        )
+
+    def test_get_tokens(self):
+        """
+        Case: tokens are requested for multiple remote clients of which one
+        has an active token.
+        Expected: only the stale tokens are exchanged, using the subject
+        token of the profile which is requested once, and all tokens are
+        returned by remote client name.
+        """
+        access_tokens = django_keycloak.services.remote_client\
+            .get_active_remote_client_tokens(
+                oidc_profile=self.oidc_profile,
+                remote_clients=[self.active_client, self.expired_client,
+                                self.new_client])
+
+        self.assertEqual(access_tokens, {
+            'active': 'active-token',
+            'expired': 'expired-access-token',
+            'new': 'new-access-token'
+        })
+        self.mocked_get_active_access_token.assert_called_once_with(
+            oidc_profile=self.oidc_profile)
+
+        token_exchange = self.oidc_profile.realm.client.openid_api_client\
+            .token_exchange
+        self.assertEqual(token_exchange.call_count, 2)
+        token_exchange.assert_any_call(
+            audience='new',
+            subject_token='subject-token',
+            requested_token_type='urn:ietf:params:oauth:token-type:'
+                                 'refresh_token'
+        )
+
+        self.assertEqual(ExchangedToken.objects.get(
+            remote_client=self.new_client).access_token, 'new-access-token')
+
+    def test_refreshed_concurrently(self):
+        """
+        Case: the expired token gets refreshed by another request after the
+        tokens were loaded.
+        Expected: the tokens which are current once the locks are acquired
+        are used, only the new token is exchanged.
+        """
+        def refresh_concurrently(token_store, token_models):
+            ExchangedToken.objects.filter(
+                remote_client=self.expired_client
+            ).update(access_token='concurrent-access-token',
+                     expires_before=datetime(2018, 3, 5, 0, 5, 0))
+            return token_models
+
+        self.setup_mock(
+            'django_keycloak.token_stores.DatabaseTokenStore.load_many',
+            side_effect=refresh_concurrently)
+
+        access_tokens = django_keycloak.services.remote_client\
+            .get_active_remote_client_tokens(
+                oidc_profile=self.oidc_profile,
+                remote_clients=[self.expired_client, self.new_client])
+
+        self.assertEqual(access_tokens, {
+            'expired': 'concurrent-access-token',
+            'new': 'new-access-token'
+        })
+        self.oidc_profile.realm.client.openid_api_client.token_exchange\
+            .assert_called_once_with(
+                audience='new',
+                subject_token='subject-token',
+                requested_token_type='urn:ietf:params:oauth:token-type:'
+                                     'refresh_token'
+            )
+
+    def test_all_active(self):
+        """
+        Case: tokens are requested for remote clients with active tokens.
+        Expected: the tokens are loaded in one query without calling
+        Keycloak.
+        """
+        with self.assertNumQueries(1):
+            access_tokens = django_keycloak.services.remote_client\
+                .get_active_remote_client_tokens(
+                    oidc_profile=self.oidc_profile,
+                    remote_clients=[self.active_client])
+
+        self.assertEqual(access_tokens, {'active': 'active-token'})
+        self.assertFalse(self.mocked_get_active_access_token.called)
@@ -0,0 +1,139 @@
+import mock
+
+from django.test import TestCase
+from keycloak.exceptions import KeycloakClientError
+from keycloak.uma1 import KeycloakUMA1
+from requests.exceptions import HTTPError
+
+from django_keycloak.factories import ClientFactory
+from django_keycloak.tests.mixins import MockTestCaseMixin
+
+import django_keycloak.services.uma
+
+
+class ServicesUMASynchronizeClientTestCase(MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.mocked_get_access_token = self.setup_mock(
+            'django_keycloak.services.client.get_access_token',
+            return_value='access-token'
+        )
+
+        self.client = ClientFactory(client_id='some-client')
+        self.client.uma1_api_client = mock.MagicMock(spec_set=KeycloakUMA1)
+        self.client.uma1_api_client.resource_set_list.return_value = [
+            {
+                '_id': 'user-id',
+                'name': 'auth.user',
+                'type': 'urn:some-client:resources:auth.user',
+                'resource_scopes': [{'name': 'add'}, {'name': 'change'},
+                                    {'name': 'delete'}, {'name': 'view'}]
+            },
+            {
+                '_id': 'group-id',
+                'name': 'auth.group',
+                'type': 'urn:some-client:resources:auth.group',
+                'resource_scopes': [{'name': 'add'}]
+            },
+            {
+                '_id': 'removed-id',
+                'name': 'removed.model',
+                'type': 'urn:some-client:resources:removed.model',
+                'resource_scopes': []
+            },
+            {
+                '_id': 'other-id',
+                'name': 'Other resource',
+                'type': 'urn:other',
+            }
+        ]
+
+    def test_synchronize(self):
+        """
+        Case: models are synchronized while some are registered already.
+        Expected: resources are listed once, missing resources are created,
+        resources with changed scopes are updated and resources of removed
+        models of the client are deleted.
+        """
+        changes = django_keycloak.services.uma.synchronize_client(
+            client=self.client)
+
+        uma1_client = self.client.uma1_api_client
+        uma1_client.resource_set_list.assert_called_once_with(
+            token='access-token', deep='true', first=0, max=100)
+        self.assertEqual(self.mocked_get_access_token.call_count, 1)
+
+        self.assertIn('auth.permission', changes['create'])
+        self.assertNotIn('auth.user', changes['create'])
+        self.assertEqual(changes['update'], ['auth.group'])
+        self.assertEqual(changes['delete'], ['removed.model'])
+
+        uma1_client.resource_set_create.assert_any_call(
+            token='access-token',
+            name='auth.permission',
+            type='urn:some-client:resources:auth.permission',
+            scopes=['add', 'change', 'delete', 'view']
+        )
+        uma1_client.resource_set_update.assert_called_once_with(
+            token='access-token',
+            id='group-id',
+            name='auth.group',
+            type='urn:some-client:resources:auth.group',
+            scopes=['add', 'change', 'delete', 'view']
+        )
+        uma1_client.resource_set_delete.assert_called_once_with(
+            token='access-token', id='removed-id')
+
+    def test_unchanged_models(self):
+        """
+        Case: models are synchronized again while they did not change.
+        Expected: Keycloak is not called, unless the synchronization is
+        forced.
+        """
+        django_keycloak.services.uma.synchronize_client(client=self.client)
+        self.client.refresh_from_db()
+
+        self.assertIsNone(django_keycloak.services.uma.synchronize_client(
+            client=self.client))
+        self.assertEqual(
+            self.client.uma1_api_client.resource_set_list.call_count, 1)
+
+        django_keycloak.services.uma.synchronize_client(client=self.client,
+                                                        force=True)
+        self.assertEqual(
+            self.client.uma1_api_client.resource_set_list.call_count, 2)
+
+    @mock.patch('django_keycloak.services.uma.PAGE_SIZE', 2)
+    def test_paged(self):
+        """
+        Case: more resources are registered than fit on one page.
+        Expected: all pages are listed, so resources on later pages are not
+        created again and removed models on them are deleted.
+        """
+        resources = self.client.uma1_api_client.resource_set_list\
+            .return_value
+        self.client.uma1_api_client.resource_set_list.side_effect = \
+            lambda token, deep, first, max: resources[first:first + max]
+
+        changes = django_keycloak.services.uma.synchronize_client(
+            client=self.client)
+
+        self.assertEqual(
+            [call[1]['first'] for call in self.client.uma1_api_client
+             .resource_set_list.call_args_list], [0, 2, 4])
+        self.assertNotIn('auth.user', changes['create'])
+        self.assertEqual(changes['delete'], ['removed.model'])
+
+    def test_created_concurrently(self):
+        """
+        Case: a missing resource got created concurrently.
+        Expected: the conflict is ignored.
+        """
+        self.client.uma1_api_client.resource_set_create.side_effect = \
+            KeycloakClientError(original_exc=HTTPError(
+                response=mock.MagicMock(status_code=409)))
+
+        changes = django_keycloak.services.uma.synchronize_client(
+            client=self.client)
+
+        self.assertIn('auth.permission', changes['create'])
@@ -0,0 +1,117 @@
+import json
+import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from keycloak.admin import KeycloakAdmin
+from keycloak.exceptions import KeycloakClientError
+from requests.exceptions import HTTPError
+
+from django_keycloak.factories import ClientFactory, UserFactory
+
+import django_keycloak.services.users
+
+
+class ServicesUsersAddUsersTestCase(TestCase):
+
+    def setUp(self):
+        self.client = ClientFactory(realm__name='realm')
+        self.client.admin_api_client = mock.MagicMock(spec_set=KeycloakAdmin)
+        self.client.admin_api_client.get_full_url.side_effect = \
+            lambda path: 'https://keycloak.example.com' + path
+        self.client.admin_api_client.post.side_effect = \
+            lambda url, data: {'added': len(json.loads(data)['users'])}
+
+        self.users = [
+            UserFactory(username='user-{}'.format(i),
+                        password='pbkdf2_sha512$30000$salt$hash')
+            for i in range(5)
+        ]
+
+    def add_users(self, **kwargs):
+        return list(django_keycloak.services.users.add_users(
+            client=self.client,
+            queryset=get_user_model().objects.filter(
+                pk__in=[user.pk for user in self.users]),
+            chunk_size=2, **kwargs))
+
+    def test_chunks(self):
+        """
+        Case: users are added in chunks.
+        Expected: one partial import request per chunk including the hashed
+        passwords and a report per chunk.
+        """
+        reports = self.add_users()
+
+        self.assertEqual([report['last_pk'] for report in reports],
+                         [self.users[1].pk, self.users[3].pk,
+                          self.users[4].pk])
+        self.assertEqual([report['added'] for report in reports], [2, 2, 1])
+        self.assertEqual(self.client.admin_api_client.post.call_count, 3)
+
+        kwargs = self.client.admin_api_client.post.call_args_list[0][1]
+        self.assertEqual(
+            kwargs['url'], 'https://keycloak.example.com/auth/admin/realms/'
+                           'realm/partialImport')
+        data = json.loads(kwargs['data'])
+        self.assertEqual(data['ifResourceExists'], 'SKIP')
+        self.assertEqual([user['username'] for user in data['users']],
+                         ['user-0', 'user-1'])
+        self.assertEqual(data['users'][0]['credentials'][0]['algorithm'],
+                         'pbkdf2-sha512')
+
+    def test_resume(self):
+        """
+        Case: users are added starting after a checkpoint.
+        Expected: only the users after the checkpoint are added.
+        """
+        reports = self.add_users(start_after=self.users[2].pk)
+
+        self.assertEqual(sum(report['added'] for report in reports), 2)
+
+    def test_failed_chunk(self):
+        """
+        Case: the import of a chunk fails.
+        Expected: the users of the chunk are reported and the other chunks
+        are still imported.
+        """
+        self.client.admin_api_client.post.side_effect = [
+            {'added': 2},
+            KeycloakClientError(original_exc=HTTPError('409 Conflict')),
+            {'added': 1}
+        ]
+
+        reports = self.add_users()
+
+        self.assertEqual([report['failed'] for report in reports],
+                         [False, True, False])
+        self.assertEqual(reports[1]['errors'], {
+            'user-2': '409 Conflict',
+            'user-3': '409 Conflict'
+        })
+        self.assertEqual(sum(report['added'] for report in reports), 3)
+
+    def test_unsupported_hash(self):
+        """
+        Case: a user has a password hashed in an unsupported format or an
+        unusable password.
+        Expected: the unsupported user is reported, the user with an unusable
+        password is added without credentials.
+        """
+        self.users[0].password = 'bcrypt$$2b$12$hash'
+        self.users[0].save()
+        self.users[1].set_unusable_password()
+        self.users[1].save()
+
+        reports = self.add_users()
+
+        self.assertEqual(list(reports[0]['errors']), ['user-0'])
+        data = json.loads(self.client.admin_api_client.post
+                          .call_args_list[0][1]['data'])
+        self.assertEqual(data['users'], [{
+            'username': 'user-1',
+            'firstName': self.users[1].first_name,
+            'lastName': self.users[1].last_name,
+            'email': self.users[1].email,
+            'enabled': True
+        }])
@@ -0,0 +1,87 @@
+import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from keycloak.admin import KeycloakAdmin
+
+from django_keycloak.factories import (
+    ClientFactory,
+    OpenIdConnectProfileFactory,
+    UserFactory
+)
+from django_keycloak.models import OpenIdConnectProfile
+
+import django_keycloak.services.users
+
+
+class ServicesUsersSynchronizeUsersTestCase(TestCase):
+
+    def setUp(self):
+        self.client = ClientFactory(realm__name='realm')
+        self.client.admin_api_client = mock.MagicMock(spec_set=KeycloakAdmin)
+        self.client.admin_api_client.get_full_url.side_effect = \
+            lambda path: 'https://keycloak.example.com' + path
+        self.client.admin_api_client.get.side_effect = [
+            [
+                {'id': 'sub-1', 'username': 'one', 'email': 'one@example.com',
+                 'firstName': 'One'},
+                {'id': 'sub-2', 'username': 'two', 'email': 'two@example.com'}
+            ],
+            [
+                {'id': 'sub-3', 'username': 'three'}
+            ]
+        ]
+
+        self.existing_profile = OpenIdConnectProfileFactory(
+            sub='sub-2', realm=self.client.realm,
+            user=UserFactory(username='sub-2', email='old@example.com'))
+        self.stale_profile = OpenIdConnectProfileFactory(
+            sub='removed', realm=self.client.realm)
+
+    def test_synchronize(self):
+        """
+        Case: the users of the realm are synchronized.
+        Expected: the users are paged, missing users and profiles are created
+        and changed users are updated.
+        """
+        counts = django_keycloak.services.users.synchronize_users(
+            client=self.client, page_size=2)
+
+        self.assertEqual(counts, {'created': 2, 'updated': 0, 'deleted': 0})
+        self.assertEqual(
+            [call[1]['url'] for call in
+             self.client.admin_api_client.get.call_args_list],
+            ['https://keycloak.example.com/auth/admin/realms/realm/users?'
+             'first=0&max=2',
+             'https://keycloak.example.com/auth/admin/realms/realm/users?'
+             'first=2&max=2'])
+
+        user = get_user_model().objects.get(username='sub-1')
+        self.assertEqual(user.email, 'one@example.com')
+        self.assertEqual(user.first_name, 'One')
+        self.assertFalse(user.has_usable_password())
+        self.assertEqual(user.oidc_profile.sub, 'sub-1')
+        self.assertEqual(user.oidc_profile.realm, self.client.realm)
+
+        self.existing_profile.user.refresh_from_db()
+        self.assertEqual(self.existing_profile.user.email, 'two@example.com')
+
+        self.assertTrue(
+            OpenIdConnectProfile.objects.filter(sub='sub-3').exists())
+        self.assertTrue(
+            OpenIdConnectProfile.objects.filter(sub='removed').exists())
+
+    def test_prune(self):
+        """
+        Case: the users are synchronized with pruning enabled.
+        Expected: profiles of users which no longer exist in Keycloak are
+        deleted, the profile of the service account is kept.
+        """
+        counts = django_keycloak.services.users.synchronize_users(
+            client=self.client, page_size=2, prune=True)
+
+        self.assertEqual(counts['deleted'], 1)
+        self.assertFalse(
+            OpenIdConnectProfile.objects.filter(sub='removed').exists())
+        self.assertTrue(OpenIdConnectProfile.objects.filter(
+            pk=self.client.service_account_profile.pk).exists())
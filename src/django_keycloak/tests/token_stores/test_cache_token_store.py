@@ -0,0 +1,128 @@
+import mock
+
+from datetime import datetime
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from freezegun import freeze_time
+from keycloak.openid_connect import KeycloakOpenidConnect
+
+from django_keycloak.factories import (
+    OpenIdConnectProfileFactory,
+    RemoteClientFactory
+)
+from django_keycloak.models import ExchangedToken, OpenIdConnectProfile
+from django_keycloak.token_stores import CacheTokenStore
+
+import django_keycloak.services.oidc_profile
+
+
+@freeze_time('2018-03-05 00:00:00')
+@override_settings(
+    KEYCLOAK_TOKEN_STORE='django_keycloak.token_stores.CacheTokenStore')
+class CacheTokenStoreTestCase(TestCase):
+
+    def setUp(self):
+        self.token_store = CacheTokenStore()
+        self.oidc_profile = OpenIdConnectProfileFactory()
+        self.token_response = {
+            'access_token': 'access-token',
+            'expires_in': 300,
+            'refresh_token': 'refresh-token',
+            'refresh_expires_in': 1800,
+            'session_state': 'session-state'
+        }
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_save_and_load(self):
+        """
+        Case: tokens of an existing profile are updated.
+        Expected: the tokens are stored in the cache only and loaded on
+        another instance of the profile.
+        """
+        django_keycloak.services.oidc_profile.update_tokens(
+            token_model=self.oidc_profile,
+            token_response=self.token_response,
+            initiate_time=datetime(2018, 3, 5, 0, 0, 0)
+        )
+
+        oidc_profile = OpenIdConnectProfile.objects.get(
+            pk=self.oidc_profile.pk)
+        self.assertIsNone(oidc_profile.access_token)
+        self.assertIsNone(oidc_profile.session_state)
+
+        self.token_store.load(oidc_profile)
+        self.assertEqual(oidc_profile.access_token, 'access-token')
+        self.assertEqual(oidc_profile.refresh_token, 'refresh-token')
+        self.assertEqual(oidc_profile.expires_before,
+                         datetime(2018, 3, 5, 0, 5, 0))
+        self.assertEqual(oidc_profile.session_state, 'session-state')
+
+    def test_save_new(self):
+        """
+        Case: tokens are stored on an exchanged token which does not exist
+        yet.
+        Expected: the row is created without the tokens.
+        """
+        exchanged_token = ExchangedToken(
+            oidc_profile=self.oidc_profile,
+            remote_client=RemoteClientFactory(realm=self.oidc_profile.realm))
+
+        django_keycloak.services.oidc_profile.update_tokens(
+            token_model=exchanged_token,
+            token_response=self.token_response,
+            initiate_time=datetime(2018, 3, 5, 0, 0, 0)
+        )
+
+        self.assertEqual(exchanged_token.access_token, 'access-token')
+        stored = ExchangedToken.objects.get(pk=exchanged_token.pk)
+        self.assertIsNone(stored.access_token)
+        self.assertEqual(self.token_store.load_many([stored])[0].access_token,
+                         'access-token')
+
+    def test_refresh(self):
+        """
+        Case: the access token of a profile in the cache is expired.
+        Expected: the tokens are refreshed and stored in the cache, the row
+        is not written.
+        """
+        self.oidc_profile.realm.client.openid_api_client = mock.MagicMock(
+            spec_set=KeycloakOpenidConnect)
+        self.oidc_profile.realm.client.openid_api_client.refresh_token\
+            .return_value = dict(self.token_response,
+                                 access_token='new-access-token')
+
+        django_keycloak.services.oidc_profile.update_tokens(
+            token_model=self.oidc_profile,
+            token_response=self.token_response,
+            initiate_time=datetime(2018, 3, 4, 23, 50, 0)
+        )
+
+        with mock.patch.object(OpenIdConnectProfile, 'save') as mocked_save:
+            access_token = django_keycloak.services.oidc_profile\
+                .get_active_access_token(oidc_profile=self.oidc_profile)
+
+        self.assertEqual(access_token, 'new-access-token')
+        self.assertFalse(mocked_save.called)
+        self.assertEqual(
+            self.token_store.load(OpenIdConnectProfile.objects.get(
+                pk=self.oidc_profile.pk)).access_token,
+            'new-access-token')
+
+    def test_clear(self):
+        """
+        Case: the tokens of profiles are cleared.
+        Expected: the tokens are removed from the cache.
+        """
+        django_keycloak.services.oidc_profile.update_tokens(
+            token_model=self.oidc_profile,
+            token_response=self.token_response,
+            initiate_time=datetime(2018, 3, 5, 0, 0, 0)
+        )
+
+        self.token_store.clear(OpenIdConnectProfile.objects.all())
+
+        self.token_store.load(self.oidc_profile)
+        self.assertIsNone(self.oidc_profile.access_token)
+        self.assertIsNone(self.oidc_profile.refresh_expires_before)
@@ -0,0 +1,103 @@
+from datetime import datetime
+
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from freezegun import freeze_time
+
+from django_keycloak.factories import OpenIdConnectProfileFactory
+from django_keycloak.models import OpenIdConnectProfile
+from django_keycloak.token_stores import SessionTokenStore
+
+
+class SessionTokenStoreTestCase(TestCase):
+
+    def setUp(self):
+        self.token_store = SessionTokenStore()
+        self.oidc_profile = OpenIdConnectProfileFactory(
+            access_token='access-token',
+            expires_before=datetime(2018, 3, 5, 0, 5, 0),
+            refresh_token='refresh-token',
+            refresh_expires_before=datetime(2018, 3, 5, 0, 30, 0)
+        )
+
+        self.request = RequestFactory().get('/')
+        self.request.session = SessionStore()
+        self.request.session[SESSION_KEY] = str(self.oidc_profile.user_id)
+        self.request.session.modified = False
+
+        self.token_store.bind(self.request)
+        self.addCleanup(self.token_store.unbind)
+
+        cache.clear()
+
+    def test_profile_of_session(self):
+        """
+        Case: tokens of the profile of the logged in user are saved.
+        Expected: the tokens are stored in the session and loaded from it,
+        the row is not written.
+        """
+        self.oidc_profile.access_token = 'new-access-token'
+        self.oidc_profile.expires_before = datetime(2018, 3, 5, 0, 10, 0)
+        self.token_store.save(self.oidc_profile)
+
+        self.assertTrue(self.request.session.modified)
+
+        oidc_profile = OpenIdConnectProfile.objects.get(
+            pk=self.oidc_profile.pk)
+        self.assertEqual(oidc_profile.access_token, 'access-token')
+
+        self.token_store.load(oidc_profile)
+        self.assertEqual(oidc_profile.access_token, 'new-access-token')
+        self.assertEqual(oidc_profile.expires_before,
+                         datetime(2018, 3, 5, 0, 10, 0))
+
+    def test_other_profile(self):
+        """
+        Case: tokens of another profile are saved, or no session is bound.
+        Expected: the tokens are stored in the database.
+        """
+        other_profile = OpenIdConnectProfileFactory()
+        other_profile.access_token = 'other-access-token'
+        self.token_store.save(other_profile)
+
+        self.token_store.unbind()
+        self.oidc_profile.access_token = 'new-access-token'
+        self.token_store.save(self.oidc_profile)
+
+        self.assertFalse(self.request.session.modified)
+        self.assertEqual(
+            OpenIdConnectProfile.objects.get(pk=other_profile.pk)
+            .access_token, 'other-access-token')
+        self.assertEqual(
+            OpenIdConnectProfile.objects.get(pk=self.oidc_profile.pk)
+            .access_token, 'new-access-token')
+
+    def test_clear(self):
+        """
+        Case: the tokens of the profile are cleared while they are held in
+        the session.
+        Expected: the tokens in the session are no longer loaded, tokens
+        which are stored afterwards are.
+        """
+        with freeze_time('2018-03-05 00:00:00') as frozen_time:
+            self.oidc_profile.access_token = 'session-access-token'
+            self.token_store.save(self.oidc_profile)
+
+            frozen_time.tick()
+            self.token_store.clear(OpenIdConnectProfile.objects.filter(
+                pk=self.oidc_profile.pk))
+
+            oidc_profile = self.token_store.load(
+                OpenIdConnectProfile.objects.get(pk=self.oidc_profile.pk))
+            self.assertIsNone(oidc_profile.access_token)
+            self.assertIsNone(oidc_profile.refresh_token)
+
+            frozen_time.tick()
+            oidc_profile.access_token = 'new-access-token'
+            self.token_store.save(oidc_profile)
+
+            self.assertEqual(
+                self.token_store.load(oidc_profile).access_token,
+                'new-access-token')
@@ -0,0 +1,184 @@
+import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.core import signing
+from django.test import RequestFactory, TestCase, override_settings
+from freezegun import freeze_time
+from keycloak.openid_connect import KeycloakOpenidConnect
+
+from django_keycloak.factories import RealmFactory
+from django_keycloak.middleware import BaseKeycloakMiddleware
+from django_keycloak.models import Nonce, OpenIdConnectProfile
+from django_keycloak.tests.mixins import MockTestCaseMixin
+from django_keycloak.token_stores import SessionTokenStore
+from django_keycloak.views import STATE_SALT, Login, LoginComplete
+
+
+@override_settings(ROOT_URLCONF='django_keycloak.urls',
+                   KEYCLOAK_SIGNED_STATE=True)
+class ViewsLoginCompleteSignedStateTestCase(MockTestCaseMixin, TestCase):
+
+    def setUp(self):
+        self.mocked_authenticate = self.setup_mock(
+            'django_keycloak.views.authenticate')
+        self.mocked_login = self.setup_mock('django_keycloak.views.login')
+
+        self.realm = RealmFactory()
+        self.session = {}
+
+    def login(self, next_path='/next'):
+        request = RequestFactory().get('/login', {'next': next_path})
+        request.realm = self.realm
+        request.session = self.session
+
+        self.realm.client.openid_api_client.authorization_url = \
+            lambda redirect_uri, scope, state: 'https://keycloak.example.com'
+
+        Login.as_view()(request)
+
+        return self.session['oidc_state']
+
+    def login_complete(self, state):
+        request = RequestFactory().get('/login-complete', {
+            'code': 'some-code',
+            'state': state
+        })
+        request.realm = self.realm
+        request.session = self.session
+
+        return LoginComplete.as_view()(request)
+
+    def test_login(self):
+        """
+        Case: a user logs in with signed states enabled.
+        Expected: the authorization code is authenticated with the redirect
+        uri from the state and the user is redirected to the next path,
+        without storing a nonce.
+        """
+        state = self.login()
+
+        response = self.login_complete(state)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, '/next')
+        self.mocked_authenticate.assert_called_once_with(
+            request=self.mocked_authenticate.call_args[1]['request'],
+            code='some-code',
+            redirect_uri='http://testserver/login-complete'
+        )
+        self.assertFalse(Nonce.objects.exists())
+
+    def test_replay(self):
+        """
+        Case: the callback of a completed login is requested again.
+        Expected: the user has to login again.
+        """
+        state = self.login()
+        self.login_complete(state)
+
+        response = self.login_complete(state)
+
+        self.assertEqual(response.url, '/login')
+        self.assertEqual(self.mocked_authenticate.call_count, 1)
+
+    def test_tampered_state(self):
+        """
+        Case: the signed state got tampered with.
+        Expected: the user has to login again.
+        """
+        self.login()
+        state = signing.dumps({'redirect_uri': 'https://evil.example.com',
+                               'next_path': None, 'nonce': 'x'},
+                              salt='other-salt')
+        self.session['oidc_state'] = state
+
+        response = self.login_complete(state)
+
+        self.assertEqual(response.url, '/login')
+        self.assertFalse(self.mocked_authenticate.called)
+
+    def test_expired_state(self):
+        """
+        Case: the user completes the login after the state expired.
+        Expected: the user has to login again.
+        """
+        with freeze_time('2018-03-05 00:00:00'):
+            state = self.login()
+
+        with freeze_time('2018-03-05 00:11:00'):
+            response = self.login_complete(state)
+
+        self.assertEqual(response.url, '/login')
+        self.assertFalse(self.mocked_authenticate.called)
+
+    def test_other_session(self):
+        """
+        Case: a valid state is used in another session.
+        Expected: the user has to login again.
+        """
+        state = signing.dumps({'redirect_uri': 'https://example.com',
+                               'next_path': None, 'nonce': 'x'},
+                              salt=STATE_SALT)
+
+        response = self.login_complete(state)
+
+        self.assertEqual(response.url, '/login')
+        self.assertFalse(self.mocked_authenticate.called)
+
+
+@override_settings(
+    ROOT_URLCONF='django_keycloak.urls',
+    KEYCLOAK_TOKEN_STORE='django_keycloak.token_stores.SessionTokenStore')
+class ViewsLoginCompleteSessionTokenStoreTestCase(TestCase):
+
+    def setUp(self):
+        self.realm = RealmFactory(
+            _certs='{}', _well_known_oidc='{"issuer": "https://issuer"}')
+        self.realm.client.openid_api_client = mock.MagicMock(
+            spec_set=KeycloakOpenidConnect)
+        self.realm.client.openid_api_client.authorization_code\
+            .return_value = {
+                'id_token': 'id-token',
+                'expires_in': 600,
+                'refresh_expires_in': 3600,
+                'access_token': 'access-token',
+                'refresh_token': 'refresh-token',
+                'session_state': 'some-session'
+            }
+        self.realm.client.openid_api_client.well_known = {
+            'id_token_signing_alg_values_supported': ['signing-alg']
+        }
+        self.realm.client.openid_api_client.decode_token.return_value = {
+            'sub': 'some-sub'
+        }
+
+        self.nonce = Nonce.objects.create(redirect_uri='https://redirect')
+
+    def test_tokens_in_session(self):
+        """
+        Case: a user logs in with the session token store.
+        Expected: the tokens end up in the session, not in the profile row.
+        """
+        request = RequestFactory().get('/login-complete', {
+            'code': 'some-code',
+            'state': str(self.nonce.state)
+        })
+        request._cached_realm = self.realm
+        request.user = AnonymousUser()
+        request.session = SessionStore()
+        request.session['oidc_state'] = str(self.nonce.state)
+
+        middleware = BaseKeycloakMiddleware(
+            lambda request: LoginComplete.as_view()(request))
+        response = middleware(request)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            request.session[SessionTokenStore.session_key]['access_token'],
+            'access-token')
+
+        oidc_profile = OpenIdConnectProfile.objects.get(sub='some-sub')
+        self.assertIsNone(oidc_profile.access_token)
+        self.assertIsNone(oidc_profile.refresh_token)
+        self.assertIsNone(oidc_profile.expires_before)
@@ -0,0 +1,420 @@
+import contextlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.module_loading import import_string
+
+from django_keycloak.models import OpenIdConnectProfileAbstract
+
+try:
+    # Local to the request, also when served by ASGI.
+    from asgiref.local import Local
+except ImportError:  # Django < 3.0
+    from threading import local as Local
+
+logger = logging.getLogger(__name__)
+
+TOKEN_FIELDS = ['access_token', 'expires_before', 'refresh_token',
+                'refresh_expires_before']
+
+_token_stores = {}
+_token_stores_lock = threading.Lock()
+
+
+def get_token_store():
+    """
+    Return the token store which is configured in KEYCLOAK_TOKEN_STORE.
+
+    :rtype: BaseTokenStore
+    """
+    path = settings.KEYCLOAK_TOKEN_STORE
+    token_store = _token_stores.get(path)
+    if token_store is None:
+        with _token_stores_lock:
+            try:
+                token_store = _token_stores.setdefault(
+                    path, import_string(path)())
+            except ImportError:
+                raise ImproperlyConfigured(
+                    "KEYCLOAK_TOKEN_STORE refers to non-existing class")
+    return token_store
+
+
+class BaseTokenStore(object):
+    """
+    Stores the tokens of token models (OpenID Connect profiles and exchanged
+    tokens). The tokens are set as attributes of the token model by `load`
+    and stored from those attributes by `save`.
+    """
+
+    # Whether the tokens can only be stored during a request, which rules
+    # out refreshing them in the background.
+    request_bound = False
+
+    # Whether the tokens are loaded with the row of the token model, so
+    # `load` doesn't have to be called for token models fetched from the
+    # database.
+    loads_from_model = False
+
+    def get_fields(self, token_model):
+        """
+        :param django_keycloak.models.TokenModelAbstract token_model:
+        :rtype: list
+        :return: names of the attributes which are stored
+        """
+        if isinstance(token_model, OpenIdConnectProfileAbstract):
+            return TOKEN_FIELDS + ['session_state']
+        return list(TOKEN_FIELDS)
+
+    def load(self, token_model):
+        """
+        Set the stored tokens on the token model.
+
+        :param django_keycloak.models.TokenModelAbstract token_model:
+        :rtype: django_keycloak.models.TokenModelAbstract
+        """
+        raise NotImplementedError()
+
+    def load_many(self, token_models):
+        """
+        :param list token_models:
+        :rtype: list
+        """
+        return [self.load(token_model) for token_model in token_models]
+
+    def save(self, token_model):
+        """
+        Store the tokens of the token model, the token model is created when
+        it does not exist yet.
+
+        :param django_keycloak.models.TokenModelAbstract token_model:
+        :rtype: django_keycloak.models.TokenModelAbstract
+        """
+        raise NotImplementedError()
+
+    def clear(self, queryset):
+        """
+        Remove the tokens of the token models in the queryset.
+
+        :param django.db.models.QuerySet queryset:
+        """
+        raise NotImplementedError()
+
+    def lock(self, token_model):
+        """
+        Context manager which serializes refreshes of the tokens of the token
+        model and loads the current tokens once the lock is acquired.
+
+        :param django_keycloak.models.TokenModelAbstract token_model:
+        """
+        raise NotImplementedError()
+
+    def logged_in(self, token_model):
+        """
+        Called when the user of the OpenID Connect profile logged in, after
+        the tokens got stored.
+
+        :param django_keycloak.models.OpenIdConnectProfileAbstract token_model:
+        """
+
+    def bind(self, request):
+        """
+        Called by the middleware at the start of a request.
+
+        :param django.http.HttpRequest request:
+        """
+
+    def unbind(self):
+        """
+        Called by the middleware at the end of a request.
+        """
+
+
+class DatabaseTokenStore(BaseTokenStore):
+    """
+    Stores the tokens in the columns of the token model.
+    """
+
+    loads_from_model = True
+
+    def load(self, token_model):
+        # Loaded with the row
+        return token_model
+
+    def save(self, token_model):
+        if token_model._state.adding:
+            token_model.save()
+        else:
+            token_model.save(update_fields=self.get_fields(token_model))
+        return token_model
+
+    def clear(self, queryset):
+        queryset.update(**{field_name: None for field_name in TOKEN_FIELDS})
+
+    @contextlib.contextmanager
+    def lock(self, token_model):
+        with transaction.atomic():
+            current = type(token_model).objects.select_for_update()\
+                .only(*TOKEN_FIELDS).get(pk=token_model.pk)
+
+            for field_name in TOKEN_FIELDS:
+                setattr(token_model, field_name,
+                        getattr(current, field_name))
+
+            yield token_model
+
+
+class CacheTokenStore(BaseTokenStore):
+    """
+    Stores the tokens in the Django cache configured in
+    KEYCLOAK_TOKEN_STORE_CACHE until the refresh token expires. The rows of
+    the token models are only written when they get created, their token
+    columns stay empty.
+    """
+
+    key_prefix = 'django_keycloak.tokens'
+
+    @property
+    def cache(self):
+        return caches[settings.KEYCLOAK_TOKEN_STORE_CACHE]
+
+    def get_key(self, model, pk):
+        """
+        :param type model:
+        :param pk:
+        :rtype: str
+        """
+        return '{}:{}:{}'.format(self.key_prefix, model._meta.label_lower,
+                                 pk)
+
+    def load(self, token_model):
+        return self._set(token_model, self.cache.get(
+            self.get_key(type(token_model), token_model.pk)))
+
+    def load_many(self, token_models):
+        keys = {
+            token_model: self.get_key(type(token_model), token_model.pk)
+            for token_model in token_models
+        }
+        values = self.cache.get_many(list(keys.values()))
+        return [self._set(token_model, values.get(keys[token_model]))
+                for token_model in token_models]
+
+    def save(self, token_model):
+        values = {field_name: getattr(token_model, field_name)
+                  for field_name in self.get_fields(token_model)}
+
+        if token_model._state.adding:
+            # Create the row without the tokens.
+            self._set(token_model, None)
+            token_model.save()
+            self._set(token_model, values)
+
+        key = self.get_key(type(token_model), token_model.pk)
+        expires_before = token_model.refresh_expires_before or \
+            token_model.expires_before
+        if expires_before is None:
+            self.cache.delete(key)
+        else:
+            timeout = (expires_before - timezone.now()).total_seconds()
+            self.cache.set(key, values, max(int(timeout), 1))
+
+        return token_model
+
+    def clear(self, queryset):
+        self.cache.delete_many([
+            self.get_key(queryset.model, pk)
+            for pk in queryset.values_list('pk', flat=True)
+        ])
+
+    @contextlib.contextmanager
+    def lock(self, token_model):
+        key = '{}:lock'.format(self.get_key(type(token_model),
+                                            token_model.pk))
+        timeout = settings.KEYCLOAK_TOKEN_STORE_LOCK_TIMEOUT
+        deadline = time.time() + timeout
+
+        locked = self.cache.add(key, True, timeout)
+        while not locked and time.time() < deadline:
+            time.sleep(0.05)
+            locked = self.cache.add(key, True, timeout)
+
+        if not locked:
+            logger.warning('Refreshing tokens of {} without lock'.format(
+                key))
+
+        try:
+            yield self.load(token_model)
+        finally:
+            if locked:
+                self.cache.delete(key)
+
+    def _set(self, token_model, values):
+        """
+        :param django_keycloak.models.TokenModelAbstract token_model:
+        :param dict | None values: None removes the tokens
+        :rtype: django_keycloak.models.TokenModelAbstract
+        """
+        for field_name in self.get_fields(token_model):
+            setattr(token_model, field_name,
+                    (values or {}).get(field_name))
+        return token_model
+
+
+class SessionTokenStore(DatabaseTokenStore):
+    """
+    Stores the tokens of the OpenID Connect profile of the user who is logged
+    in in the session of the request, other tokens in the database. Combined
+    with the signed cookies session engine the tokens are kept by the client.
+
+    The session is bound to the current request by the Keycloak middleware,
+    refreshing ahead of expiry in the background is not supported. Refreshes
+    are not serialized across processes: concurrent requests of one session
+    can use the same refresh token, so refresh token rotation (Keycloak's
+    "Revoke Refresh Token") is not supported either.
+
+    Tokens in sessions can't be removed by `clear`, instead the time they got
+    cleared is kept in the cache configured in KEYCLOAK_TOKEN_STORE_CACHE and
+    tokens which were stored before are no longer loaded.
+    """
+
+    request_bound = True
+    loads_from_model = False
+    session_key = '_keycloak_tokens'
+    cleared_key_prefix = 'django_keycloak.tokens.cleared'
+
+    def __init__(self):
+        self._local = Local()
+
+    def bind(self, request):
+        self._local.session = getattr(request, 'session', None)
+
+    def unbind(self):
+        self._local.session = None
+
+    def load(self, token_model):
+        session = self._get_session(token_model)
+        if session is None:
+            return super(SessionTokenStore, self).load(token_model)
+
+        values = session.get(self.session_key, {})
+        if values and self._is_cleared(token_model, values):
+            del session[self.session_key]
+            values = {}
+        if not values:
+            # Stored in the database before the user was logged in.
+            return super(SessionTokenStore, self).load(token_model)
+
+        for field_name in self.get_fields(token_model):
+            value = values.get(field_name)
+            if field_name in ('expires_before', 'refresh_expires_before') \
+                    and value is not None:
+                value = parse_datetime(value)
+            setattr(token_model, field_name, value)
+        return token_model
+
+    def save(self, token_model):
+        session = self._get_session(token_model)
+        if session is None or token_model._state.adding:
+            return super(SessionTokenStore, self).save(token_model)
+
+        values = {}
+        for field_name in self.get_fields(token_model):
+            value = getattr(token_model, field_name)
+            if field_name in ('expires_before', 'refresh_expires_before') \
+                    and value is not None:
+                value = value.isoformat()
+            values[field_name] = value
+        values['stored_at'] = time.time()
+        session[self.session_key] = values
+        return token_model
+
+    def clear(self, queryset):
+        super(SessionTokenStore, self).clear(queryset)
+
+        if not issubclass(queryset.model, OpenIdConnectProfileAbstract):
+            return
+
+        # Kept without expiry, the tokens in the sessions can be refreshed
+        # for as long as the sessions exist.
+        cleared_at = time.time()
+        self.cache.set_many({
+            self._get_cleared_key(queryset.model, pk): cleared_at
+            for pk in queryset.values_list('pk', flat=True)
+        }, None)
+
+    def logged_in(self, token_model):
+        session = self._get_session(token_model)
+        if session is None:
+            return
+
+        self.save(token_model)
+        # The tokens were issued before the user was logged in, so they got
+        # stored in the database.
+        type(token_model).objects.filter(pk=token_model.pk).update(
+            **{field_name: None for field_name in TOKEN_FIELDS})
+
+    @contextlib.contextmanager
+    def lock(self, token_model):
+        if self._get_session(token_model) is None:
+            with super(SessionTokenStore, self).lock(token_model):
+                yield token_model
+        else:
+            # Other processes can't see the tokens in this session, so
+            # concurrent requests are serialized by the lock in the process
+            # only.
+            yield self.load(token_model)
+
+    @property
+    def cache(self):
+        return caches[settings.KEYCLOAK_TOKEN_STORE_CACHE]
+
+    def _get_cleared_key(self, model, pk):
+        """
+        :param type model:
+        :param pk:
+        :rtype: str
+        """
+        return '{}:{}:{}'.format(self.cleared_key_prefix,
+                                 model._meta.label_lower, pk)
+
+    def _is_cleared(self, token_model, values):
+        """
+        :param django_keycloak.models.TokenModelAbstract token_model:
+        :param dict values: the tokens in the session
+        :rtype: bool
+        :return: whether the tokens got cleared after they were stored
+        """
+        cleared_at = self.cache.get(
+            self._get_cleared_key(type(token_model), token_model.pk))
+        return cleared_at is not None \
+            and cleared_at >= values.get('stored_at', 0)
+
+    def _get_session(self, token_model):
+        """
+        :param django_keycloak.models.TokenModelAbstract token_model:
+        :rtype: django.contrib.sessions.backends.base.SessionBase | None
+        :return: the bound session when the token model is the profile of
+            the user who is logged in
+        """
+        from django.contrib.auth import SESSION_KEY
+        from django_keycloak.auth import REMOTE_SESSION_KEY
+
+        session = getattr(self._local, 'session', None)
+        if session is None \
+                or not isinstance(token_model, OpenIdConnectProfileAbstract):
+            return None
+
+        if session.get(REMOTE_SESSION_KEY) == token_model.sub \
+                or session.get(SESSION_KEY) == str(
+                    getattr(token_model, 'user_id', None)):
+            return session
+
+        return None
@@ -14,12 +14,14 @@ except ImportError:
 
 from django.conf import settings
 from django.contrib.auth import authenticate, login, logout
+from django.core import signing
 from django.http.response import (
     HttpResponseBadRequest,
     HttpResponseServerError,
     HttpResponseRedirect
 )
 from django.urls.base import reverse
+from django.utils.crypto import get_random_string
 from django.views.generic.base import (
     RedirectView,
     TemplateView
@@ -28,26 +30,41 @@ from django.views.generic.base import (
 from django_keycloak.models import Nonce
 from django_keycloak.auth import remote_user_login
 
+import django_keycloak.services.oidc_profile
+import django_keycloak.token_stores
+
 
 logger = logging.getLogger(__name__)
 
+STATE_SALT = 'django_keycloak.views.state'
+
 
 class Login(RedirectView):
 
     def get_redirect_url(self, *args, **kwargs):
 
-        nonce = Nonce.objects.create(
-            redirect_uri=self.request.build_absolute_uri(
-                location=reverse('keycloak_login_complete')),
-            next_path=self.request.GET.get('next'))
+        redirect_uri = self.request.build_absolute_uri(
+            location=reverse('keycloak_login_complete'))
+        next_path = self.request.GET.get('next')
+
+        if settings.KEYCLOAK_SIGNED_STATE:
+            state = signing.dumps({
+                'redirect_uri': redirect_uri,
+                'next_path': next_path,
+                'nonce': get_random_string(32)
+            }, salt=STATE_SALT)
+        else:
+            nonce = Nonce.objects.create(redirect_uri=redirect_uri,
+                                         next_path=next_path)
+            state = str(nonce.state)
 
-        self.request.session['oidc_state'] = str(nonce.state)
+        self.request.session['oidc_state'] = state
 
         authorization_url = self.request.realm.client.openid_api_client\
             .authorization_url(
-                redirect_uri=nonce.redirect_uri,
+                redirect_uri=redirect_uri,
                 scope='openid given_name family_name email',
-                state=str(nonce.state)
+                state=state
             )
 
         if self.request.realm.server.internal_url:
@@ -78,11 +95,28 @@ class LoginComplete(RedirectView):
             # Missing or incorrect state; login again.
             return HttpResponseRedirect(reverse('keycloak_login'))
 
-        nonce = Nonce.objects.get(state=request.GET['state'])
+        # The state can be used only once.
+        request.session.pop('oidc_state')
+
+        nonce = None
+        if settings.KEYCLOAK_SIGNED_STATE:
+            try:
+                state = signing.loads(
+                    request.GET['state'], salt=STATE_SALT,
+                    max_age=settings.KEYCLOAK_SIGNED_STATE_MAX_AGE)
+            except signing.BadSignature:
+                # Tampered or expired state; login again.
+                return HttpResponseRedirect(reverse('keycloak_login'))
+            redirect_uri = state['redirect_uri']
+            next_path = state['next_path']
+        else:
+            nonce = Nonce.objects.get(state=request.GET['state'])
+            redirect_uri = nonce.redirect_uri
+            next_path = nonce.next_path
 
         user = authenticate(request=request,
                             code=request.GET['code'],
-                            redirect_uri=nonce.redirect_uri)
+                            redirect_uri=redirect_uri)
 
         RemoteUserModel = get_remote_user_model()
         if isinstance(user, RemoteUserModel):
@@ -90,9 +124,15 @@ class LoginComplete(RedirectView):
         else:
             login(request, user)
 
-        nonce.delete()
+        oidc_profile = getattr(user, 'oidc_profile', None)
+        if oidc_profile is not None:
+            django_keycloak.token_stores.get_token_store().logged_in(
+                oidc_profile)
+
+        if nonce is not None:
+            nonce.delete()
 
-        return HttpResponseRedirect(nonce.next_path or '/')
+        return HttpResponseRedirect(next_path or '/')
 
 
 class Logout(RedirectView):
@@ -102,16 +142,16 @@ class Logout(RedirectView):
             self.request.realm.client.openid_api_client.logout(
                 self.request.user.oidc_profile.refresh_token
             )
+            django_keycloak.services.oidc_profile.evict_verified_tokens(
+                sub=self.request.user.oidc_profile.sub)
+            django_keycloak.services.oidc_profile.invalidate_entitlement(
+                oidc_profile=self.request.user.oidc_profile)
             self.request.user.oidc_profile.access_token = None
             self.request.user.oidc_profile.expires_before = None
             self.request.user.oidc_profile.refresh_token = None
             self.request.user.oidc_profile.refresh_expires_before = None
-            self.request.user.oidc_profile.save(update_fields=[
-                'access_token',
-                'expires_before',
-                'refresh_token',
-                'refresh_expires_before'
-            ])
+            django_keycloak.token_stores.get_token_store().save(
+                self.request.user.oidc_profile)
 
         logout(self.request)
 